@@ -241,8 +241,19 @@ def ch_7_original():
     print(f'test_7 (original): {(end_time - start_time):.5f} sec.;')
 
 
+def ch_7_packed():
+    key: str = 'test_7_packed'
+    value: list[int] = [i for i in range(1_000_000)]
+    start_time = perf_counter()
+    r.r_set_packed(key, value)
+    r.r_delete(key)
+    end_time = perf_counter()
+    print(f'test_7 (packed): {(end_time - start_time):.5f} sec.;')
+
+
 if __name__ == '__main__':
     original_r.flushall()
     for i in range(1, 8):
         ch, orig = globals()[f'ch_{i}'], globals()[f'ch_{i}_original']
         ch(), ch(cache=True), orig(), print('\n')
+    ch_7_packed()
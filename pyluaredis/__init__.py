@@ -1,7 +1,12 @@
 """ Entry point for: from pyluaredis import ... """
 from importlib.metadata import metadata, version, PackageNotFoundError
 from pyluaredis.client import PyRedis
+from pyluaredis.async_client import AsyncPyRedis
+from pyluaredis.cluster import PyRedisCluster
 from pyluaredis.data_type_converter import TypeConverter
+from pyluaredis.exceptions import (
+    PyRedisError, ClusterNotSupportedError, PackedArrayNotSupportedError, TypedValuesNotSupportedError
+)
 
 
 try:
@@ -0,0 +1,910 @@
+"""
+Asynchronous client for working with the Redis database (asyncio)
+Original library documentation: https://redis-py.readthedocs.io/en/stable/examples/asyncio_examples.html
+"""
+# The methods intentionally mirror PyRedis (client.py) one-to-one
+# pylint: disable=duplicate-code
+from asyncio import sleep, create_task, gather
+from inspect import iscoroutinefunction, isawaitable
+from typing import AsyncIterator, Callable
+from uuid import uuid4
+from redis.asyncio import (
+    Redis as aRedis,
+    BlockingConnectionPool as aBlockingConnectionPool
+)
+from redis import (
+    ConnectionError as rConnectionError,
+    TimeoutError as rTimeoutError
+)
+from redis.exceptions import NoScriptError
+
+from pyluaredis.memoize import _cached_coroutine_function
+from pyluaredis.lock import AsyncPyRedisLock
+from pyluaredis.helpers import (
+    _ALL_SUPPORTED_TYPES, _remove_duplicates, _load_lua_script_from_file,
+    _compare_and_select_sec_ms, _is_value_supported, _set_script_arguments, _parse_value_with_type, _mass_delete_result,
+    _lua_script_names, _convert_reply, _encode_typed_value, _UNKNOWN_CONTAINER_TAG, _bulk_insert_arguments,
+    _mass_set_batches, _parse_mass_delete_reply, _lease_key, _should_refresh,
+    _rate_limit_arguments, _parse_rate_limit_reply, _check_not_packed, _pairs_to_dict
+)
+
+
+class AsyncPyRedis:
+    """
+    The asyncio version of PyRedis: the same methods and the same Lua scripts, but all calls are coroutines
+    and do not block the event loop.
+    """
+    __slots__ = (
+        'redis', 'lua_scripts_sha', 'user_lua_scripts_buffer', 'preload_lua_scripts', 'typed_values', 'refresh_tasks',
+        'lock_metrics'
+    )
+
+    def __init__(
+            self, host: str = 'localhost', port: int = 6379, password='', username='default', db=0,
+            socket_timeout: int | float = 0.1,
+            retry_on_timeout: bool = True,
+            socket_keepalive: bool = True,
+            max_connections: int = 50,
+            preload_lua_scripts: bool = True,
+            typed_values: bool = False,
+    ):
+        """
+        :param typed_values: write values with a type tag (see PyRedis)
+        """
+        self.redis = aRedis(
+            # a blocking pool: with thousands of concurrent coroutines,
+            # calls wait for a free connection instead of raising 'Too many connections'
+            connection_pool=aBlockingConnectionPool(
+                host=host,
+                port=port,
+                password=password,
+                username=username,
+                db=db,
+                socket_timeout=socket_timeout,
+                encoding='utf-8',
+                decode_responses=True,
+                retry_on_timeout=retry_on_timeout,
+                socket_keepalive=socket_keepalive,
+                max_connections=max_connections,
+            )
+        )
+        self.lua_scripts_sha: dict = {}  # saving SHA1 hash of Lua scripts
+        self.user_lua_scripts_buffer: dict = {}  # structure for storing SHA user Lua scripts
+        # Scripts cannot be loaded in the constructor (it is not a coroutine),
+        # so the preload is performed on the first call of any library script
+        self.preload_lua_scripts: bool = preload_lua_scripts
+        self.typed_values: bool = typed_values
+        self.refresh_tasks: set = set()  # background refresh of r_get_or_set (references keep the tasks alive)
+        self.lock_metrics: dict = {}  # contention counters of r_lock by the lock name
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """ Closes the connection pool and unbinds the context from the connection reference """
+        await self.aclose()
+        self.redis.connection_pool = None
+
+    async def aclose(self):
+        """ Closes the client and disconnects all connections of the pool """
+        await gather(*self.refresh_tasks, return_exceptions=True)  # the started refreshes use the connections
+        await self.redis.aclose()
+
+    def redis_py(self) -> aRedis:
+        """
+        Returns the original asyncio library object that the current library is built on if you need to perform
+        an action that is not available within the current library.
+        :return: redis-py (redis.asyncio) library object
+        """
+        return self.redis
+
+    async def r_ping(self) -> bool:
+        """ Checking server availability """
+        try:
+            return await self.redis.ping()
+        except (rConnectionError, rTimeoutError):
+            return False
+
+    async def flush_lua_scripts(self, async_type: bool = False):
+        """ Clears all saved lua scripts (both built-in and user-defined) """
+        self.flush_local_lua_scripts()
+        await self.redis.script_flush('ASYNC' if async_type else 'SYNC')
+
+    def flush_local_lua_scripts(self):
+        """ Clears locally cached library lua scripts """
+        self.lua_scripts_sha.clear()
+        self.flush_user_lua_scripts()
+
+    def flush_user_lua_scripts(self):
+        """ Clears locally cached user lua scripts """
+        self.user_lua_scripts_buffer.clear()
+
+    async def exists(self, keys: str | list[str] | tuple[str] | set[str] | frozenset[str]) -> int:
+        """ Checking the existence of a key """
+        if isinstance(keys, str) and keys:
+            keys = [keys]
+        return await self.redis.exists(*keys) if keys else None
+
+    async def set_key_ttl(
+            self,
+            key: str,
+            ttl_sec: int | None = None,
+            ttl_ms: int | None = None,
+            if_without_ttl: bool = False,
+            if_with_ttl: bool = False,
+            only_greater: bool = False,
+            only_less: bool = False
+    ) -> None:
+        """
+        Set key time (ttl) in seconds or milliseconds.
+        The only_greater, only_less and if_without_ttl options are mutually exclusive.
+        Priority: if_with_ttl -> if_without_ttl -> only_greater -> only_less
+        """
+        await self.set_keys_ttl(
+            [key], ttl_sec, ttl_ms,
+            if_without_ttl=if_without_ttl,
+            if_with_ttl=if_with_ttl,
+            only_greater=only_greater,
+            only_less=only_less
+        )
+
+    async def set_keys_ttl(
+            self,
+            keys: list[str] | tuple[str] | set[str] | frozenset[str],
+            ttl_sec: int | None = None,
+            ttl_ms: int | None = None,
+            if_without_ttl: bool = False,
+            if_with_ttl: bool = False,
+            only_greater: bool = False,
+            only_less: bool = False
+    ) -> None:
+        """
+        Set the time for multiple keys (ttl) in seconds or milliseconds
+        The only_greater, only_less and if_without_ttl options are mutually exclusive.
+        Priority: if_with_ttl -> if_without_ttl -> only_greater -> only_less
+        """
+        keys: tuple = _remove_duplicates(keys)
+        ttl_ms = _compare_and_select_sec_ms(ttl_sec, ttl_ms) if ((ttl_sec or ttl_ms) and keys) else None
+        if ttl_ms:
+            await self.__register_lua_scripts(
+                'set_keys_ttl', len(keys), *keys, ttl_ms,
+                int(if_without_ttl), int(if_with_ttl), int(only_greater), int(only_less)
+            )
+
+    async def get_key_ttl(self, key: str, in_seconds: bool = False) -> int | None:
+        """
+        Returns the remaining time to live of a key that has a timeout
+        :param key:
+        :param in_seconds:
+        :return: ttl in seconds;
+        return None if the key does not exist;
+        return 0 if the key exists but has no associated expire;
+        """
+        ttl = await (self.redis.ttl(key) if in_seconds else self.redis.pttl(key))
+        return ttl if ttl not in (-1, -2) else (0 if ttl == -1 else None)
+
+    async def drop_key_ttl(self, key: str):
+        """ Removes the key lifetime (ttl) if one is set """
+        if key:
+            await self.redis.persist(key)
+
+    async def drop_keys_ttl(self, keys: list[str] | tuple[str] | set[str] | frozenset[str]):
+        """ Removes the expiration time for multiple keys (ttl), if set. """
+        if keys := _remove_duplicates(keys):
+            await self.__register_lua_scripts('drop_keys_ttl', len(keys), *keys)
+
+    async def get_type_value_of_key(self, key: str) -> str | None:
+        """
+        The type of value stored at this key
+        :param key:
+        :return: str or None
+        """
+        res = await self.redis.type(key) if key else None
+        return res if res != 'none' else None
+
+    async def r_set(
+            self,
+            key: str | dict,
+            value: _ALL_SUPPORTED_TYPES,
+            get_old_value: bool = False,
+            convert_to_type_for_get: str = None,
+            time_ms: int | None = None,
+            time_s: int | None = None,
+            if_exist: bool = False,
+            if_not_exist: bool = False,
+            keep_ttl: bool = False
+    ) -> None | str | int | float | bool | bytes | list | set:
+        """
+        Set a new key or override an existing one (see PyRedis.r_set)
+        :param key:
+        :param key: {key: value, ...} - write several keys (see r_mass_set)
+        :param value: IMPORTANT: not considered if a dict type object was passed in key.
+        :param get_old_value: return the old value stored at key, or None if the key did not exist.
+        :param convert_to_type_for_get: parameter for 'get_old_value', similar to the action in the 'get' function
+        :param time_ms: key lifetime in milliseconds (0 equal None).
+        :param time_s: key lifetime in seconds (0 equal None).
+        :param if_exist: set value only if such key already exists.
+        :param if_not_exist: set value only if such key does not exist yet.
+        :param keep_ttl: retain the time to live associated with the key.
+        :return: None
+        """
+        if not key or (not isinstance(key, dict) and not _is_value_supported(value)):
+            # Writing empty objects is not supported
+            return None
+
+        if time_s or time_ms:
+            time_ms = _compare_and_select_sec_ms(time_s, time_ms)
+
+        if isinstance(key, dict):
+            await self.r_mass_set(key, time_ms=time_ms, if_exist=if_exist, if_not_exist=if_not_exist, keep_ttl=keep_ttl)
+            return None
+
+        script_name, script_args = _set_script_arguments(
+            key, value, get_old_value, time_ms, if_exist, if_not_exist, keep_ttl, self.typed_values
+        )
+        res = await self.__register_lua_scripts(script_name, *script_args)
+
+        return _convert_reply(res, convert_to_type_for_get, self.typed_values) if res else res
+
+    async def r_mass_set(
+            self,
+            mapping: dict,
+            time_ms: int | None = None,
+            time_s: int | None = None,
+            ttl_ms: dict | None = None,
+            if_exist: bool = False,
+            if_not_exist: bool = False,
+            keep_ttl: bool = False,
+            batch_size: int = 1_000
+    ) -> tuple:
+        """
+        Writes several keys with one script call for each batch of keys (see PyRedis.r_mass_set)
+        :param mapping: {key: value, ...}
+        :param ttl_ms: {key: lifetime in milliseconds, ...} - the lifetime of these keys instead of time_ms/time_s
+        :param batch_size: maximum number of keys written by one script call
+        :return: keys that were written (in the order of the mapping)
+        """
+        if not isinstance(mapping, dict) or batch_size < 1:
+            return ()
+        if time_s or time_ms:
+            time_ms = _compare_and_select_sec_ms(time_s, time_ms)
+
+        written: list = []
+        for keys, args in _mass_set_batches(mapping, time_ms, ttl_ms, batch_size, self.typed_values):
+            res = await self.__register_lua_scripts(
+                'r_mass_set', len(keys), *keys, int(if_exist), int(if_not_exist), int(keep_ttl), *args
+            )
+            written += (keys[int(i) - 1] for i in res)
+        return tuple(written)
+
+    async def insert_value_to_array(
+            self,
+            key: str,
+            value: bool | int | float | str,
+            index: int = -1,
+            type_if_not_exists: str | None = None,
+            get_old_value: bool = False,
+            convert_to_type: str | None = None
+    ) -> list | set | None:
+        """
+        Adding a new value to a list or set (see PyRedis.insert_value_to_array)
+        :param key:
+        :param value:
+        :param index: (>= -1) At what position this element should be added. 0 - to the beginning, -1 - to the end.
+        :param type_if_not_exists: 'list' or 'set' - create a key of this type if it does not exist.
+        :param get_old_value: Return the previous value of the key
+        :param convert_to_type:
+        :return: None if such value did not exist before or get_old_value = False
+        """
+        if not key or (not value and value not in (False, 0)) or not isinstance(value, (bool, int, float, str)):
+            return None
+        value: str = _encode_typed_value(value, _UNKNOWN_CONTAINER_TAG) if self.typed_values else str(value)
+        type_if_not_exists: str = 'null' if type_if_not_exists not in ('list', 'set') else type_if_not_exists
+        res = await self.__register_lua_scripts(
+            'append_value_to_array', 1, key, index, type_if_not_exists, int(get_old_value), value
+        )
+        return _convert_reply(_parse_value_with_type(res), convert_to_type, self.typed_values)
+
+    async def bulk_insert_values_to_array(
+            self,
+            key: str,
+            values: dict[int, bool | int | float | str],
+            type_if_not_exists: str | None = None,
+            get_old_value: bool = False,
+            convert_to_type: str | None = None
+    ) -> list | set | None:
+        """
+        Adding several values to a list or set in one script call (see PyRedis.bulk_insert_values_to_array)
+        :param key:
+        :param values: {index: value, ...}
+        :param type_if_not_exists: 'list' or 'set' - create a key of this type if it does not exist.
+        :param get_old_value: Return the previous value of the key
+        :param convert_to_type:
+        :return: None if such value did not exist before or get_old_value = False
+        """
+        if not key or not (args := _bulk_insert_arguments(values, self.typed_values)):
+            return None
+        type_if_not_exists: str = 'null' if type_if_not_exists not in ('list', 'set') else type_if_not_exists
+        res = await self.__register_lua_scripts(
+            'bulk_insert_values_to_array', 1, key, type_if_not_exists, int(get_old_value), *args
+        )
+        return _convert_reply(_parse_value_with_type(res), convert_to_type, self.typed_values)
+
+    async def r_get(self, key: str, default_value=None, convert_to_type: str | None = None):
+        """
+        Used both to get a value by key and to check for its existence
+        :param key:
+        :param default_value: value that will be returned if there is no such key.
+            slice(start, stop) - read only this range of the list (see r_get_range)
+        :param convert_to_type: bool/int/float (by default all output data is of type str after decode() function);
+            For float -> int: rounds down to integer part number (drops fractional part)
+        :return: value, none or default_value
+        :raises PackedArrayNotSupportedError: the key holds a packed numeric array (read it with PyRedis.r_get_packed)
+        """
+        if isinstance(default_value, slice):
+            return await self.r_get_range(
+                key, default_value.start, default_value.stop, convert_to_type, default_value.step
+            )
+        if not key:
+            return default_value  # default_value or None
+
+        res = await self.__register_lua_scripts('get_helper', 1, key)
+        _check_not_packed(key, res)
+        res = _parse_value_with_type(res, default_value)
+        return _convert_reply(res, convert_to_type, self.typed_values)
+
+    async def r_get_or_set(
+            self,
+            key: str,
+            factory: Callable,
+            ttl_ms: int | None = None,
+            convert_to_type: str | None = None,
+            lease_ms: int = 10_000,
+            poll_interval_ms: int = 50,
+            stale_ms: int | None = None,
+            early_refresh_ms: int | None = None
+    ):
+        """
+        Returns the value of the key, a missing value is computed by only one caller (see PyRedis.r_get_or_set),
+        a stale value (stale_ms) is recomputed by an asyncio task
+        :param factory: function without arguments or coroutine function that computes the value
+        :return: value read from Redis or returned by factory()
+        :raises PackedArrayNotSupportedError: the key holds a packed numeric array
+        """
+        if not key:
+            return None
+        if stale_ms and ttl_ms:
+            ttl_ms += stale_ms  # the soft expiry is tracked by the remaining ttl of the key
+            res = await self.__register_lua_scripts('get_helper', 1, key, 1)  # {value, type, pttl}
+            _check_not_packed(key, res)
+            if (value := _convert_reply(_parse_value_with_type(res), convert_to_type, self.typed_values)) is not None:
+                if _should_refresh(res[2], stale_ms, early_refresh_ms):
+                    await self.__refresh_in_background(key, factory, ttl_ms, lease_ms)
+                return value
+
+        lease_key: str = _lease_key(key)
+        token: str = uuid4().hex
+        while (value := await self.r_get(key, convert_to_type=convert_to_type)) is None:
+            status: str = await self.__register_lua_scripts('acquire_lease', 2, key, lease_key, token, lease_ms, 0)
+            if status == 'wait':
+                await sleep(poll_interval_ms / 1000)
+                continue
+            if status == 'exists' and (value := await self.r_get(key, convert_to_type=convert_to_type)) is not None:
+                return value
+            try:
+                value = factory()
+                if isawaitable(value):
+                    value = await value
+                if value is not None and status == 'lease':
+                    await self.r_set(key, value, time_ms=ttl_ms)
+            finally:
+                if status == 'lease':
+                    await self.__register_lua_scripts('release_lease', 1, lease_key, token)
+            return value
+        return value
+
+    async def r_get_range(
+            self,
+            key: str,
+            start: int | None = 0,
+            stop: int | None = None,
+            convert_to_type: str | None = None,
+            step: int | None = None
+    ) -> list | set | None:
+        """
+        Reads the elements [start, stop) of a list as in Python slices (see PyRedis.r_get_range)
+        :param key:
+        :param start: index of the first element (None - from the beginning, negative - from the end)
+        :param stop: index after the last element (None - to the end, negative - from the end)
+        :param convert_to_type:
+        :param step: step of the slice (None or 1, other values are not supported)
+        :return: list, set or None if there is no such key (or the value is not an array)
+        :raises PackedArrayNotSupportedError: the key holds a packed numeric array (read it with PyRedis.r_get_packed)
+        """
+        if step not in (None, 1):
+            raise ValueError('r_get_range supports only slices with step 1')
+        if not key:
+            return None
+        res = await self.__register_lua_scripts('get_range', 1, key, start or 0, '' if stop is None else stop)
+        _check_not_packed(key, res)
+        return _convert_reply(_parse_value_with_type(res), convert_to_type, self.typed_values)
+
+    async def r_iter(self, key: str, chunk_size: int = 1000, convert_to_type: str | None = None) -> AsyncIterator:
+        """
+        Reading a list, set or hash in chunks (see PyRedis.r_iter)
+        :param key:
+        :param chunk_size: number of elements requested from Redis at a time
+        :param convert_to_type: applied to each chunk
+        :return: asynchronous generator of the elements, (field, value) pairs for hashes
+        """
+        if not key or chunk_size < 1:
+            return
+        cursor, value_type = 0, None
+        while res := await self.__register_lua_scripts('iter_helper', 1, key, cursor, chunk_size):
+            if value_type is not None and res[0] != value_type:
+                return
+            value_type, cursor = res[0], int(res[1])
+            if value_type not in ('list', 'set', 'hash'):
+                if (value := await self.r_get(key, convert_to_type=convert_to_type)) is not None:
+                    yield value
+                return
+            if value_type == 'hash':
+                for item in _convert_reply(_pairs_to_dict(res[2]), convert_to_type, self.typed_values).items():
+                    yield item
+            else:
+                for item in _convert_reply(res[2], convert_to_type, self.typed_values):
+                    yield item
+            if not cursor:
+                return
+
+    async def r_len(self, key: str) -> int | None:
+        """
+        Get the length of a list/set
+        :param key:
+        :return: None - there is no such key; 0 - the key exists, but it does not store an array;
+        """
+        res = await self.__register_lua_scripts('r_len', 1, key)
+        return int(res) if res is not None else None
+
+    async def r_pop(
+            self,
+            key: str,
+            count: int = 1,
+            reverse: bool = False,
+            convert_to_type: str = None
+    ) -> tuple:
+        """
+        Removes and returns an element of the list stored by key (see PyRedis.r_pop)
+        :param key:
+        :param count: By default, it returns 1 item, you can specify the number to extract and return
+        :param reverse: By default, items in lists are taken from the beginning. Specify True to get items from the end.
+        :param convert_to_type:
+        :return: tuple
+        """
+        res = await self.__register_lua_scripts('r_pop', 1, key, count, int(reverse))  # return list
+        return tuple(_convert_reply(res, convert_to_type, self.typed_values)) if res else ()
+
+    async def r_delete(self, key: str, returning: bool = False, convert_to_type_for_return: str = None):
+        """
+        Delete a key
+        :param key:
+        :param returning: return the value the key had before deletion
+        :param convert_to_type_for_return: what type the return value should be converted to (if returning=True)
+        :return: value or None
+        """
+        return await self.__helper_delete_or_unlink(
+            False, key=key, returning=returning, convert_to_type_for_return=convert_to_type_for_return
+        )
+
+    async def r_unlink(self, key: str, returning: bool = False, convert_to_type_for_return: str = None):
+        """
+        Unlink a key (the actual removal will happen later asynchronously by the server)
+        :param key:
+        :param returning: return the value the key had before deletion
+        :param convert_to_type_for_return: what type the return value should be converted to (if returning=True)
+        :return: value or None
+        """
+        return await self.__helper_delete_or_unlink(
+            True, key=key, returning=returning, convert_to_type_for_return=convert_to_type_for_return
+        )
+
+    async def __helper_delete_or_unlink(
+            self,
+            command: bool,
+            key: str,
+            returning: bool = False,
+            convert_to_type_for_return: str = None
+    ):
+        """
+        :param command: False - delete / True - unlink
+        :param key:
+        :param returning:
+        :param convert_to_type_for_return:
+        :return:
+        """
+        if not key:
+            return None
+
+        res = await self.__register_lua_scripts(
+            'delete_or_unlink_with_returning', 1, key, int(returning), 'unlink' if command else 'delete'
+        )
+        res = _parse_value_with_type(res)
+
+        if returning and res:
+            return _convert_reply(res, convert_to_type_for_return, self.typed_values)
+        return None
+
+    async def rename_key(self, key: str, new_key: str, get_rename_status: bool = None):
+        """
+        Change key name
+        :param key: current key name
+        :param new_key: new key name
+        :param get_rename_status: get True if the key exists and has been renamed, False if there is no such key
+        :return:
+        """
+        rename_status = await self.__register_lua_scripts('rename_key', 2, key, new_key)
+        return rename_status if get_rename_status else None
+
+    async def r_mass_delete(
+            self,
+            keys: list | tuple | set | frozenset,
+            return_exists: bool = False,
+            return_non_exists: bool = False,
+            get_dict_key_value_exists: bool = False,
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
+    ) -> tuple[tuple, tuple, dict]:
+        """
+        Mass delete keys from a given iterable (see PyRedis.r_mass_delete)
+        :param keys:
+        :param return_exists: return keys that existed and were deleted
+        :param return_non_exists: return keys that were not found
+        :param get_dict_key_value_exists: get dictionary of remote keys with values
+        :param convert_to_type_dict_key: is type conversion needed for the returned dictionary
+        :param chunk_size: delete the keys with several calls of this number of keys (the deletion is not atomic)
+        :return: ((return_exists), (return_non_exists), {get_dict_key_value_exists})
+        """
+        return await self.__helper_mass_delete_or_unlink(
+            False,
+            keys=keys,
+            return_exists=return_exists,
+            return_non_exists=return_non_exists,
+            get_dict_key_value_exists=get_dict_key_value_exists,
+            convert_to_type_dict_key=convert_to_type_dict_key,
+            chunk_size=chunk_size
+        )
+
+    async def r_mass_unlink(
+            self,
+            keys: list | tuple | set | frozenset,
+            return_exists: bool = False,
+            return_non_exists: bool = False,
+            get_dict_key_value_exists: bool = False,
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
+    ) -> tuple[tuple, tuple, dict]:
+        """
+        Mass unlink keys from a given iterable (see PyRedis.r_mass_unlink)
+        :param keys:
+        :param return_exists: return keys that existed and were deleted
+        :param return_non_exists: return keys that were not found
+        :param get_dict_key_value_exists: get dictionary of remote keys with values
+        :param convert_to_type_dict_key: is type conversion needed for the returned dictionary
+        :param chunk_size: delete the keys with several calls of this number of keys (the deletion is not atomic)
+        :return: ((return_exists), (return_non_exists), {get_dict_key_value_exists})
+        """
+        return await self.__helper_mass_delete_or_unlink(
+            True,
+            keys=keys,
+            return_exists=return_exists,
+            return_non_exists=return_non_exists,
+            get_dict_key_value_exists=get_dict_key_value_exists,
+            convert_to_type_dict_key=convert_to_type_dict_key,
+            chunk_size=chunk_size
+        )
+
+    async def __helper_mass_delete_or_unlink(
+            self,
+            command: bool,
+            keys: list | tuple | set | frozenset,
+            return_exists: bool = False,
+            return_non_exists: bool = False,
+            get_dict_key_value_exists: bool = False,
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
+    ) -> tuple[tuple, tuple, dict]:
+        """
+        :param command: False - delete / True - unlink
+        :param keys:
+        :param return_exists:
+        :param return_non_exists:
+        :param get_dict_key_value_exists:
+        :param convert_to_type_dict_key:
+        :param chunk_size:
+        :return:
+        """
+        if not keys:
+            return (), (), {}
+
+        keys: tuple = _remove_duplicates(keys)  # remove duplicates
+        chunks: list[tuple] = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)] if chunk_size \
+            else [keys]
+
+        # all parameters = None | False
+        if return_exists is return_non_exists is get_dict_key_value_exists is False:
+            for chunk in chunks:
+                await (self.redis.unlink(*chunk) if command else self.redis.delete(*chunk))
+            return (), (), {}
+
+        # if one of the parameters is specified, then we collect a dictionary of existing key-values
+        # (packed numeric arrays are not read by the decoding client)
+        exists_key_value: dict = {}
+        for chunk in chunks:
+            exists_key_value.update(_parse_mass_delete_reply(chunk, await self.__register_lua_scripts(
+                'r_mass_delete_or_unlink', len(chunk), *chunk, 'unlink' if command else 'delete',
+                int(get_dict_key_value_exists), 0
+            )))
+        return _mass_delete_result(
+            keys, exists_key_value, return_exists, return_non_exists,
+            get_dict_key_value_exists, convert_to_type_dict_key, self.typed_values
+        )
+
+    async def check_keys_and_get_values(
+            self, keys: list | tuple | set | frozenset,
+            convert_to_type_dict_key: str = None
+    ) -> dict:
+        """
+        Checks for the existence of keys in Redis and returns a dictionary of existing keys with their values
+        """
+        keys: tuple = _remove_duplicates(keys)  # remove duplicates
+        values = await self.redis.mget(keys)
+        return {keys[i]: _convert_reply(value, convert_to_type_dict_key, self.typed_values)
+                for i, value in enumerate(values) if value is not None}
+
+    async def r_mass_get(self, keys: list | tuple | set | frozenset, convert_to_type: str | None = None) -> dict:
+        """
+        Returns the values of several keys of any type with one script call (see PyRedis.r_mass_get)
+        :param keys:
+        :param convert_to_type:
+        :return: {key: value} of the existing keys (packed numeric arrays, sorted sets and streams are skipped)
+        """
+        if not (keys := _remove_duplicates(keys)):
+            return {}
+        res = await self.__register_lua_scripts('r_mass_get', len(keys), *keys)
+        replies: dict = {key: [res[2 * i + 1], res[2 * i]] for i, key in enumerate(keys)}  # {key: [value, type]}
+        return {
+            key: _convert_reply(value, convert_to_type, self.typed_values)
+            for key, reply in replies.items() if (value := _parse_value_with_type(reply)) is not None
+        }
+
+    def r_scan(self, pattern: str = '*', count: int = 1000, _type: str | None = None) -> AsyncIterator[str]:
+        """
+        Iterates over the keys matching the pattern with SCAN (see PyRedis.r_scan)
+        :param pattern: glob-style pattern ('session:*')
+        :param count: number of keys checked by Redis for one SCAN call
+        :param _type: only the keys of this Redis type
+        :return: asynchronous generator of the keys
+        """
+        return self.redis.scan_iter(match=pattern, count=count, _type=_type)
+
+    async def r_delete_pattern(self, pattern: str, count: int = 1000, _type: str | None = None) -> int:
+        """
+        Deletes (UNLINK) the keys matching the pattern in batches of SCAN (see PyRedis.r_delete_pattern)
+        :return: number of deleted keys
+        """
+        if not pattern:
+            return 0
+        total: int = 0
+        async for keys in self.__scan_batches(pattern, count, _type):
+            total += len((await self.r_mass_unlink(keys, return_exists=True))[0])
+        return total
+
+    async def r_set_ttl_pattern(
+            self,
+            pattern: str,
+            ttl_sec: int | None = None,
+            ttl_ms: int | None = None,
+            count: int = 1000,
+            _type: str | None = None,
+            if_without_ttl: bool = False,
+            if_with_ttl: bool = False,
+            only_greater: bool = False,
+            only_less: bool = False
+    ) -> int:
+        """
+        Sets the ttl of the keys matching the pattern in batches of SCAN (see PyRedis.r_set_ttl_pattern)
+        :return: number of the keys found by the pattern
+        """
+        if not pattern or not (ttl_sec or ttl_ms):
+            return 0
+        total: int = 0
+        async for keys in self.__scan_batches(pattern, count, _type):
+            await self.set_keys_ttl(
+                keys, ttl_sec, ttl_ms,
+                if_without_ttl=if_without_ttl,
+                if_with_ttl=if_with_ttl,
+                only_greater=only_greater,
+                only_less=only_less
+            )
+            total += len(keys)
+        return total
+
+    async def r_rate_limit(
+            self,
+            key: str,
+            limit: int,
+            window_ms: int,
+            algorithm: str = 'token_bucket',
+            cost: int = 1
+    ) -> dict:
+        """
+        Takes the decision of the rate limiter with one script call (see PyRedis.r_rate_limit)
+        :return: {'allowed': bool, 'remaining': int, 'retry_after_ms': int}
+        """
+        return (await self.r_rate_limit_many({key: (limit, window_ms)}, algorithm, cost))['keys'][key]
+
+    async def r_rate_limit_many(self, limits: dict, algorithm: str = 'token_bucket', cost: int = 1) -> dict:
+        """
+        Checks several limits of one request with one script call (see PyRedis.r_rate_limit_many)
+        :param limits: {key: (limit, window_ms)}
+        :return: {'allowed': bool, 'retry_after_ms': int, 'keys': {key: {'allowed', 'remaining', 'retry_after_ms'}}}
+        """
+        if not limits:
+            return {'allowed': True, 'retry_after_ms': 0, 'keys': {}}
+        keys, args = _rate_limit_arguments(limits, algorithm, cost)
+        return _parse_rate_limit_reply(keys, await self.__register_lua_scripts('rate_limit', len(keys), *keys, *args))
+
+    def lock_info(self, name: str | None = None) -> dict | None:
+        """ Contention counters of the locks taken by this client (see PyRedis.lock_info) """
+        if name is None:
+            return {lock_name: dict(counters) for lock_name, counters in self.lock_metrics.items()}
+        return dict(counters) if (counters := self.lock_metrics.get(name)) is not None else None
+
+    def r_lock(
+            self,
+            name: str,
+            ttl_ms: int = 10_000,
+            blocking_timeout_ms: int | None = None,
+            poll_interval_ms: int = 50,
+            auto_renewal: bool = False
+    ) -> AsyncPyRedisLock:
+        """
+        Distributed lock (see PyRedis.r_lock), used as an asynchronous context manager:
+
+            async with r.r_lock('orders', ttl_ms=10_000, blocking_timeout_ms=5_000):
+                ...
+        :return: AsyncPyRedisLock (the renewal is an asyncio task)
+        """
+        return AsyncPyRedisLock(
+            self.redis, self.__register_lua_scripts, name, ttl_ms, blocking_timeout_ms, poll_interval_ms, auto_renewal,
+            self.lock_metrics
+        )
+
+    def cached(
+            self,
+            ttl_ms: int | None = None,
+            key_fn: Callable[..., str] | None = None,
+            convert_to_type: str | None = None,
+            namespace: str | None = None
+    ) -> Callable:
+        """
+        Decorator that caches the results of a coroutine function in Redis (see PyRedis.cached),
+        cache_invalidate() and cache_clear() of the decorated function are coroutines
+        """
+        def decorator(func: Callable) -> Callable:
+            if not iscoroutinefunction(func):
+                raise TypeError('AsyncPyRedis.cached supports only coroutine functions, use PyRedis.cached')
+            return _cached_coroutine_function(self, func, ttl_ms, key_fn, convert_to_type, namespace)
+        return decorator
+
+    async def r_remove_all_keys_local(self, get_count_keys: bool = False) -> int | None:
+        """
+        Delete all keys in current database
+        :param get_count_keys: need to return the number of deleted keys (True -> return integer, False -> return None)
+        :return: count keys or None
+        """
+        count_keys = await self.__register_lua_scripts('remove_all_keys_local', 0, int(get_count_keys))
+        return int(count_keys) if count_keys else None
+
+    async def run_lua_script(
+            self, *args, lua_script: str | None = None, sha: str | None = None, read_only: bool = False
+    ):
+        """
+        Execute the Lua script (see PyRedis.run_lua_script)
+        :param lua_script: Lua script as a string
+        :param sha: SHA or result load_lua_script() function
+        :param read_only: True if the EVAL command should be executed, read-only
+        :param args: The first arguments in *args you must pass are the number of keys,
+            and then the keys themselves in the required order. Then come the additional arguments.
+        :return: Returns the result of the script
+        """
+        if not (lua_script or sha):
+            return None
+        if sha or (sha := self.user_lua_scripts_buffer.get(lua_script)):
+            try:
+                return await (self.redis.evalsha_ro(sha, *args) if read_only else self.redis.evalsha(sha, *args))
+            except NoScriptError:
+                if not lua_script:
+                    raise
+                # the script cache of the server was flushed, the script text is known - load it again
+                self.user_lua_scripts_buffer.pop(lua_script, None)
+                sha = await self.load_lua_script(lua_script)
+                return await (self.redis.evalsha_ro(sha, *args) if read_only else self.redis.evalsha(sha, *args))
+        return await (self.redis.eval_ro(lua_script, *args) if read_only else self.redis.eval(lua_script, *args))
+
+    async def load_lua_script(self, lua_script: str, use_buffer: bool = True) -> str:
+        """
+        Load a Lua script into the script cache_data
+        :param lua_script:
+        :param use_buffer: save the SHA of the script in the built-in buffer
+        :return: SHA
+        """
+        res = self.user_lua_scripts_buffer.get(lua_script) or await self.redis.script_load(lua_script)
+        if use_buffer and lua_script not in self.user_lua_scripts_buffer:
+            self.user_lua_scripts_buffer[lua_script] = res
+        return res
+
+    async def __register_lua_scripts(self, script_name: str, *args):
+        """
+        Runs the library script by SHA (exactly one EVALSHA in the steady state).
+        If the script cache of the server was flushed, the script is loaded again and the call is retried once.
+        """
+        if self.preload_lua_scripts:
+            self.preload_lua_scripts = False
+            await self.__preload_lua_scripts()
+        try:
+            return await self.redis.evalsha(await self.__get_lua_script_sha(script_name), *args)
+        except NoScriptError:
+            return await self.redis.evalsha(await self.__get_lua_script_sha(script_name, reload=True), *args)
+
+    async def __refresh_in_background(self, key: str, factory: Callable, ttl_ms: int, lease_ms: int):
+        """ Recomputes the stale value of r_get_or_set in an asyncio task if the lease is taken """
+        lease_key: str = _lease_key(key)
+        token: str = uuid4().hex
+        if await self.__register_lua_scripts('acquire_lease', 2, key, lease_key, token, lease_ms, 1) != 'lease':
+            return
+
+        async def refresh():
+            try:
+                value = factory()
+                if isawaitable(value):
+                    value = await value
+                if value is not None:
+                    await self.r_set(key, value, time_ms=ttl_ms)
+            finally:
+                await self.__register_lua_scripts('release_lease', 1, lease_key, token)
+
+        def done(task):
+            self.refresh_tasks.discard(task)
+            if not task.cancelled():
+                task.exception()  # an exception of factory() is not raised, the stale value is returned
+
+        task = create_task(refresh())
+        self.refresh_tasks.add(task)
+        task.add_done_callback(done)
+
+    async def __scan_batches(self, pattern: str, count: int, _type: str | None) -> AsyncIterator[tuple]:
+        """ Keys of r_scan in tuples of 'count' keys """
+        batch: list = []
+        async for key in self.r_scan(pattern, count, _type):
+            batch.append(key)
+            if len(batch) == count:
+                yield tuple(batch)
+                batch = []
+        if batch:
+            yield tuple(batch)
+
+    async def __get_lua_script_sha(self, script_name: str, reload: bool = False) -> str:
+        """
+        :param script_name: file name of the script without the extension
+        :param reload: load the script into the script cache of the server even if its SHA is already known
+        :return: SHA
+        """
+        if reload or script_name not in self.lua_scripts_sha:
+            lua_script = _load_lua_script_from_file(script_name)
+            self.lua_scripts_sha[script_name] = await self.redis.script_load(lua_script)
+        return self.lua_scripts_sha[script_name]
+
+    async def __preload_lua_scripts(self):
+        for script_name in _lua_script_names():
+            await self.__get_lua_script_sha(script_name, reload=True)
@@ -0,0 +1,316 @@
+""" Pipelined execution of the library commands (PyRedis.batch) """
+# The method signatures intentionally mirror PyRedis (client.py)
+# pylint: disable=duplicate-code
+from typing import Callable
+from redis.client import Pipeline
+from redis.exceptions import NoScriptError
+
+from pyluaredis.compression import ValueCompressor
+from pyluaredis.helpers import (
+    _ALL_SUPPORTED_TYPES, _remove_duplicates, _compare_and_select_sec_ms, _is_value_supported, _set_script_arguments,
+    _parse_value_with_type, _READ_ONLY_LUA_SCRIPTS, _redis_function_name, _convert_reply, _encode_typed_value,
+    _convert_raw_reply, _UNKNOWN_CONTAINER_TAG, _bulk_insert_arguments, _check_not_packed
+)
+
+
+class PyRedisBatch:  # pylint: disable=too-many-instance-attributes
+    """
+    Queues the library commands and sends them to Redis in one pipelined request.
+    Each method accepts the same parameters as the PyRedis method of the same name,
+    the result of each call (with the same post-processing) is placed in 'results' in the order of the calls.
+    """
+    __slots__ = (
+        'pipeline', 'get_lua_script_sha', 'use_functions', 'invalidate_keys', 'typed_values', 'raw_bytes', 'compressor',
+        'callbacks', 'results'
+    )
+
+    def __init__(
+            self,
+            pipeline: Pipeline,
+            get_lua_script_sha: Callable[..., str],
+            use_functions: bool = False,
+            invalidate_keys: Callable[[tuple | None], None] | None = None,
+            typed_values: bool = False,
+            raw_bytes: bool = False,
+            compressor: ValueCompressor | None = None
+    ):
+        """
+        :param pipeline: redis-py pipeline (without a transaction)
+        :param get_lua_script_sha: function of the client that returns the SHA of the library script by its name
+            (with reload=True the script is loaded into the server script cache again)
+        :param use_functions: call the library scripts from the Redis Functions library (FCALL/FCALL_RO)
+        :param invalidate_keys: function of the near cache of the client, called for the keys changed by the batch
+        :param typed_values: the client writes values with type tags
+        :param raw_bytes: the pipeline does not decode the replies, bytes are written without the hex encoding
+        :param compressor: value compression of the client
+        """
+        self.pipeline = pipeline
+        self.get_lua_script_sha = get_lua_script_sha
+        self.use_functions = use_functions
+        self.invalidate_keys = invalidate_keys
+        self.typed_values = typed_values
+        self.raw_bytes = raw_bytes
+        self.compressor = compressor if compressor is not None else ValueCompressor()
+        # (post-processing function, (script name, arguments) or None if the command is not sent to Redis)
+        self.callbacks: list = []
+        self.results: list = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Sends the queued commands if the block was completed without an exception """
+        if exc_type is None:
+            self.execute()
+        else:
+            self.pipeline.reset()
+            self.callbacks.clear()
+
+    def __len__(self) -> int:
+        return len(self.callbacks)
+
+    def execute(self) -> list:
+        """
+        Sends all queued commands in one request and applies the post-processing of each method
+        :return: list of results in the order of the calls
+        """
+        commands: list = [command for _, command in self.callbacks if command]
+        replies: list = self.pipeline.execute(raise_on_error=False) if commands else []
+
+        # The script cache of the server was flushed (restart, failover, SCRIPT FLUSH):
+        # load the scripts again and repeat only the commands that were rejected
+        if rejected := [i for i, reply in enumerate(replies) if isinstance(reply, NoScriptError)]:
+            for script_name in {commands[i][0] for i in rejected}:
+                self.get_lua_script_sha(script_name, reload=True)
+            for i in rejected:
+                script_name, args = commands[i]
+                self.pipeline.evalsha(self.get_lua_script_sha(script_name), *args)
+            for i, reply in zip(rejected, self.pipeline.execute(raise_on_error=False)):
+                replies[i] = reply
+
+        self.callbacks, callbacks = [], self.callbacks
+        if self.invalidate_keys is not None:
+            for script_name, args in commands:
+                if script_name not in _READ_ONLY_LUA_SCRIPTS:
+                    self.invalidate_keys(args[1:1 + args[0]] if args[0] else None)
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+
+        replies = iter(replies)
+        self.results = [callback(next(replies) if command else None) for callback, command in callbacks]
+        return self.results
+
+    def r_set(
+            self,
+            key: str,
+            value: _ALL_SUPPORTED_TYPES,
+            get_old_value: bool = False,
+            convert_to_type_for_get: str = None,
+            time_ms: int | None = None,
+            time_s: int | None = None,
+            if_exist: bool = False,
+            if_not_exist: bool = False,
+            keep_ttl: bool = False,
+            compress: bool | None = None
+    ) -> None:
+        """ Queues PyRedis.r_set """
+        if not key or not _is_value_supported(value):
+            return self.__skip(None)
+
+        if time_s or time_ms:
+            time_ms = _compare_and_select_sec_ms(time_s, time_ms)
+
+        script_name, script_args = _set_script_arguments(
+            key, value, get_old_value, time_ms, if_exist, if_not_exist, keep_ttl, self.typed_values, self.raw_bytes,
+            (lambda item: self.compressor.compress(item, compress)) if self.compressor.algorithm else None
+        )
+        return self.__queue_script(
+            lambda res: self.__convert_reply(res, convert_to_type_for_get) if res else res,
+            script_name, *script_args
+        )
+
+    def r_get(self, key: str, default_value=None, convert_to_type: str | None = None) -> None:
+        """
+        Queues PyRedis.r_get
+        :raises PackedArrayNotSupportedError: (on execute) the key holds a packed numeric array,
+            read it with PyRedis.r_get_packed
+        """
+        if isinstance(default_value, slice):
+            return self.r_get_range(key, default_value.start, default_value.stop, convert_to_type, default_value.step)
+        if not key:
+            return self.__skip(default_value)
+
+        def callback(res):
+            _check_not_packed(key, res)
+            return self.__convert_reply(_parse_value_with_type(res, default_value), convert_to_type)
+
+        return self.__queue_script(callback, 'get_helper', 1, key)
+
+    def r_get_range(
+            self,
+            key: str,
+            start: int | None = 0,
+            stop: int | None = None,
+            convert_to_type: str | None = None,
+            step: int | None = None
+    ) -> None:
+        """
+        Queues PyRedis.r_get_range
+        :raises PackedArrayNotSupportedError: (on execute) the key holds a packed numeric array,
+            read it with PyRedis.r_get_packed
+        """
+        if step not in (None, 1):
+            raise ValueError('r_get_range supports only slices with step 1')
+        if not key:
+            return self.__skip(None)
+
+        def callback(res):
+            _check_not_packed(key, res)
+            return self.__convert_reply(_parse_value_with_type(res), convert_to_type)
+
+        return self.__queue_script(callback, 'get_range', 1, key, start or 0, '' if stop is None else stop)
+
+    def r_len(self, key: str) -> None:
+        """ Queues PyRedis.r_len """
+        return self.__queue_script(lambda res: int(res) if res is not None else None, 'r_len', 1, key)
+
+    def r_pop(self, key: str, count: int = 1, reverse: bool = False, convert_to_type: str = None) -> None:
+        """ Queues PyRedis.r_pop """
+        return self.__queue_script(
+            lambda res: tuple(self.__convert_reply(res, convert_to_type)) if res else (),
+            'r_pop', 1, key, count, int(reverse)
+        )
+
+    def insert_value_to_array(
+            self,
+            key: str,
+            value: bool | int | float | str,
+            index: int = -1,
+            type_if_not_exists: str | None = None,
+            get_old_value: bool = False,
+            convert_to_type: str | None = None
+    ) -> None:
+        """ Queues PyRedis.insert_value_to_array """
+        if not key or (not value and value not in (False, 0)) or not isinstance(value, (bool, int, float, str)):
+            return self.__skip(None)
+        type_if_not_exists: str = 'null' if type_if_not_exists not in ('list', 'set') else type_if_not_exists
+
+        def callback(res):
+            return self.__convert_reply(_parse_value_with_type(res), convert_to_type)
+
+        value: str = _encode_typed_value(value, _UNKNOWN_CONTAINER_TAG) if self.typed_values else str(value)
+        return self.__queue_script(
+            callback, 'append_value_to_array', 1, key, index, type_if_not_exists, int(get_old_value), value
+        )
+
+    def bulk_insert_values_to_array(
+            self,
+            key: str,
+            values: dict[int, bool | int | float | str],
+            type_if_not_exists: str | None = None,
+            get_old_value: bool = False,
+            convert_to_type: str | None = None
+    ) -> None:
+        """ Queues PyRedis.bulk_insert_values_to_array """
+        if not key or not (args := _bulk_insert_arguments(values, self.typed_values)):
+            return self.__skip(None)
+        type_if_not_exists: str = 'null' if type_if_not_exists not in ('list', 'set') else type_if_not_exists
+
+        def callback(res):
+            return self.__convert_reply(_parse_value_with_type(res), convert_to_type)
+
+        return self.__queue_script(
+            callback, 'bulk_insert_values_to_array', 1, key, type_if_not_exists, int(get_old_value), *args
+        )
+
+    def r_delete(self, key: str, returning: bool = False, convert_to_type_for_return: str = None) -> None:
+        """ Queues PyRedis.r_delete """
+        return self.__delete_or_unlink('delete', key, returning, convert_to_type_for_return)
+
+    def r_unlink(self, key: str, returning: bool = False, convert_to_type_for_return: str = None) -> None:
+        """ Queues PyRedis.r_unlink """
+        return self.__delete_or_unlink('unlink', key, returning, convert_to_type_for_return)
+
+    def rename_key(self, key: str, new_key: str, get_rename_status: bool = None) -> None:
+        """ Queues PyRedis.rename_key """
+        return self.__queue_script(
+            lambda res: res if get_rename_status else None, 'rename_key', 2, key, new_key
+        )
+
+    def set_key_ttl(
+            self,
+            key: str,
+            ttl_sec: int | None = None,
+            ttl_ms: int | None = None,
+            if_without_ttl: bool = False,
+            if_with_ttl: bool = False,
+            only_greater: bool = False,
+            only_less: bool = False
+    ) -> None:
+        """ Queues PyRedis.set_key_ttl """
+        return self.set_keys_ttl(
+            [key], ttl_sec, ttl_ms,
+            if_without_ttl=if_without_ttl,
+            if_with_ttl=if_with_ttl,
+            only_greater=only_greater,
+            only_less=only_less
+        )
+
+    def set_keys_ttl(
+            self,
+            keys: list[str] | tuple[str] | set[str] | frozenset[str],
+            ttl_sec: int | None = None,
+            ttl_ms: int | None = None,
+            if_without_ttl: bool = False,
+            if_with_ttl: bool = False,
+            only_greater: bool = False,
+            only_less: bool = False
+    ) -> None:
+        """ Queues PyRedis.set_keys_ttl """
+        keys: tuple = _remove_duplicates(keys)
+        ttl_ms = _compare_and_select_sec_ms(ttl_sec, ttl_ms) if ((ttl_sec or ttl_ms) and keys) else None
+        if not ttl_ms:
+            return self.__skip(None)
+        return self.__queue_script(
+            lambda res: None, 'set_keys_ttl', len(keys), *keys, ttl_ms,
+            int(if_without_ttl), int(if_with_ttl), int(only_greater), int(only_less)
+        )
+
+    def drop_keys_ttl(self, keys: list[str] | tuple[str] | set[str] | frozenset[str]) -> None:
+        """ Queues PyRedis.drop_keys_ttl """
+        if not (keys := _remove_duplicates(keys)):
+            return self.__skip(None)
+        return self.__queue_script(lambda res: None, 'drop_keys_ttl', len(keys), *keys)
+
+    def __delete_or_unlink(self, command: str, key: str, returning: bool, convert_to_type_for_return: str) -> None:
+        if not key:
+            return self.__skip(None)
+
+        def callback(res):
+            res = _parse_value_with_type(res)
+            if returning and res:
+                return self.__convert_reply(res, convert_to_type_for_return)
+            return None
+
+        return self.__queue_script(callback, 'delete_or_unlink_with_returning', 1, key, int(returning), command)
+
+    def __convert_reply(self, res, convert_to_type: str | None):
+        if self.compressor.algorithm is not None:
+            res = self.compressor.decompress(res)
+        if self.raw_bytes:
+            return _convert_raw_reply(res, convert_to_type, self.typed_values)
+        return _convert_reply(res, convert_to_type, self.typed_values)
+
+    def __queue_script(self, callback: Callable, script_name: str, *args) -> None:
+        """ Adds the library script call to the pipeline """
+        if self.use_functions:
+            fcall = self.pipeline.fcall_ro if script_name in _READ_ONLY_LUA_SCRIPTS else self.pipeline.fcall
+            fcall(_redis_function_name(script_name), *args)
+        else:
+            self.pipeline.evalsha(self.get_lua_script_sha(script_name), *args)
+        self.callbacks.append((callback, (script_name, args)))
+
+    def __skip(self, result) -> None:
+        """ The call does not require a request to Redis, but takes its place in the results """
+        self.callbacks.append((lambda _: result, None))
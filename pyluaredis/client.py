@@ -2,66 +2,161 @@
 Client for working with the Redis database
 Original library documentation: https://redis-py.readthedocs.io/en/stable/index.html
 """
-from os import path as os_path, listdir as os_listdir
-from json import loads as json_loads
+# pylint: disable=too-many-lines
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from inspect import iscoroutinefunction
+from itertools import islice
+from time import sleep
+from typing import Callable, Iterable, Iterator
+from uuid import uuid4
 from redis import (
     Redis,
     ConnectionPool as rConnectionPool,
     ConnectionError as rConnectionError,
     TimeoutError as rTimeoutError
 )
+from redis.exceptions import NoScriptError, ResponseError
 
+from pyluaredis.batch import PyRedisBatch
+from pyluaredis.near_cache import NearCache
+from pyluaredis.compression import ValueCompressor
+from pyluaredis.memoize import _cached_function
+from pyluaredis.lock import PyRedisLock
+from pyluaredis.exceptions import TypedValuesNotSupportedError
 from pyluaredis.helpers import (
-    _SUPPORTED_TYPES, _SUPPORTED_ITERABLE_TYPES, _ALL_SUPPORTED_TYPES, _remove_duplicates, _convert_value_to_string,
-    _load_lua_script_from_file, _convert_to_type, _compare_and_select_sec_ms
+    _ALL_SUPPORTED_TYPES, _remove_duplicates, _load_lua_script_from_file,
+    _compare_and_select_sec_ms, _is_value_supported, _set_script_arguments, _parse_value_with_type, _mass_delete_result,
+    _READ_ONLY_LUA_SCRIPTS, _lua_script_names, _redis_function_name, _build_functions_library,
+    _convert_reply, _convert_raw_reply, _encode_typed_value, _UNKNOWN_CONTAINER_TAG, _pack_numeric_array,
+    _unpack_numeric_array, _bulk_insert_arguments, _convert_array_items, _temporary_key, _TEMPORARY_KEY_TTL_MS,
+    _pairs_to_dict, _convert_hash_items, _mass_set_batches, _parse_mass_delete_reply, _lease_key,
+    _should_refresh, _rate_limit_arguments, _parse_rate_limit_reply
 )
 
 
-class PyRedis:
+class PyRedis:  # pylint: disable=too-many-instance-attributes
     """
     The main entity for working with Redis
     """
-    __slots__ = ('redis', 'lua_scripts_sha', 'user_lua_scripts_buffer')
+    __slots__ = (
+        'redis', 'lua_scripts_sha', 'user_lua_scripts_buffer', 'script_mode', 'near_cache', 'typed_values', 'raw_bytes',
+        'raw_redis', 'compressor', 'refresh_executor', 'lock_metrics'
+    )
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-locals
             self, host: str = 'localhost', port: int = 6379, password='',username='default', db=0,
             socket_timeout: int | float = 0.1,
             retry_on_timeout: bool = True,
             socket_keepalive: bool = True,
             max_connections: int = 50,
             preload_lua_scripts: bool = True,
+            script_mode: str = 'scripts',
+            near_cache: bool = False,
+            near_cache_max_size: int = 10_000,
+            near_cache_ttl_ms: int | None = 60_000,
+            near_cache_prefixes: tuple[str, ...] = (),
+            typed_values: bool = False,
+            raw_bytes: bool = False,
+            compression: str | None = None,
+            compression_threshold: int = 1024,
+            compression_level: int | None = None,
+            refresh_workers: int = 4
     ):
-        self.redis = Redis(
-            connection_pool=rConnectionPool(
-                host=host,
-                port=port,
-                password=password,
-                username=username,
-                db=db,
-                socket_timeout=socket_timeout,
-                encoding='utf-8',
-                decode_responses=True,
-                retry_on_timeout=retry_on_timeout,
-                socket_keepalive=socket_keepalive,
-                max_connections=max_connections,
-            )
+        """
+        :param preload_lua_scripts: load all library scripts into the script cache of the server at once
+            (otherwise each script is loaded on its first call)
+        :param script_mode: 'scripts' - library scripts are called by EVALSHA from the script cache of the server;
+            'functions' - library scripts are called by FCALL/FCALL_RO from the Redis Functions library
+            (Redis >= 7.0), which is loaded (or upgraded) once by its version and survives restarts and replication,
+            read-only functions are flagged 'no-writes' and can be served by replicas.
+        :param near_cache: keep the values read by r_get in the memory of the process (LRU),
+            the server notifies the client about changes of the keys (CLIENT TRACKING, Redis >= 6.0).
+            r_get and check_keys_and_get_values use the cached values without a request to Redis.
+        :param near_cache_max_size: maximum number of keys in the near cache
+        :param near_cache_ttl_ms: maximum lifetime of a value in the near cache
+            (a value never outlives the ttl of its key in Redis)
+        :param near_cache_prefixes: cache and track only keys with these prefixes (all keys by default)
+        :param typed_values: write values with a type tag, so that r_get returns them with the original type
+            (int/float/bool/str/bytes elements, list/tuple/set/frozenset containers) without convert_to_type.
+            convert_to_type is applied only to the values without a type tag (written by other clients).
+        :param raw_bytes: bytes are written as binary strings (without the hex encoding, half the size),
+            values are read by a separate non-decoding connection pool: r_get(key, convert_to_type='bytes')
+            returns the stored buffer as is, other values are decoded from UTF-8 (binary data remains bytes).
+        :param compression: 'zlib' or 'lzma' - compress the values (and array elements) written by r_set
+            that are larger than compression_threshold bytes, they are decompressed transparently on reading
+            (base64 text, or binary strings in the raw_bytes mode)
+        :param compression_threshold: minimum size of a value in bytes to compress it
+        :param compression_level: compression level (zlib: 0-9, lzma: preset 0-9)
+        :param refresh_workers: number of threads that recompute stale values of r_get_or_set in the background
+        """
+        self.redis, self.raw_redis = self._create_redis_clients(
+            host=host,
+            port=port,
+            password=password,
+            username=username,
+            db=db,
+            socket_timeout=socket_timeout,
+            encoding='utf-8',
+            retry_on_timeout=retry_on_timeout,
+            socket_keepalive=socket_keepalive,
+            max_connections=max_connections
         )
+        self.raw_bytes: bool = raw_bytes
+        self.compressor = ValueCompressor(compression, compression_threshold, compression_level, raw_bytes)
         self.lua_scripts_sha: dict = {}  # saving SHA1 hash of Lua scripts
         self.user_lua_scripts_buffer: dict = {}  # structure for storing SHA user Lua scripts
+        # the threads are started on the first refresh
+        self.refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='pyluaredis-refresh')
+        self.lock_metrics: dict = {}  # contention counters of r_lock by the lock name
+
+        if script_mode not in ('scripts', 'functions'):
+            raise ValueError(f"script_mode must be 'scripts' or 'functions', not {script_mode!r}")
+        self.script_mode: str = script_mode
+        self.typed_values: bool = typed_values
 
-        if preload_lua_scripts:
+        if script_mode == 'functions':
+            self.__load_functions_library()
+        elif preload_lua_scripts:
             self.__preload_lua_scripts()
 
+        self.near_cache: NearCache | None = None
+        if near_cache:
+            connection_pool = self.redis.connection_pool
+            self.near_cache = NearCache(
+                connection_pool.connection_class(**connection_pool.connection_kwargs),
+                db=db, max_size=near_cache_max_size, ttl_ms=near_cache_ttl_ms, prefixes=near_cache_prefixes
+            )
+            self.near_cache.start()
+
+    def _create_redis_clients(self, **connection_kwargs) -> tuple[Redis, Redis]:
+        """
+        Creates the redis-py clients of the library (overridden by PyRedisCluster)
+        :return: (client decoding the replies, client without decoding of the replies for binary values)
+        """
+        redis = Redis(connection_pool=rConnectionPool(**connection_kwargs, decode_responses=True))
+        # connection pool without decoding of the replies (binary values), connections are created on demand
+        raw_redis = Redis(connection_pool=rConnectionPool(**connection_kwargs, decode_responses=False))
+        return redis, raw_redis
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         """ Unbinds the context from the connection reference """
+        self.refresh_executor.shutdown(wait=True)  # the started and queued refreshes use the connections
+        self.__stop_near_cache()
         self.redis.close()
         self.redis.connection_pool = None
+        self.raw_redis.close()
 
     def __del__(self):
+        if getattr(self, 'refresh_executor', None) is not None:
+            self.refresh_executor.shutdown(wait=False)
+        self.__stop_near_cache()
         self.redis.close()
+        if getattr(self, 'raw_redis', None) is not None:
+            self.raw_redis.close()
 
     def redis_py(self) -> Redis:
         """
@@ -71,6 +166,51 @@ class PyRedis:
         """
         return self.redis
 
+    def near_cache_info(self) -> dict | None:
+        """
+        Statistics of the near cache (None if the client was created without it)
+        :return: {'hits': int, 'misses': int, 'invalidations': int, 'size': int, 'max_size': int, 'active': bool}
+        """
+        return self.near_cache.info() if self.near_cache is not None else None
+
+    def compression_info(self) -> dict:
+        """
+        Counters of the value compression
+        :return: {'compressed': int, 'incompressible': int, 'original_bytes': int, 'stored_bytes': int,
+            'compress_time': float, 'decompressed': int, 'decompress_time': float, 'ratio': float | None}
+            (incompressible - values stored as is, since the compressed value was not smaller)
+        """
+        return self.compressor.info()
+
+    def lock_info(self, name: str | None = None) -> dict | None:
+        """
+        Contention counters of the locks taken by this client (r_lock)
+        :param name: name of the lock (None - counters of all locks {name: counters})
+        :return: {'acquisitions': int, 'timeouts': int, 'wait_time': float, 'max_wait_time': float, 'renewals': int,
+            'lost': int} (wait_time - total time spent waiting for the lock in seconds, lost - the renewal found
+            the lock expired)
+        """
+        if name is None:
+            return {lock_name: dict(counters) for lock_name, counters in self.lock_metrics.items()}
+        return dict(counters) if (counters := self.lock_metrics.get(name)) is not None else None
+
+    def batch(self) -> PyRedisBatch:
+        """
+        Returns a context manager that queues library commands and sends them to Redis as one pipelined request
+        (one round trip instead of one per command). Results are available after leaving the block:
+
+            with r.batch() as batch:
+                batch.r_set('key', [1, 2, 3])
+                batch.r_get('key', convert_to_type='int')
+            batch.results  # [None, [1, 2, 3]]
+        :return: PyRedisBatch
+        """
+        return PyRedisBatch(
+            (self.raw_redis if self.raw_bytes else self.redis).pipeline(transaction=False), self.__get_lua_script_sha,
+            self.script_mode == 'functions', self.near_cache.invalidate if self.near_cache is not None else None,
+            self.typed_values, self.raw_bytes, self.compressor
+        )
+
     def r_ping(self) -> bool:
         """ Checking server availability """
         try:
@@ -186,7 +326,8 @@ class PyRedis:
             time_s: int | None = None,
             if_exist: bool = False,
             if_not_exist: bool = False,
-            keep_ttl: bool = False
+            keep_ttl: bool = False,
+            compress: bool | None = None
     ) -> None | str | int | float | bool | bytes | list | set:
         """
         Set a new key or override an existing one
@@ -195,7 +336,10 @@ class PyRedis:
         WARNING: If keep_ttl is specified, time_ms and time_s will be ignored if such a key exists,
         if such a key did not exist before, time_ms and time_s will work as usual.
         :param key:
+        :param key: {key: value, ...} - write several keys (see r_mass_set)
         :param value: IMPORTANT: not considered if a dict type object was passed in key.
+            A dict is stored as a Redis hash (values: bool/int/float/str/bytes, field names are read back as str),
+            get_old_value does not return the previous value if it is a hash.
         :param get_old_value: return the old value stored at key, or None if the key did not exist.
         :param convert_to_type_for_get: parameter for 'get_old_value', similar to the action in the 'get' function
         :param time_ms: key lifetime in milliseconds (0 equal None).
@@ -203,9 +347,11 @@ class PyRedis:
         :param if_exist: set value only if such key already exists.
         :param if_not_exist: set value only if such key does not exist yet.
         :param keep_ttl: retain the time to live associated with the key.
+        :param compress: (if the client uses compression) True - compress regardless of the threshold,
+            False - do not compress, None - compress values larger than the threshold
         :return: None
         """
-        if not key or (not value and value not in (False, 0)) or not isinstance(value, _ALL_SUPPORTED_TYPES):
+        if not key or (not isinstance(key, dict) and not _is_value_supported(value)):
             # Writing empty objects is not supported
             return None
 
@@ -215,33 +361,108 @@ class PyRedis:
         res = None
 
         if isinstance(key, dict):
-            pass
-
-        elif isinstance(value, _SUPPORTED_TYPES):
-            get_old_value: int = int(get_old_value)
-            time_ms: int = time_ms or 0
-            if_exist: int = int(if_exist)
-            if_not_exist: int = int(if_not_exist)
-            keep_ttl: int = int(keep_ttl)
-            value: str = _convert_value_to_string(value)
-            res = self.__register_lua_scripts(
-                'set_not_array_helper', 1, key, get_old_value, time_ms, if_exist, if_not_exist, keep_ttl, value
+            self.r_mass_set(
+                key, time_ms=time_ms, if_exist=if_exist, if_not_exist=if_not_exist, keep_ttl=keep_ttl, compress=compress
             )
 
-        elif isinstance(value, _SUPPORTED_ITERABLE_TYPES):
-            value: list = type(value)([_convert_value_to_string(i) for i in value])
-            time_ms: int = time_ms or 0
-            if_exist: int = int(if_exist)
-            if_not_exist: int = int(if_not_exist)
-            get_old_value: int = int(get_old_value)
-            keep_ttl: int = int(keep_ttl)
+        else:
+            script_name, script_args = _set_script_arguments(
+                key, value, get_old_value, time_ms, if_exist, if_not_exist, keep_ttl, self.typed_values,
+                self.raw_bytes,
+                (lambda item: self.compressor.compress(item, compress)) if self.compressor.algorithm else None
+            )
+            res = self.__register_lua_scripts(script_name, *script_args, raw=self.raw_bytes)
+
+        return self.__convert_reply(res, convert_to_type_for_get) if res else res
+
+    def r_mass_set(
+            self,
+            mapping: dict,
+            time_ms: int | None = None,
+            time_s: int | None = None,
+            ttl_ms: dict | None = None,
+            if_exist: bool = False,
+            if_not_exist: bool = False,
+            keep_ttl: bool = False,
+            compress: bool | None = None,
+            batch_size: int = 1_000
+    ) -> tuple:
+        """
+        Writes several keys (values of any supported type: scalars, lists, sets, dicts) with one script call
+        for each batch of keys. Each batch is atomic; empty and unsupported values are skipped.
+        The parameters time_ms, time_s, if_exist, if_not_exist, keep_ttl, compress are the same as in r_set
+        and are applied to each key.
+        :param mapping: {key: value, ...}
+        :param ttl_ms: {key: lifetime in milliseconds, ...} - the lifetime of these keys instead of time_ms/time_s
+        :param batch_size: maximum number of keys written by one script call
+        :return: keys that were written (in the order of the mapping)
+        """
+        if not isinstance(mapping, dict) or batch_size < 1:
+            return ()
+        if time_s or time_ms:
+            time_ms = _compare_and_select_sec_ms(time_s, time_ms)
+
+        written: list = []
+        for keys, args in _mass_set_batches(
+                mapping, time_ms, ttl_ms, batch_size, self.typed_values, self.raw_bytes,
+                (lambda item: self.compressor.compress(item, compress)) if self.compressor.algorithm else None
+        ):
             res = self.__register_lua_scripts(
-                'set_arrays_helper', 1, key,
-                get_old_value, time_ms, if_exist, if_not_exist, keep_ttl,
-                'rpush' if isinstance(value, (list, tuple)) else 'sadd', int(len(value) < 7850), *value
+                'r_mass_set', len(keys), *keys, int(if_exist), int(if_not_exist), int(keep_ttl), *args
             )
+            written += (keys[int(i) - 1] for i in res)
+        return tuple(written)
+
+    def r_set_iter(
+            self,
+            key: str,
+            values: Iterable,
+            array_type: type = list,
+            chunk_size: int = 10_000,
+            time_ms: int | None = None,
+            time_s: int | None = None,
+            if_exist: bool = False,
+            if_not_exist: bool = False,
+            keep_ttl: bool = False,
+            compress: bool | None = None
+    ) -> bool:
+        """
+        Writes a list or set from any iterable (e.g. a generator) without building the whole array in memory:
+        the elements are converted lazily and sent in pipelined chunks (RPUSH/SADD) to a temporary key,
+        which then replaces the key atomically (RENAME), so readers never see a partially written array.
+        The temporary key is in the same hash slot as the key (Redis Cluster).
+
+        The parameters time_ms, time_s, if_exist, if_not_exist, keep_ttl, compress are the same as in r_set.
+        :param key:
+        :param values: elements of the array (bool/int/float/str/bytes)
+        :param array_type: list, tuple, set or frozenset - the type of the written array
+        :param chunk_size: number of elements sent to Redis at a time
+        :return: True if the value was written (False - empty values or the if_exist/if_not_exist condition)
+        """
+        if not key or array_type not in (list, tuple, set, frozenset) or chunk_size < 1:
+            return False
+        if (if_exist or if_not_exist) and bool(self.redis.exists(key)) != bool(if_exist):
+            return False  # do not send the data that will not be written (the condition is checked again at the end)
+        if time_s or time_ms:
+            time_ms = _compare_and_select_sec_ms(time_s, time_ms)
 
-        return _convert_to_type(res, convert_to_type_for_get) if res and convert_to_type_for_get else res
+        temporary_key: str = _temporary_key(key)
+        compress_item = (lambda item: self.compressor.compress(item, compress)) if self.compressor.algorithm else None
+        pipeline = (self.raw_redis if self.raw_bytes else self.redis).pipeline(transaction=False)
+        values = iter(values)
+        try:
+            while chunk := list(islice(values, chunk_size)):
+                chunk = _convert_array_items(chunk, array_type, self.typed_values, self.raw_bytes, compress_item)
+                getattr(pipeline, 'rpush' if array_type in (list, tuple) else 'sadd')(temporary_key, *chunk)
+                pipeline.pexpire(temporary_key, _TEMPORARY_KEY_TTL_MS)
+                pipeline.execute()
+        except BaseException:
+            self.redis.delete(temporary_key)
+            raise
+        return bool(self.__register_lua_scripts(
+            'commit_streamed_array', 2, temporary_key, key,
+            time_ms or 0, int(if_exist), int(if_not_exist), int(keep_ttl)
+        ))
 
     def insert_value_to_array(
             self,
@@ -255,7 +476,7 @@ class PyRedis:
         """
         Adding a new value to a list or set.
 
-        Writing to the middle of a list of length ~500_000 about 0.045s.
+        When writing to the middle of a list, only the elements between the index and the nearer end are moved.
         :param key:
         :param value: Remember that Redis does not support nested structures,
             so arrays cannot be values inside other arrays.
@@ -273,34 +494,318 @@ class PyRedis:
         """
         if not key or (not value and value not in (False, 0)) or not isinstance(value, (bool,  int, float, str)):
             return None
-        value: str = str(value)
+        value: str = _encode_typed_value(value, _UNKNOWN_CONTAINER_TAG) if self.typed_values else str(value)
         type_if_not_exists: str = 'null' if type_if_not_exists not in ('list', 'set') else type_if_not_exists
         get_old_value: int = int(get_old_value)
         res = self.__register_lua_scripts(
-            'append_value_to_array', 1, key, index, type_if_not_exists, get_old_value, value
+            'append_value_to_array', 1, key, index, type_if_not_exists, get_old_value, value, raw=self.raw_bytes
+        )
+        return self.__convert_reply(_parse_value_with_type(res), convert_to_type)
+
+    def bulk_insert_values_to_array(
+            self,
+            key: str,
+            values: dict[int, bool | int | float | str],
+            type_if_not_exists: str | None = None,
+            get_old_value: bool = False,
+            convert_to_type: str | None = None
+    ) -> list | set | None:
+        """
+        Adding several values to a list or set in one script call.
+        The values are inserted in ascending order of the indexes, so each index is the position of the value
+        in the resulting list; the list is rebuilt only starting from the smallest index.
+        :param key:
+        :param values: {index: value, ...}, index (>= -1) as in insert_value_to_array (For sets indexes are ignored)
+        :param type_if_not_exists: 'list' or 'set' - create a key of this type if it does not exist.
+        :param get_old_value: Return the previous value of the key
+        :param convert_to_type: bool/int/float (by default all output data is of type str after decode() function);
+            For float -> int: rounds down to integer part number (drops fractional part)
+        :return: None if such value did not exist before or get_old_value = False
+        """
+        if not key or not (args := _bulk_insert_arguments(values, self.typed_values)):
+            return None
+        type_if_not_exists: str = 'null' if type_if_not_exists not in ('list', 'set') else type_if_not_exists
+        res = self.__register_lua_scripts(
+            'bulk_insert_values_to_array', 1, key, type_if_not_exists, int(get_old_value), *args, raw=self.raw_bytes
         )
-        res = (set(res[0]) if res[1] == 'set' else res[0]) if res else None
-        return _convert_to_type(res, convert_to_type) if (convert_to_type and res is not None) else res
+        return self.__convert_reply(_parse_value_with_type(res), convert_to_type)
 
     def r_get(self, key: str, default_value=None, convert_to_type: str | None = None):
         """
         Used both to get a value by key and to check for its existence
         :param key:
         :param default_value: value that will be returned if there is no such key.
+            slice(start, stop) - read only this range of the list (see r_get_range)
         :param convert_to_type: bool/int/float (by default all output data is of type str after decode() function);
             For float -> int: rounds down to integer part number (drops fractional part)
         :return: value, none or default_value
         """
+        if isinstance(default_value, slice):
+            return self.r_get_range(key, default_value.start, default_value.stop, convert_to_type, default_value.step)
         if not key:
             return default_value  # default_value or None
 
-        res = self.__register_lua_scripts('get_helper', 1, key)
-        res = (set(res[0]) if res[1] == 'set' else res[0]) if res else default_value
-        return _convert_to_type(res, convert_to_type) if (convert_to_type and res is not None) else res
+        if self.near_cache is None:
+            res = self.__register_lua_scripts('get_helper', 1, key, raw=self.raw_bytes)
+        elif (res := self.near_cache.get(key)) is None:
+            generation: int = self.near_cache.generation
+            res = self.__register_lua_scripts('get_helper', 1, key, 1, raw=self.raw_bytes)  # {value, type, pttl}
+            if res:
+                self.near_cache.set(key, res[:2], res[2], generation)
+        if res and res[1] in ('packed', b'packed'):
+            return self.r_get_packed(key)
+        res = _parse_value_with_type(res, default_value)
+        return self.__convert_reply(res, convert_to_type)
+
+    def r_get_or_set(
+            self,
+            key: str,
+            factory: Callable,
+            ttl_ms: int | None = None,
+            convert_to_type: str | None = None,
+            lease_ms: int = 10_000,
+            poll_interval_ms: int = 50,
+            stale_ms: int | None = None,
+            early_refresh_ms: int | None = None
+    ):
+        """
+        Returns the value of the key, if there is no such key - computes it with factory() and writes it (r_set).
+        A missing value is computed by only one caller of all clients: it takes a lease for lease_ms,
+        the other callers poll the key every poll_interval_ms and read the written value.
+        If the owner of the lease does not write the value (factory() raised an exception or returned None,
+        the process crashed), the lease is released or expires and the next caller computes the value.
+
+        Stale-while-revalidate: with stale_ms the value is kept for ttl_ms + stale_ms, and after ttl_ms
+        (the soft expiry) the stale value is returned at once, while one caller recomputes it in a background thread.
+        :param key:
+        :param factory: function without arguments that computes the value
+        :param ttl_ms: lifetime of the written value (the time while the value is fresh if stale_ms is set)
+        :param convert_to_type: type conversion of the value read from Redis (see r_get)
+        :param lease_ms: lifetime of the lease, should be longer than factory() is running
+        :param poll_interval_ms: interval between the checks of the waiting callers
+        :param stale_ms: how long a value is returned after its soft expiry while it is being recomputed
+        :param early_refresh_ms: start the background refresh randomly before the soft expiry,
+            the earlier the longer this time (about the duration of factory())
+        :return: value read from Redis or returned by factory()
+        """
+        if not key:
+            return None
+        if stale_ms and ttl_ms:
+            ttl_ms += stale_ms  # the soft expiry is tracked by the remaining ttl of the key
+            res = self.__register_lua_scripts('get_helper', 1, key, 1, raw=self.raw_bytes)  # {value, type, pttl}
+            if res and res[1] in ('packed', b'packed'):
+                value = self.r_get_packed(key)
+            else:
+                value = self.__convert_reply(_parse_value_with_type(res), convert_to_type)
+            if value is not None:
+                if _should_refresh(res[2], stale_ms, early_refresh_ms):
+                    self.__refresh_in_background(key, factory, ttl_ms, lease_ms)
+                return value
+
+        lease_key: str = _lease_key(key)
+        token: str = uuid4().hex
+        while (value := self.r_get(key, convert_to_type=convert_to_type)) is None:
+            status: str = self.__register_lua_scripts('acquire_lease', 2, key, lease_key, token, lease_ms, 0)
+            if status == 'wait':
+                sleep(poll_interval_ms / 1000)
+                continue
+            if status == 'exists' and (value := self.r_get(key, convert_to_type=convert_to_type)) is not None:
+                return value
+            # the lease is taken (or the key is not readable by r_get, then the value is only computed)
+            try:
+                value = factory()
+                if value is not None and status == 'lease':
+                    self.r_set(key, value, time_ms=ttl_ms)
+            finally:
+                if status == 'lease':
+                    self.__register_lua_scripts('release_lease', 1, lease_key, token)
+            return value
+        return value
+
+    def r_get_range(
+            self,
+            key: str,
+            start: int | None = 0,
+            stop: int | None = None,
+            convert_to_type: str | None = None,
+            step: int | None = None
+    ) -> list | set | None:
+        """
+        Reads the elements [start, stop) of a list as in Python slices, only the requested elements are transferred.
+        For a set, the same number of random distinct elements is returned (sets are not ordered),
+        for a packed numeric array - r_get_packed(key, start, stop).
+        :param key:
+        :param start: index of the first element (None - from the beginning, negative - from the end)
+        :param stop: index after the last element (None - to the end, negative - from the end)
+        :param convert_to_type: bool/int/float (by default all output data is of type str after decode() function)
+        :param step: step of the slice (None or 1, other values are not supported)
+        :return: list, set, array.array or None if there is no such key (or the value is not an array)
+        """
+        if step not in (None, 1):
+            raise ValueError('r_get_range supports only slices with step 1')
+        if not key:
+            return None
+        start = start or 0
+        res = self.__register_lua_scripts(
+            'get_range', 1, key, start, '' if stop is None else stop, raw=self.raw_bytes
+        )
+        if res and res[1] in ('packed', b'packed'):
+            return self.r_get_packed(key, start, stop)
+        return self.__convert_reply(_parse_value_with_type(res), convert_to_type)
+
+    def r_set_packed(
+            self,
+            key: str,
+            values,
+            typecode: str | None = None,
+            time_ms: int | None = None,
+            time_s: int | None = None,
+            if_exist: bool = False,
+            if_not_exist: bool = False,
+            keep_ttl: bool = False
+    ) -> None:
+        """
+        Writes a sequence of numbers as one binary string (packed numeric array):
+        8 bytes per int64/float64 element instead of a list element, one script argument instead of one per element.
+        The value is read by r_get/r_get_packed (also by ranges).
+        :param key:
+        :param values: iterable of int/float or array.array
+        :param typecode: array module typecode ('b', 'B', 'h', 'H', 'i', 'I', 'q', 'Q', 'f', 'd'),
+            by default the typecode of array.array, 'q' for integers, 'd' otherwise
+        :param time_ms: key lifetime in milliseconds (0 equal None).
+        :param time_s: key lifetime in seconds (0 equal None).
+        :param if_exist: set value only if such key already exists.
+        :param if_not_exist: set value only if such key does not exist yet.
+        :param keep_ttl: retain the time to live associated with the key.
+        :return: None
+        """
+        if not key:
+            return
+        if time_s or time_ms:
+            time_ms = _compare_and_select_sec_ms(time_s, time_ms)
+        self.__register_lua_scripts(
+            'set_not_array_helper', 1, key, 0, time_ms or 0, int(if_exist), int(if_not_exist), int(keep_ttl),
+            _pack_numeric_array(values, typecode)
+        )
+
+    def r_get_packed(self, key: str, start: int = 0, stop: int | None = None, as_list: bool = False):
+        """
+        Reads a packed numeric array (see r_set_packed) or its range
+        (elements [start, stop) as in Python slices, only the requested bytes are transferred).
+        :param key:
+        :param start: index of the first element (negative - from the end)
+        :param stop: index after the last element (None - to the end, negative - from the end)
+        :param as_list: return a list instead of array.array
+        :return: array.array, list or None if there is no such key (or the value is not a packed array)
+        """
+        if not key:
+            return None
+        res = self.__register_lua_scripts(
+            'get_packed_range', 1, key, start, '' if stop is None else stop, raw=True
+        )
+        if not res:
+            return None
+        values = _unpack_numeric_array(*res)
+        return values.tolist() if as_list else values
+
+    def r_iter(self, key: str, chunk_size: int = 1000, convert_to_type: str | None = None) -> Iterator:
+        """
+        Reading a list, set or hash in chunks: lists are paged with LRANGE windows, sets with SSCAN, hashes with HSCAN,
+        so only one chunk is held in memory.
+        Changes of the key between the chunks are not isolated (SSCAN can return an element of a set more than once),
+        if the type of the key changes the iteration stops.
+        :param key:
+        :param chunk_size: number of elements requested from Redis at a time
+        :param convert_to_type: bool/int/float (by default all output data is of type str after decode() function);
+            applied to each chunk
+        :return: generator of the elements, (field, value) pairs for hashes
+            (a value that is not an array is yielded as one element)
+        """
+        if not key or chunk_size < 1:
+            return
+        cursor, value_type = 0, None
+        while res := self.__register_lua_scripts('iter_helper', 1, key, cursor, chunk_size, raw=self.raw_bytes):
+            res_type: str = res[0].decode('utf-8') if isinstance(res[0], bytes) else res[0]
+            if value_type is not None and res_type != value_type:
+                return
+            value_type, cursor = res_type, int(res[1])
+            if value_type not in ('list', 'set', 'hash'):
+                value = self.r_get(key, convert_to_type=convert_to_type)
+                if isinstance(value, (list, tuple, set, array)):  # packed numeric array
+                    yield from value
+                elif value is not None:
+                    yield value
+                return
+            if value_type == 'hash':
+                yield from self.__convert_reply(_pairs_to_dict(res[2]), convert_to_type).items()
+            else:
+                yield from self.__convert_reply(res[2], convert_to_type)
+            if not cursor:
+                return
+
+    def r_hget(
+            self, key: str, fields: str | list | tuple | set | frozenset, convert_to_type: str | None = None
+    ):
+        """
+        Reading fields of a hash (HGET/HMGET) without reading the whole hash
+        :param key:
+        :param fields: field name or several field names
+        :param convert_to_type: bool/int/float (by default all output data is of type str after decode() function)
+        :return: the value of the field (None if there is no such field or key) or
+            {field: value} for several fields (only existing fields)
+        """
+        if not key or not fields:
+            return None
+        redis = self.raw_redis if self.raw_bytes else self.redis
+        if isinstance(fields, (str, bytes)):
+            return self.__convert_reply(redis.hget(key, fields), convert_to_type)
+        fields = tuple(fields)
+        res = {field: value for field, value in zip(fields, redis.hmget(key, fields)) if value is not None}
+        return self.__convert_reply(res, convert_to_type)
+
+    def r_hset(self, key: str, mapping: dict, compress: bool | None = None) -> int:
+        """
+        Writing fields of a hash (HSET) without rewriting the whole hash, the key is created if it does not exist
+        :param key:
+        :param mapping: {field: value} (values: bool/int/float/str/bytes)
+        :param compress: (if the client uses compression) see r_set
+        :return: number of the added fields (updated fields are not counted)
+        """
+        if not key or not isinstance(mapping, dict) or not mapping:
+            return 0
+        items: list = _convert_hash_items(
+            mapping, self.typed_values, self.raw_bytes,
+            (lambda item: self.compressor.compress(item, compress)) if self.compressor.algorithm else None
+        )
+        res = (self.raw_redis if self.raw_bytes else self.redis).hset(key, items=items)
+        if self.near_cache is not None:
+            self.near_cache.invalidate((key,))
+        return res
+
+    def r_hincr(self, key: str, field: str, amount: int | float = 1) -> int | float:
+        """
+        Atomic increment of a numeric field of a hash (HINCRBY, HINCRBYFLOAT for float amount).
+        The field is stored as a plain number, so the method is not available with typed_values=True
+        (r_set/r_hset write the fields with type tags, which Redis cannot increment).
+        :param key:
+        :param field:
+        :param amount: increment (negative - decrement)
+        :return: new value of the field
+        :raises TypedValuesNotSupportedError: the client was created with typed_values=True
+        """
+        if self.typed_values:
+            raise TypedValuesNotSupportedError('r_hincr is not available with typed_values=True')
+        if isinstance(amount, float):
+            res = float(self.redis.hincrbyfloat(key, field, amount))
+        else:
+            res = self.redis.hincrby(key, field, amount)
+        if self.near_cache is not None:
+            self.near_cache.invalidate((key,))
+        return res
 
     def r_len(self, key: str) -> int | None:
         """
-        Получить длину списка/множества в Redis
+        Получить длину списка/множества/хеша в Redis
         :param key:
         :return: None - такого ключа нет; 0 - такой ключ есть, но в нем записан не массив;
         """
@@ -324,8 +829,8 @@ class PyRedis:
         :param convert_to_type:
         :return: tuple
         """
-        res = self.__register_lua_scripts('r_pop', 1, key, count, int(reverse))  # return list
-        return tuple(_convert_to_type(res, convert_to_type) if convert_to_type else res) if res else ()
+        res = self.__register_lua_scripts('r_pop', 1, key, count, int(reverse), raw=self.raw_bytes)  # return list
+        return tuple(self.__convert_reply(res, convert_to_type)) if res else ()
 
     def r_delete(self, key: str, returning: bool = False, convert_to_type_for_return: str = None):
         """
@@ -373,12 +878,13 @@ class PyRedis:
             return None
 
         res = self.__register_lua_scripts(
-            'delete_or_unlink_with_returning', 1, key, int(returning), 'unlink' if command else 'delete'
+            'delete_or_unlink_with_returning', 1, key, int(returning), 'unlink' if command else 'delete',
+            raw=self.raw_bytes
         )
-        res = (set(res[0]) if res[1] == 'set' else res[0]) if res else None
+        res = _parse_value_with_type(res)
 
         if returning and res:
-            return _convert_to_type(res, convert_to_type_for_return) if convert_to_type_for_return else res
+            return self.__convert_reply(res, convert_to_type_for_return)
         return None
 
     def rename_key(self, key: str, new_key: str, get_rename_status: bool = None):
@@ -398,7 +904,8 @@ class PyRedis:
             return_exists: bool = False,
             return_non_exists: bool = False,
             get_dict_key_value_exists: bool = False,
-            convert_to_type_dict_key: str = None
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
     ) -> tuple[tuple, tuple, dict]:
         """
         Mass delete keys from a given iterable.
@@ -409,6 +916,8 @@ class PyRedis:
         :param return_non_exists: return keys that were not found
         :param get_dict_key_value_exists: get dictionary of remote keys with values
         :param convert_to_type_dict_key: is type conversion needed for the returned dictionary
+        :param chunk_size: delete the keys with several calls of this number of keys (for 100k+ keys),
+            so that Redis is not blocked by one long script; the deletion is then not atomic
         :return: ((return_exists), (return_non_exists), {get_dict_key_value_exists})
         """
         return self.__helper_mass_delete_or_unlink(
@@ -417,7 +926,8 @@ class PyRedis:
             return_exists=return_exists,
             return_non_exists=return_non_exists,
             get_dict_key_value_exists=get_dict_key_value_exists,
-            convert_to_type_dict_key=convert_to_type_dict_key
+            convert_to_type_dict_key=convert_to_type_dict_key,
+            chunk_size=chunk_size
         )
 
     def r_mass_unlink(
@@ -426,7 +936,8 @@ class PyRedis:
             return_exists: bool = False,
             return_non_exists: bool = False,
             get_dict_key_value_exists: bool = False,
-            convert_to_type_dict_key: str = None
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
     ) -> tuple[tuple, tuple, dict]:
         """
         Mass unlink keys from a given iterable.
@@ -437,6 +948,8 @@ class PyRedis:
         :param return_non_exists: return keys that were not found
         :param get_dict_key_value_exists: get dictionary of remote keys with values
         :param convert_to_type_dict_key: is type conversion needed for the returned dictionary
+        :param chunk_size: delete the keys with several calls of this number of keys (for 100k+ keys),
+            so that Redis is not blocked by one long script; the deletion is then not atomic
         :return: ((return_exists), (return_non_exists), {get_dict_key_value_exists})
         """
         return self.__helper_mass_delete_or_unlink(
@@ -445,7 +958,8 @@ class PyRedis:
             return_exists=return_exists,
             return_non_exists=return_non_exists,
             get_dict_key_value_exists=get_dict_key_value_exists,
-            convert_to_type_dict_key=convert_to_type_dict_key
+            convert_to_type_dict_key=convert_to_type_dict_key,
+            chunk_size=chunk_size
         )
 
     def __helper_mass_delete_or_unlink(
@@ -455,7 +969,8 @@ class PyRedis:
             return_exists: bool = False,
             return_non_exists: bool = False,
             get_dict_key_value_exists: bool = False,
-            convert_to_type_dict_key: str = None
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
     ) -> tuple[tuple, tuple, dict]:
         """
         :param command: False - delete / True - unlink
@@ -464,35 +979,39 @@ class PyRedis:
         :param return_non_exists:
         :param get_dict_key_value_exists:
         :param convert_to_type_dict_key:
+        :param chunk_size:
         :return:
         """
         if not keys:
             return (), (), {}
 
         keys: tuple = _remove_duplicates(keys)  # remove duplicates
+        chunks: list[tuple] = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)] if chunk_size \
+            else [keys]
 
         # all parameters = None | False
         if return_exists is return_non_exists is get_dict_key_value_exists is False:
-            self.redis.unlink(*keys) if command else self.redis.delete(*keys)  # pylint: disable=expression-not-assigned
+            for chunk in chunks:
+                self.redis.unlink(*chunk) if command else self.redis.delete(*chunk)  # pylint: disable=expression-not-assigned
+            if self.near_cache is not None:
+                self.near_cache.invalidate(keys)
             return (), (), {}
 
         # if one of the parameters is specified, then we collect a dictionary of existing key-values
-        exists_key_value: dict = json_loads(
-            self.__register_lua_scripts('r_mass_delete_or_unlink', len(keys), *keys, 'unlink' if command else 'delete')
-        )
-        exists_keys: tuple = tuple(sorted(exists_key_value.keys()))
-        non_exists_keys: tuple = tuple(sorted(set(keys) - set(exists_keys)))
-
-        # convert_to_type_dict_key
-        exists_key_value = {
-            key: _convert_to_type(value, convert_to_type_dict_key)
-            for key, value in exists_key_value.items()
-        } if convert_to_type_dict_key else exists_key_value
-
-        return (
-            exists_keys if return_exists else (),
-            non_exists_keys if return_non_exists else (),
-            exists_key_value if get_dict_key_value_exists else {}
+        # (the values are read only if they are returned)
+        exists_key_value: dict = {}
+        for chunk in chunks:
+            exists_key_value.update(_parse_mass_delete_reply(chunk, self.__register_lua_scripts(
+                'r_mass_delete_or_unlink', len(chunk), *chunk, 'unlink' if command else 'delete',
+                int(get_dict_key_value_exists), 1, raw=True
+            ), decode=not self.raw_bytes))
+        if get_dict_key_value_exists:
+            exists_key_value = {
+                key: value if isinstance(value, array) else self.__convert_reply(value, convert_to_type_dict_key)
+                for key, value in exists_key_value.items()
+            }
+        return _mass_delete_result(
+            keys, exists_key_value, return_exists, return_non_exists, get_dict_key_value_exists, None
         )
 
     def check_keys_and_get_values(
@@ -503,9 +1022,200 @@ class PyRedis:
         Checks for the existence of keys in Redis and returns a dictionary of existing keys with their values
         """
         keys: tuple = _remove_duplicates(keys)  # remove duplicates
-        values = self.redis.mget(keys)  # later in the library the variable is converted to list
-        return {keys[i]: _convert_to_type(value, convert_to_type_dict_key)
-                if convert_to_type_dict_key else value for i, value in enumerate(values) if value is not None}
+        cached: dict = {}
+        if self.near_cache is not None:
+            # MGET returns values only for strings, other cached types are skipped in the same way
+            cached = {key: reply for key in keys if (reply := self.near_cache.get(key)) is not None}
+            keys = tuple(key for key in keys if key not in cached)
+        # later in the library the variable is converted to list
+        values = (self.raw_redis if self.raw_bytes else self.redis).mget(keys) if keys else []
+        values = {keys[i]: value for i, value in enumerate(values) if value is not None}
+        values.update({key: reply[0] for key, reply in cached.items() if reply[1] in ('string', b'string')})
+        return {key: self.__convert_reply(value, convert_to_type_dict_key) for key, value in values.items()}
+
+    def r_mass_get(self, keys: list | tuple | set | frozenset, convert_to_type: str | None = None) -> dict:
+        """
+        Returns the values of several keys of any type (strings, lists, sets, hashes, packed arrays)
+        with one script call, the values are restored in the same way as in r_get
+        (unlike check_keys_and_get_values, which reads only strings with MGET)
+        :param keys:
+        :param convert_to_type: bool/int/float (by default all output data is of type str after decode() function)
+        :return: {key: value} of the existing keys (keys of other types, such as sorted sets and streams, are omitted)
+        """
+        keys: tuple = _remove_duplicates(keys)
+        replies: dict = {}
+        if self.near_cache is not None:
+            replies = {key: reply for key in keys if (reply := self.near_cache.get(key)) is not None}
+            keys = tuple(key for key in keys if key not in replies)
+        res = self.__register_lua_scripts('r_mass_get', len(keys), *keys, raw=self.raw_bytes) if keys else []
+        replies.update({key: [res[2 * i + 1], res[2 * i]] for i, key in enumerate(keys)})  # {key: [value, type]}
+
+        values: dict = {}
+        for key, reply in replies.items():
+            if reply[1] in ('packed', b'packed'):
+                values[key] = self.r_get_packed(key)
+            elif (value := _parse_value_with_type(reply)) is not None:  # the script returns no value for other types
+                values[key] = self.__convert_reply(value, convert_to_type)
+        return values
+
+    def r_scan(self, pattern: str = '*', count: int = 1000, _type: str | None = None) -> Iterator[str]:
+        """
+        Iterates over the keys matching the pattern with SCAN, Redis is not blocked as with KEYS
+        (a key can be returned more than once if the keyspace is changed during the iteration)
+        :param pattern: glob-style pattern ('session:*')
+        :param count: number of keys checked by Redis for one SCAN call
+        :param _type: only the keys of this Redis type ('string', 'list', 'set', 'hash')
+        :return: generator of the keys
+        """
+        return self.redis.scan_iter(match=pattern, count=count, _type=_type)
+
+    def r_delete_pattern(self, pattern: str, count: int = 1000, _type: str | None = None) -> int:
+        """
+        Deletes (UNLINK) the keys matching the pattern: the keys are found with SCAN
+        and each batch of 'count' keys is deleted at once, so Redis is never blocked for a full keyspace pass
+        :param pattern: glob-style pattern ('session:*')
+        :param count: number of keys in one SCAN call and one deletion
+        :param _type: only the keys of this Redis type
+        :return: number of deleted keys
+        """
+        if not pattern:
+            return 0
+        return sum(
+            len(self.r_mass_unlink(keys, return_exists=True)[0])
+            for keys in self.__scan_batches(pattern, count, _type)
+        )
+
+    def r_set_ttl_pattern(
+            self,
+            pattern: str,
+            ttl_sec: int | None = None,
+            ttl_ms: int | None = None,
+            count: int = 1000,
+            _type: str | None = None,
+            if_without_ttl: bool = False,
+            if_with_ttl: bool = False,
+            only_greater: bool = False,
+            only_less: bool = False
+    ) -> int:
+        """
+        Sets the ttl (see set_keys_ttl) of the keys matching the pattern: the keys are found with SCAN
+        and each batch of 'count' keys is processed with one script call
+        :param pattern: glob-style pattern ('session:*')
+        :param count: number of keys in one SCAN call and one script call
+        :param _type: only the keys of this Redis type
+        :return: number of the keys found by the pattern
+        """
+        if not pattern or not (ttl_sec or ttl_ms):
+            return 0
+        total: int = 0
+        for keys in self.__scan_batches(pattern, count, _type):
+            self.set_keys_ttl(
+                keys, ttl_sec, ttl_ms,
+                if_without_ttl=if_without_ttl,
+                if_with_ttl=if_with_ttl,
+                only_greater=only_greater,
+                only_less=only_less
+            )
+            total += len(keys)
+        return total
+
+    def r_lock(
+            self,
+            name: str,
+            ttl_ms: int = 10_000,
+            blocking_timeout_ms: int | None = None,
+            poll_interval_ms: int = 50,
+            auto_renewal: bool = False
+    ) -> PyRedisLock:
+        """
+        Distributed lock, can be used as a context manager (raises TimeoutError if the lock was not acquired):
+
+            with r.r_lock('orders', ttl_ms=10_000, blocking_timeout_ms=5_000, auto_renewal=True):
+                ...
+        The lock is a key with a random token, it is released and extended only by the owner of the token
+        (the check and the change are performed by one script), the lock of a crashed process expires after ttl_ms.
+        :param name: name of the lock (key 'pyluaredis:lock:<name>')
+        :param ttl_ms: lifetime of the lock
+        :param blocking_timeout_ms: maximum time to wait for the lock (None - wait without a limit, 0 - do not wait)
+        :param poll_interval_ms: interval between the attempts to take the lock
+        :param auto_renewal: extend the lock every ttl_ms / 3 in a background thread until it is released
+            (for critical sections that may run longer than ttl_ms)
+        :return: PyRedisLock (acquire, release, extend, locked)
+        """
+        return PyRedisLock(
+            self.redis, self.__register_lua_scripts, name, ttl_ms, blocking_timeout_ms, poll_interval_ms, auto_renewal,
+            self.lock_metrics
+        )
+
+    def r_rate_limit(
+            self,
+            key: str,
+            limit: int,
+            window_ms: int,
+            algorithm: str = 'token_bucket',
+            cost: int = 1
+    ) -> dict:
+        """
+        Takes the decision of the rate limiter with one script call (the time is taken from the Redis server):
+        'token_bucket' - the bucket of 'limit' tokens is refilled evenly over window_ms (bursts up to the limit);
+        'sliding_window' - at most 'limit' requests in any window_ms (the requests are stored in a sorted set)
+        :param key: key of the limit ('rate:user:1')
+        :param limit: number of requests (tokens) per window_ms
+        :param window_ms:
+        :param algorithm: 'token_bucket' or 'sliding_window'
+        :param cost: number of requests (tokens) taken by this request
+        :return: {'allowed': bool, 'remaining': int, 'retry_after_ms': int}
+            (retry_after_ms = 0 if allowed, -1 if the cost exceeds the limit)
+        """
+        return self.r_rate_limit_many({key: (limit, window_ms)}, algorithm, cost)['keys'][key]
+
+    def r_rate_limit_many(self, limits: dict, algorithm: str = 'token_bucket', cost: int = 1) -> dict:
+        """
+        Checks several limits of one request with one script call ({'user:1': (10, 1000), 'global': (1000, 1000)}):
+        the request is allowed only if all limits allow it, then the cost is taken from all of them
+        (in Redis Cluster the keys must be in the same hash slot)
+        :param limits: {key: (limit, window_ms)}
+        :param algorithm: 'token_bucket' or 'sliding_window' (see r_rate_limit)
+        :param cost: number of requests (tokens) taken by this request
+        :return: {'allowed': bool, 'retry_after_ms': int (maximum of the keys),
+            'keys': {key: {'allowed': bool, 'remaining': int, 'retry_after_ms': int}}}
+        """
+        if not limits:
+            return {'allowed': True, 'retry_after_ms': 0, 'keys': {}}
+        keys, args = _rate_limit_arguments(limits, algorithm, cost)
+        return _parse_rate_limit_reply(keys, self.__register_lua_scripts('rate_limit', len(keys), *keys, *args))
+
+    def cached(
+            self,
+            ttl_ms: int | None = None,
+            key_fn: Callable[..., str] | None = None,
+            convert_to_type: str | None = None,
+            namespace: str | None = None
+    ) -> Callable:
+        """
+        Decorator that caches the results of a function in Redis (r_set / r_get):
+
+            @r.cached(ttl_ms=60_000, convert_to_type='int')
+            def count_users(group: str) -> int: ...
+
+            count_users.cache_info()  # {'hits': int, 'misses': int, 'compute_time': float, 'hit_ratio': float | None}
+            count_users.cache_invalidate('admins')  # delete the result for these arguments
+            count_users.cache_clear()  # delete all results of the function (r_delete_pattern), returns their number
+
+        None results are not cached, the values are restored as in r_get (use convert_to_type or typed_values).
+        For coroutine functions use AsyncPyRedis.cached.
+        :param ttl_ms: lifetime of a result (None - without ttl)
+        :param key_fn: function of the arguments that returns the key of a result (by default - a hash of the arguments,
+            objects are identified by repr(), objects with the default repr (memory address) raise TypeError
+            on the call, so use key_fn for them)
+        :param convert_to_type: type conversion of a result read from Redis
+        :param namespace: prefix of the keys of the function (by default 'pyluaredis:cached:<module>.<qualname>')
+        """
+        def decorator(func: Callable) -> Callable:
+            if iscoroutinefunction(func):
+                raise TypeError('PyRedis.cached does not support coroutine functions, use AsyncPyRedis.cached')
+            return _cached_function(self, func, ttl_ms, key_fn, convert_to_type, namespace)
+        return decorator
 
     def r_remove_all_keys_local(self, get_count_keys: bool = False) -> int | None:
         """
@@ -537,6 +1247,8 @@ class PyRedis:
                 total_keys += self.redis.dbsize()
 
         self.redis.flushall(asynchronous=async_type)
+        if self.near_cache is not None:
+            self.near_cache.clear()
 
         return int(total_keys) if get_count_keys else None
 
@@ -555,7 +1267,15 @@ class PyRedis:
         if not (lua_script or sha):
             return
         if sha or (sha := self.user_lua_scripts_buffer.get(lua_script)):
-            return self.redis.evalsha_ro(sha, *args) if read_only else self.redis.evalsha(sha, *args)
+            try:
+                return self.redis.evalsha_ro(sha, *args) if read_only else self.redis.evalsha(sha, *args)
+            except NoScriptError:
+                if not lua_script:
+                    raise
+                # the script cache of the server was flushed, the script text is known - load it again
+                self.user_lua_scripts_buffer.pop(lua_script, None)
+                sha = self.load_lua_script(lua_script)
+                return self.redis.evalsha_ro(sha, *args) if read_only else self.redis.evalsha(sha, *args)
         return self.redis.eval_ro(lua_script, *args) if read_only else self.redis.eval(lua_script, *args)
 
     def load_lua_script(self, lua_script: str, use_buffer: bool = True) -> str:
@@ -572,15 +1292,114 @@ class PyRedis:
             self.user_lua_scripts_buffer[lua_script] = res
         return res
 
-    def __register_lua_scripts(self, script_name: str, *args):
-        if script_name not in self.lua_scripts_sha:
+    def __convert_reply(self, res, convert_to_type: str | None):
+        """ Type conversion of the value received from Redis (compression, typed values, raw bytes, convert_to_type) """
+        if self.compressor.algorithm is not None:
+            res = self.compressor.decompress(res)
+        if self.raw_bytes:
+            return _convert_raw_reply(res, convert_to_type, self.typed_values)
+        return _convert_reply(res, convert_to_type, self.typed_values)
+
+    def __scan_batches(self, pattern: str, count: int, _type: str | None) -> Iterator[tuple]:
+        """ Keys of r_scan in tuples of 'count' keys """
+        keys: Iterator[str] = self.r_scan(pattern, count, _type)
+        while batch := tuple(islice(keys, count)):
+            yield batch
+
+    def __refresh_in_background(self, key: str, factory: Callable, ttl_ms: int, lease_ms: int):
+        """
+        Recomputes the stale value of r_get_or_set in the thread pool if the lease is taken
+        (if another caller is already recomputing the value, nothing is done).
+        An exception of factory() is not raised: the stale value is returned until the key expires.
+        """
+        lease_key: str = _lease_key(key)
+        token: str = uuid4().hex
+        if self.__register_lua_scripts('acquire_lease', 2, key, lease_key, token, lease_ms, 1) != 'lease':
+            return
+
+        def refresh():
+            try:
+                if (value := factory()) is not None:
+                    self.r_set(key, value, time_ms=ttl_ms)
+            finally:
+                self.__register_lua_scripts('release_lease', 1, lease_key, token)
+
+        self.refresh_executor.submit(refresh)
+
+    def __stop_near_cache(self):
+        if getattr(self, 'near_cache', None) is not None:
+            self.near_cache.stop()
+            self.near_cache = None
+
+    def __register_lua_scripts(self, script_name: str, *args, raw: bool = False):
+        """
+        Entry point for calling library scripts.
+        If the near cache is used, the keys changed by the script are removed from it at once
+        (without waiting for the invalidation message from the server).
+        :param raw: receive the reply by the non-decoding client (binary values)
+        """
+        redis: Redis = self.raw_redis if raw else self.redis
+        if self.near_cache is not None and script_name not in _READ_ONLY_LUA_SCRIPTS:
+            try:
+                return self.__execute_lua_script(redis, script_name, *args)
+            finally:
+                self.near_cache.invalidate(args[1:1 + args[0]] if args[0] else None)
+        return self.__execute_lua_script(redis, script_name, *args)
+
+    def __execute_lua_script(self, redis: Redis, script_name: str, *args):
+        """
+        Runs the library script by SHA (exactly one EVALSHA in the steady state).
+        If the script cache of the server was flushed (restart, failover, SCRIPT FLUSH from another client),
+        the script is loaded again and the call is retried once.
+        """
+        if self.script_mode == 'functions':
+            return self.__call_redis_function(redis, script_name, *args)
+        try:
+            return redis.evalsha(self.__get_lua_script_sha(script_name), *args)
+        except NoScriptError:
+            return redis.evalsha(self.__get_lua_script_sha(script_name, reload=True), *args)
+
+    def __get_lua_script_sha(self, script_name: str, reload: bool = False) -> str:
+        """
+        :param script_name: file name of the script without the extension
+        :param reload: load the script into the script cache of the server even if its SHA is already known
+        :return: SHA
+        """
+        if reload or script_name not in self.lua_scripts_sha:
             lua_script = _load_lua_script_from_file(script_name)
             self.lua_scripts_sha[script_name] = self.redis.script_load(lua_script)
-        return self.redis.evalsha(self.lua_scripts_sha[script_name], *args)
+        return self.lua_scripts_sha[script_name]
 
     def __preload_lua_scripts(self):
-        lua_scripts_path = os_path.join(os_path.dirname(__file__), 'lua_scripts')
-        for file in os_listdir(lua_scripts_path):
-            if file.endswith('.lua'):
-                lua_script = _load_lua_script_from_file(file[:-4])
-                self.lua_scripts_sha[file] = self.redis.script_load(lua_script)
+        for script_name in _lua_script_names():
+            self.__get_lua_script_sha(script_name, reload=True)
+
+    def __call_redis_function(self, redis: Redis, script_name: str, *args):
+        """
+        Runs the library script from the Redis Functions library (FCALL_RO for read-only scripts).
+        If the library is missing on the server (FUNCTION FLUSH, a new node),
+        it is loaded again and the call is retried once.
+        """
+        function_name: str = _redis_function_name(script_name)
+        fcall = redis.fcall_ro if script_name in _READ_ONLY_LUA_SCRIPTS else redis.fcall
+        try:
+            return fcall(function_name, *args)
+        except ResponseError as e:
+            if 'function not found' not in str(e).lower():
+                raise
+            self.__load_functions_library(force=True)
+            return fcall(function_name, *args)
+
+    def __load_functions_library(self, force: bool = False):
+        """
+        Loads the Redis Functions library if it is missing on the server or has a different version
+        :param force: load the library without checking its version
+        """
+        library_code, version = _build_functions_library()
+        if not force:
+            try:
+                if self.redis.fcall_ro(_redis_function_name('version'), 0) == version:
+                    return
+            except ResponseError:
+                pass  # the library has not been loaded yet
+        self.redis.function_load(library_code, replace=True)
@@ -0,0 +1,236 @@
+"""
+Client for working with Redis Cluster
+Original library documentation: https://redis-py.readthedocs.io/en/stable/clustering.html
+"""
+# The connection parameters intentionally mirror PyRedis (client.py)
+# pylint: disable=duplicate-code
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from redis.cluster import RedisCluster, ClusterNode, LoadBalancingStrategy
+
+from pyluaredis.client import PyRedis
+from pyluaredis.exceptions import ClusterNotSupportedError
+from pyluaredis.helpers import _remove_duplicates, _group_keys_by_slot, _merge_mass_delete_results
+
+
+class PyRedisCluster(PyRedis):  # pylint: disable=too-many-instance-attributes
+    """
+    PyRedis for Redis Cluster.
+    Single-key library scripts are routed by redis-py to the node that owns the hash slot of the key.
+    Multi-key methods (r_mass_set, r_mass_get, set_keys_ttl, drop_keys_ttl, r_mass_delete, r_mass_unlink,
+    check_keys_and_get_values) group the keys by hash slot, call the scripts for each group in parallel
+    and merge the results, so the operation is atomic only within one hash slot.
+    r_scan (and r_delete_pattern, r_set_ttl_pattern) scans the keys of all primaries.
+    Keys of rename_key must be in the same hash slot (use hash tags: '{user1}:a', '{user1}:b').
+    The near cache and batch() are not available in the cluster mode (batch() raises ClusterNotSupportedError).
+    """
+    __slots__ = ('executor', 'startup_nodes', 'read_from_replicas')
+
+    def __init__(  # pylint: disable=too-many-locals
+            self, host: str = 'localhost', port: int = 6379, password='', username='default',
+            startup_nodes: list[tuple[str, int]] | None = None,
+            socket_timeout: int | float = 0.1,
+            retry_on_timeout: bool = True,
+            socket_keepalive: bool = True,
+            max_connections: int = 50,
+            preload_lua_scripts: bool = True,
+            script_mode: str = 'scripts',
+            read_from_replicas: bool = False,
+            max_workers: int = 8,
+            typed_values: bool = False,
+            raw_bytes: bool = False,
+            compression: str | None = None,
+            compression_threshold: int = 1024,
+            compression_level: int | None = None,
+            refresh_workers: int = 4
+    ):
+        """
+        :param startup_nodes: [(host, port), ...] nodes used to discover the cluster (host and port by default)
+        :param preload_lua_scripts: load all library scripts into the script cache of all primaries at once
+        :param script_mode: 'scripts' (EVALSHA) or 'functions' (FCALL/FCALL_RO, Redis >= 7.0),
+            the Functions library is loaded to all primaries
+        :param read_from_replicas: read-only commands can be served by replicas
+        :param max_workers: number of threads that call the scripts for different hash slots in parallel
+        :param typed_values: write values with a type tag (see PyRedis)
+        :param raw_bytes: write bytes without the hex encoding (see PyRedis)
+        :param compression: 'zlib' or 'lzma' - compress large values (see PyRedis)
+        :param compression_threshold: minimum size of a value in bytes to compress it
+        :param compression_level: compression level (zlib: 0-9, lzma: preset 0-9)
+        :param refresh_workers: number of threads that recompute stale values of r_get_or_set in the background
+        """
+        # used by _create_redis_clients, which is called by PyRedis.__init__
+        self.startup_nodes: list[tuple[str, int]] | None = startup_nodes
+        self.read_from_replicas: bool = read_from_replicas
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pyluaredis-cluster')
+        # SCRIPT LOAD and FUNCTION LOAD are sent by redis-py to all primaries
+        super().__init__(
+            host, port, password, username,
+            socket_timeout=socket_timeout,
+            retry_on_timeout=retry_on_timeout,
+            socket_keepalive=socket_keepalive,
+            max_connections=max_connections,
+            preload_lua_scripts=preload_lua_scripts,
+            script_mode=script_mode,
+            typed_values=typed_values,
+            raw_bytes=raw_bytes,
+            compression=compression,
+            compression_threshold=compression_threshold,
+            compression_level=compression_level,
+            refresh_workers=refresh_workers
+        )
+
+    def _create_redis_clients(self, **connection_kwargs) -> tuple[RedisCluster, RedisCluster]:
+        """ RedisCluster clients instead of Redis (Redis Cluster has only database 0) """
+        connection_kwargs.pop('db', None)
+        if self.startup_nodes:
+            connection_kwargs['host'] = None
+            connection_kwargs['startup_nodes'] = [
+                ClusterNode(node_host, node_port) for node_host, node_port in self.startup_nodes
+            ]
+        if self.read_from_replicas:
+            connection_kwargs['load_balancing_strategy'] = LoadBalancingStrategy.ROUND_ROBIN
+        return (
+            RedisCluster(**connection_kwargs, decode_responses=True),
+            RedisCluster(**connection_kwargs, decode_responses=False)  # binary values
+        )
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.refresh_executor.shutdown(wait=True)  # a refresh can call the multi-key methods
+        self.executor.shutdown(wait=True)
+        super().__exit__(exc_type, exc_value, traceback)
+
+    def __del__(self):
+        if getattr(self, 'executor', None) is not None:
+            self.executor.shutdown(wait=False)
+        if getattr(self, 'redis', None) is not None:
+            super().__del__()
+
+    def redis_py(self) -> RedisCluster:
+        """
+        Returns the original library object that the current library is built on
+        :return: redis-py RedisCluster object
+        """
+        return self.redis
+
+    def batch(self):
+        """
+        Not available for Redis Cluster: cluster pipelines of redis-py do not support EVALSHA/FCALL
+        :raises ClusterNotSupportedError: always
+        """
+        raise ClusterNotSupportedError('batch() is not available for Redis Cluster')
+
+    def r_mass_set(self, mapping: dict, *args, **kwargs) -> tuple:
+        """ PyRedis.r_mass_set, called separately for the keys of each hash slot """
+        if not isinstance(mapping, dict) or not mapping:
+            return ()
+        method: Callable = super().r_mass_set
+        written: set = {
+            key
+            for res in self.executor.map(
+                lambda slot_keys: method({key: mapping[key] for key in slot_keys}, *args, **kwargs),
+                _group_keys_by_slot(tuple(mapping)).values()
+            )
+            for key in res
+        }
+        return tuple(key for key in mapping if key in written)
+
+    def set_keys_ttl(
+            self,
+            keys: list[str] | tuple[str] | set[str] | frozenset[str],
+            ttl_sec: int | None = None,
+            ttl_ms: int | None = None,
+            if_without_ttl: bool = False,
+            if_with_ttl: bool = False,
+            only_greater: bool = False,
+            only_less: bool = False
+    ) -> None:
+        """ PyRedis.set_keys_ttl, called separately for the keys of each hash slot """
+        self.__map_slots(
+            super().set_keys_ttl, keys, ttl_sec, ttl_ms,
+            if_without_ttl=if_without_ttl,
+            if_with_ttl=if_with_ttl,
+            only_greater=only_greater,
+            only_less=only_less
+        )
+
+    def drop_keys_ttl(self, keys: list[str] | tuple[str] | set[str] | frozenset[str]):
+        """ PyRedis.drop_keys_ttl, called separately for the keys of each hash slot """
+        self.__map_slots(super().drop_keys_ttl, keys)
+
+    def r_mass_delete(
+            self,
+            keys: list | tuple | set | frozenset,
+            return_exists: bool = False,
+            return_non_exists: bool = False,
+            get_dict_key_value_exists: bool = False,
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
+    ) -> tuple[tuple, tuple, dict]:
+        """ PyRedis.r_mass_delete, called separately for the keys of each hash slot """
+        return _merge_mass_delete_results(self.__map_slots(
+            super().r_mass_delete, keys, return_exists, return_non_exists,
+            get_dict_key_value_exists, convert_to_type_dict_key, chunk_size
+        ))
+
+    def r_mass_unlink(
+            self,
+            keys: list | tuple | set | frozenset,
+            return_exists: bool = False,
+            return_non_exists: bool = False,
+            get_dict_key_value_exists: bool = False,
+            convert_to_type_dict_key: str = None,
+            chunk_size: int | None = None
+    ) -> tuple[tuple, tuple, dict]:
+        """ PyRedis.r_mass_unlink, called separately for the keys of each hash slot """
+        return _merge_mass_delete_results(self.__map_slots(
+            super().r_mass_unlink, keys, return_exists, return_non_exists,
+            get_dict_key_value_exists, convert_to_type_dict_key, chunk_size
+        ))
+
+    def check_keys_and_get_values(
+            self, keys: list | tuple | set | frozenset,
+            convert_to_type_dict_key: str = None
+    ) -> dict:
+        """ PyRedis.check_keys_and_get_values, called separately for the keys of each hash slot """
+        res: dict = {}
+        for values in self.__map_slots(super().check_keys_and_get_values, keys, convert_to_type_dict_key):
+            res.update(values)
+        return res
+
+    def r_mass_get(self, keys: list | tuple | set | frozenset, convert_to_type: str | None = None) -> dict:
+        """ PyRedis.r_mass_get, called separately for the keys of each hash slot """
+        res: dict = {}
+        for values in self.__map_slots(super().r_mass_get, keys, convert_to_type):
+            res.update(values)
+        return res
+
+    def r_remove_all_keys_local(self, get_count_keys: bool = False) -> int | None:
+        """
+        Delete all keys in the cluster (Redis Cluster has only database 0)
+        :param get_count_keys: need to return the number of deleted keys (True -> return integer, False -> return None)
+        :return: count keys or None
+        """
+        return self.r_remove_all_keys(get_count_keys)
+
+    def r_remove_all_keys(self, get_count_keys: bool = False, async_type: bool = False) -> int | None:
+        """
+        Delete all keys on all primaries of the cluster
+        :param get_count_keys: need to return the number of deleted keys (True -> return integer, False -> return None)
+        :param async_type: An indication that the operation should be performed asynchronously by the server
+        :return: count keys or None
+        """
+        total_keys = self.redis.dbsize() if get_count_keys else None  # the sum of all primaries
+        self.redis.flushall(asynchronous=async_type)
+        return int(total_keys) if get_count_keys else None
+
+    def __map_slots(self, method: Callable, keys, *args, **kwargs) -> list:
+        """
+        Calls the method of PyRedis for the keys of each hash slot (in parallel if there are several slots)
+        :return: list of results of each call
+        """
+        if not (keys := _remove_duplicates(keys)):
+            return []
+        groups: list[tuple] = list(_group_keys_by_slot(keys).values())
+        if len(groups) == 1:
+            return [method(keys, *args, **kwargs)]
+        return list(self.executor.map(lambda slot_keys: method(slot_keys, *args, **kwargs), groups))
@@ -0,0 +1,99 @@
+""" Transparent compression of the values written by the library """
+import lzma
+import zlib
+from base64 import b64encode, b64decode
+from time import perf_counter
+
+# Compressed value: '<marker>Z' + algorithm + transport + kind + data
+# algorithm: 'z' - zlib, 'x' - lzma; transport: 'b' - base64 text, 'r' - binary (raw_bytes mode);
+# kind: 's' - the original value is a string, 'y' - bytes
+_COMPRESSED_MARKER: str = '\x1eZ'
+_COMPRESSED_MARKER_BYTES: bytes = _COMPRESSED_MARKER.encode('utf-8')
+_ALGORITHMS: dict[str, str] = {'zlib': 'z', 'lzma': 'x'}
+
+
+class ValueCompressor:
+    """
+    Compresses the string values (and array elements) above the threshold and restores them on reading.
+    Keeps counters to tune the threshold: number of compressed values, original and stored sizes, time spent.
+    """
+    __slots__ = ('algorithm', 'threshold', 'level', 'binary', 'counters')
+
+    def __init__(self, algorithm: str | None = None, threshold: int = 1024, level: int | None = None,
+                 binary: bool = False):
+        """
+        :param algorithm: 'zlib', 'lzma' or None (compression is disabled)
+        :param threshold: minimum size of a value in bytes to compress it
+        :param level: compression level (zlib: 0-9, lzma: preset 0-9), by default the default level of the algorithm
+        :param binary: store the compressed data as binary strings (the client reads the values without decoding),
+            otherwise as base64 text
+        """
+        if algorithm is not None and algorithm not in _ALGORITHMS:
+            raise ValueError(f"compression must be one of {tuple(_ALGORITHMS)} or None, not {algorithm!r}")
+        self.algorithm: str | None = algorithm
+        self.threshold: int = threshold
+        self.level: int | None = level
+        self.binary: bool = binary
+        self.counters: dict = {
+            'compressed': 0, 'incompressible': 0, 'original_bytes': 0, 'stored_bytes': 0, 'compress_time': 0.0,
+            'decompressed': 0, 'decompress_time': 0.0
+        }
+
+    def compress(self, value: str | bytes, force: bool | None = None) -> str | bytes:
+        """
+        :param value: value prepared for writing
+        :param force: True - compress regardless of the threshold, False - do not compress, None - by the threshold
+        :return: compressed value with the marker, or the value itself if it is not compressed
+            (also if the compressed value is not smaller, e.g. random or already compressed data)
+        """
+        if self.algorithm is None or force is False:
+            return value
+        data: bytes = value if isinstance(value, bytes) else value.encode('utf-8')
+        if not force and len(data) < self.threshold:
+            return value
+
+        start_time: float = perf_counter()
+        if self.algorithm == 'zlib':
+            compressed: bytes = zlib.compress(data, -1 if self.level is None else self.level)
+        else:
+            compressed: bytes = lzma.compress(data, preset=self.level)
+        header: str = f"{_COMPRESSED_MARKER}{_ALGORITHMS[self.algorithm]}{'r' if self.binary else 'b'}" \
+                      f"{'y' if isinstance(value, bytes) else 's'}"
+        res = header.encode('utf-8') + compressed if self.binary else header + b64encode(compressed).decode('ascii')
+
+        self.counters['compress_time'] += perf_counter() - start_time
+        if len(res) >= len(data):
+            self.counters['incompressible'] += 1
+            return value
+        self.counters['compressed'] += 1
+        self.counters['original_bytes'] += len(data)
+        self.counters['stored_bytes'] += len(res)
+        return res
+
+    def decompress(self, value):
+        """ Restores compressed values (also inside lists, sets and dicts), other values are returned unchanged """
+        if isinstance(value, (list, tuple, set)):
+            return type(value)(self.decompress(item) for item in value)
+        if isinstance(value, dict):
+            return {field: self.decompress(item) for field, item in value.items()}
+        if isinstance(value, str) and value.startswith(_COMPRESSED_MARKER):
+            header, data = value[2:5], b64decode(value[5:])
+        elif isinstance(value, bytes) and value.startswith(_COMPRESSED_MARKER_BYTES):
+            header = value[2:5].decode('utf-8')
+            data = value[5:] if header[1] == 'r' else b64decode(value[5:])
+        else:
+            return value
+
+        start_time: float = perf_counter()
+        data = zlib.decompress(data) if header[0] == 'z' else lzma.decompress(data)
+        self.counters['decompress_time'] += perf_counter() - start_time
+        self.counters['decompressed'] += 1
+        return data if header[2] == 'y' else data.decode('utf-8')
+
+    def info(self) -> dict:
+        """ Counters of the compression (ratio = original size / stored size) """
+        return {
+            **self.counters,
+            'ratio': self.counters['original_bytes'] / self.counters['stored_bytes']
+            if self.counters['stored_bytes'] else None
+        }
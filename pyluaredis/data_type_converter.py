@@ -1,46 +1,90 @@
 """ Module for converting data types in different structures """
+from typing import Callable
 
 
 class TypeConverter:
-	""" Class providing methods for converting data """
+	"""
+	Class providing methods for converting data.
+	A type name ('int', 'bool_any', ...) is compiled once into a conversion function (TypeConverter.compile),
+	the functions are cached for the whole process.
+	"""
 	__slots__ = ('data_type_names', 'true_equals', 'false_equals', 'boolean_equals')
 
-	def __init__(self):
-		self.data_type_names: dict[str, type] = {
-			'int': int,
-			'integer': int,
-			'float': float,
-			'double': float,
-			'numeric': float,
-			'bool': bool,
-			'boolean': bool,
-			'byte': bytes,
-			'bytes': bytes,
-		}
+	DATA_TYPE_NAMES: dict[str, type] = {
+		'int': int,
+		'integer': int,
+		'float': float,
+		'double': float,
+		'numeric': float,
+		'bool': bool,
+		'boolean': bool,
+		'byte': bytes,
+		'bytes': bytes,
+	}
+	TRUE_EQUALS: frozenset[str] = frozenset(('1', 'True', 'true'))
+	FALSE_EQUALS: frozenset[str] = frozenset(('0', 'False', 'false', ''))
+	BOOLEAN_EQUALS: frozenset[str] = TRUE_EQUALS | FALSE_EQUALS
+
+	# user converters: name -> function converting one string (registered by TypeConverter.register)
+	user_converters: dict[str, Callable] = {}
+	# compiled conversion functions: type name -> function
+	compiled: dict[str, Callable] = {}
 
+	def __init__(self):
+		self.data_type_names: dict[str, type] = self.DATA_TYPE_NAMES
 		self.true_equals = ('1', 'True', 'true')
 		self.false_equals = ('0', 'False', 'false', '')
 		self.boolean_equals = (*self.true_equals, *self.false_equals)
 
-	def converter(self, value: str | list[str] | set[str], _type: str):
-		""" Entry point """
-		type_check: tuple = tuple(_type.split('_', 1))
+	@classmethod
+	def register(cls, name: str, function: Callable[[str], object]) -> None:
+		"""
+		Adds a user converter, e.g. TypeConverter.register('decimal', Decimal),
+		after that r_get(key, convert_to_type='decimal') returns Decimal values.
+		Arrays are converted on the principle of "all or nothing", with the '_any' suffix ('decimal_any') -
+		each element separately; a value that cannot be converted (ValueError/TypeError/ArithmeticError)
+		is returned unchanged.
+		:param name: type name (without '_'), the built-in names can be overridden
+		:param function: function that converts one string value
+		"""
+		if not name or '_' in name or not callable(function):
+			raise ValueError(f"invalid converter: {name!r}")
+		cls.user_converters[name] = function
+		cls.compiled.clear()
 
-		type_len = len(type_check)
-		extended = type_len == 2 and type_check[1] == 'any'
-		_type = self.data_type_names.get(type_check[0]) if type_len in (1, 2) else None
-		if _type is None:
-			return value
+	@classmethod
+	def unregister(cls, name: str) -> None:
+		""" Removes a user converter """
+		cls.user_converters.pop(name, None)
+		cls.compiled.clear()
+
+	@classmethod
+	def compile(cls, spec: str) -> Callable:
+		"""
+		Returns the conversion function for the type name (the same as converter(value, spec)),
+		the function is created once for each name
+		"""
+		try:
+			return cls.compiled[spec]
+		except KeyError:
+			pass
 
-		# If try to convert an array of type ['True', 'False'] to type bool,
-		# then need to iterate over each element
-		# Which makes the conversion for such an array the most expensive function
-		if _type is bool and extended is False and isinstance(value, (list, set)):
-			if set(value).intersection(set(self.boolean_equals)):
-				extended = True
+		type_check: tuple = tuple(spec.split('_', 1))
+		extended: bool = len(type_check) == 2 and type_check[1] == 'any'
+		if (user_converter := cls.user_converters.get(type_check[0])) is not None:
+			function = cls.__compile_converter(_safe(user_converter), user_converter, extended)
+		elif (_type := cls.DATA_TYPE_NAMES.get(type_check[0])) is not None:
+			function = cls.__compile_converter(
+				_SCALAR_CONVERTERS[_type], bytes.fromhex if _type is bytes else _type, extended, _type is bool
+			)
+		else:
+			function = _identity
+		cls.compiled[spec] = function
+		return function
 
-		return self.convert_to_type(value, _type) if not extended \
-			else self.convert_to_type_extended(value, _type)
+	def converter(self, value: str | list[str] | set[str], _type: str):
+		""" Entry point """
+		return self.compile(_type)(value)
 
 	def convert_to_type(self, value: str | list[str] | set[str], _type: type):
 		""" Conversion on the principle of "all or nothing" """
@@ -53,31 +97,88 @@ class TypeConverter:
 			except (ValueError, TypeError):
 				return value
 
-		return self.__helper_convert_to_type(value, _type)
+		return _SCALAR_CONVERTERS[_type](value)
 
 	def convert_to_type_extended(self, value: str | list[str] | set[str], _type: type):
 		""" Array conversion is performed for each element separately """
+		scalar: Callable = _SCALAR_CONVERTERS[_type]
 		if isinstance(value, (list, set)):
-			return [self.__helper_convert_to_type(i, _type) for i in value] \
-				if isinstance(value, list) else {self.__helper_convert_to_type(i, _type) for i in value}
+			return list(map(scalar, value)) if isinstance(value, list) else set(map(scalar, value))
+
+		return scalar(value)
+
+	@classmethod
+	def __compile_converter(
+			cls, scalar: Callable, element: Callable, extended: bool, boolean: bool = False
+	) -> Callable:
+		"""
+		:param scalar: conversion of one value (returns the value unchanged if it cannot be converted)
+		:param element: conversion of an array element in the "all or nothing" mode (raises an exception)
+		:param extended: arrays are converted element by element
+		:param boolean: arrays with '1'/'0'/'True'/... elements are converted element by element
+		"""
+		def convert_extended(value):
+			if isinstance(value, list):
+				return list(map(scalar, value))
+			if isinstance(value, set):
+				return set(map(scalar, value))
+			return scalar(value)
+
+		if extended:
+			return convert_extended
 
-		return self.__helper_convert_to_type(value, _type)
+		boolean_equals: frozenset[str] = cls.BOOLEAN_EQUALS
 
-	def __helper_convert_to_type(self, value: str, _type: type):
-		""" attempt to convert a value to a given type """
+		def convert(value):
+			if isinstance(value, (list, set)):
+				# If try to convert an array of type ['True', 'False'] to type bool,
+				# then need to iterate over each element
+				# Which makes the conversion for such an array the most expensive function
+				if boolean and not boolean_equals.isdisjoint(value):
+					return convert_extended(value)
+				try:
+					return list(map(element, value)) if isinstance(value, list) else set(map(element, value))
+				except (ValueError, TypeError, ArithmeticError):  # decimal.InvalidOperation is an ArithmeticError
+					return value
+			return scalar(value)
+
+		return convert
+
+
+def _identity(value):
+	return value
+
+
+def _safe(function: Callable) -> Callable:
+	""" The value is returned unchanged if it cannot be converted """
+	def convert(value):
 		try:
-			if _type is int:
-				if '.' in value:
-					# if it`s float, then before converting it`s necessary to slice the fractional part from the string
-					idx: int = value.find('.')
-					value: str = value[:idx]
-				value: int = int(value)
-			elif _type is float:
-				value: float = float(value)
-			elif _type is bool:
-				value: bool | str = (value in self.true_equals) if value in self.boolean_equals else value
-			elif _type is bytes:
-				value: bytes = bytes.fromhex(value)
-		except (ValueError, TypeError):
-			pass
+			return function(value)
+		except (ValueError, TypeError, ArithmeticError):
+			return value
+	return convert
+
+
+def _to_int(value):
+	try:
+		if '.' in value:
+			# if it`s float, then before converting it`s necessary to slice the fractional part from the string
+			value = value[:value.find('.')]
+		return int(value)
+	except (ValueError, TypeError):
 		return value
+
+
+def _to_bool(value):
+	try:
+		return (value in TypeConverter.TRUE_EQUALS) if value in TypeConverter.BOOLEAN_EQUALS else value
+	except TypeError:  # unhashable value
+		return value
+
+
+_SCALAR_CONVERTERS: dict[type, Callable] = {
+	int: _to_int,
+	float: _safe(float),
+	bool: _to_bool,
+	bytes: _safe(bytes.fromhex),
+}
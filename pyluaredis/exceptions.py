@@ -0,0 +1,20 @@
+""" Exceptions of the library """
+
+
+class PyRedisError(Exception):
+    """ Base class of the exceptions raised by the library itself (errors of redis-py are not wrapped) """
+
+
+class ClusterNotSupportedError(PyRedisError):
+    """ The method of PyRedis is not available for Redis Cluster (PyRedisCluster) """
+
+
+class PackedArrayNotSupportedError(PyRedisError):
+    """
+    The key holds a packed numeric array (PyRedis.r_set_packed), which can be read only by PyRedis
+    (AsyncPyRedis and PyRedisBatch read the values by the decoding connection)
+    """
+
+
+class TypedValuesNotSupportedError(PyRedisError):
+    """ The method can not work with the values written with type tags (PyRedis(typed_values=True)) """
@@ -1,15 +1,49 @@
 """ Helper methods for the PyRedis object """
-from os import path as os_path
+from os import path as os_path, listdir as os_listdir
+from array import array
+from sys import byteorder
+from functools import lru_cache
+from hashlib import sha1
+from math import log
+from random import random
+from typing import Callable
+from uuid import uuid4
+from redis.crc import key_slot
 
 from pyluaredis.data_type_converter import TypeConverter
+from pyluaredis.exceptions import PackedArrayNotSupportedError
 
 _SUPPORTED_TYPES: tuple[type, ...] = (bool, int, float, str, bytes)
 _SUPPORTED_ITERABLE_TYPES: tuple[type, ...] = (list, tuple, set, frozenset)
-_ALL_SUPPORTED_TYPES: tuple[type, ...] = tuple(list(_SUPPORTED_TYPES) + list(_SUPPORTED_ITERABLE_TYPES))
+_ALL_SUPPORTED_TYPES: tuple[type, ...] = tuple(list(_SUPPORTED_TYPES) + list(_SUPPORTED_ITERABLE_TYPES) + [dict])
 
+# Library scripts that do not modify data (FCALL_RO + 'no-writes' flag in the Redis Functions mode)
+_READ_ONLY_LUA_SCRIPTS: frozenset[str] = frozenset((
+	'get_helper', 'r_len', 'get_packed_range', 'iter_helper', 'get_range', 'r_mass_get'
+))
+_FUNCTIONS_LIBRARY_NAME: str = 'pyluaredis'
+_TEMPORARY_KEY_TTL_MS: int = 3_600_000  # temporary keys of unfinished streamed writes are deleted by Redis
 
+# Typed values: '<marker>[container tag]<type tag><value as string>'
+# (the container tag is written only for the elements of lists and sets)
+_TYPE_MARKER: str = '\x1e'  # ASCII record separator
+_TYPE_TAGS: dict[type, str] = {bool: 'b', int: 'i', float: 'f', str: 's', bytes: 'y'}  # bool is checked before int
+_TYPE_DECODERS: dict[str, Callable] = {
+	'b': lambda value: value == 'True', 'i': int, 'f': float, 's': str, 'y': bytes.fromhex,
+	'r': lambda value: value.encode('utf-8', 'surrogateescape')  # bytes written without hex (raw_bytes mode)
+}
+_CONTAINER_TAGS: dict[type, str] = {list: 'L', tuple: 'T', set: 'S', frozenset: 'F'}
+_CONTAINER_TYPES: dict[str, type] = {tag: _type for _type, tag in _CONTAINER_TAGS.items()}
+_UNKNOWN_CONTAINER_TAG: str = '?'  # element added to an existing array (insert_value_to_array)
+
+# Packed numeric arrays: '<marker>A' + typecode + item size (1 byte) + elements (little-endian)
+_PACKED_MARKER: bytes = b'\x1eA'
+_PACKED_TYPECODES: frozenset[str] = frozenset('bBhHiIqQfd')  # types of the same size on all platforms
+
+
+@lru_cache(maxsize=None)
 def _load_lua_script_from_file(filename: str) -> str:
-	""" Load Lua script from a file """
+	""" Load Lua script from a file (the text of the script is read from the disk once per process) """
 	with open(
 			os_path.join(os_path.dirname(__file__), f'lua_scripts/{filename}.lua'),
 			'r', encoding='utf-8'
@@ -17,8 +51,55 @@ def _load_lua_script_from_file(filename: str) -> str:
 		return lua_file.read()
 
 
+def _lua_script_names() -> tuple[str, ...]:
+	""" Names of all library scripts (file names without the extension) """
+	return tuple(sorted(
+		file[:-4] for file in os_listdir(os_path.join(os_path.dirname(__file__), 'lua_scripts')) if file.endswith('.lua')
+	))
+
+
+def _redis_function_name(script_name: str) -> str:
+	""" The name of the library script in the Redis Functions library """
+	return f'{_FUNCTIONS_LIBRARY_NAME}_{script_name}'
+
+
+@lru_cache(maxsize=None)
+def _build_functions_library() -> tuple[str, str]:
+	"""
+	Builds a Redis Functions library (FUNCTION LOAD) from all library scripts:
+	each script becomes a function with the same KEYS/ARGV interface,
+	read-only scripts are flagged 'no-writes' so that they can be called by FCALL_RO (also on replicas).
+	The version of the library is the hash of its code, it is returned by the '<library>_version' function.
+	:return: (code of the library, version)
+	"""
+	functions: list[str] = []
+	for script_name in _lua_script_names():
+		flags: str = "{'no-writes'}" if script_name in _READ_ONLY_LUA_SCRIPTS else '{}'
+		functions.append(
+			'redis.register_function{\n'
+			f"  function_name = '{_redis_function_name(script_name)}',\n"
+			'  callback = function(KEYS, ARGV)\n'
+			f'{_load_lua_script_from_file(script_name)}\n'
+			'  end,\n'
+			f'  flags = {flags}\n'
+			'}\n'
+		)
+	body: str = '\n'.join(functions)
+	version: str = sha1(body.encode('utf-8')).hexdigest()
+
+	return (
+		f'#!lua name={_FUNCTIONS_LIBRARY_NAME}\n\n{body}\n'
+		'redis.register_function{\n'
+		f"  function_name = '{_redis_function_name('version')}',\n"
+		f"  callback = function() return '{version}' end,\n"
+		"  flags = {'no-writes'}\n"
+		'}\n',
+		version
+	)
+
+
 def _convert_to_type(value: str | list[str] | set[str], _type: str) -> str | bool | int | float | bytes | list | set:
-	return TypeConverter().converter(value, _type)
+	return TypeConverter.compile(_type)(value)
 
 
 def _compare_and_select_sec_ms(time_s: int | None, time_ms: int | None) -> int | None:
@@ -42,6 +123,412 @@ def _remove_duplicates(iterable_var: list | tuple | set | frozenset) -> tuple:
 	return tuple(set(iterable_var))
 
 
-def _convert_value_to_string(value: _SUPPORTED_TYPES) -> str:
-	""" Returns a string to pass the value to a Lua script """
-	return value.hex() if isinstance(value, bytes) else str(value)
+def _convert_value_to_string(value: _SUPPORTED_TYPES, raw_bytes: bool = False) -> str | bytes:
+	"""
+	Returns a string to pass the value to a Lua script
+	:param raw_bytes: bytes are passed as is (binary bulk string) instead of the hex string
+	"""
+	if isinstance(value, bytes):
+		return value if raw_bytes else value.hex()
+	return str(value)
+
+
+def _encode_typed_value(value: _SUPPORTED_TYPES, container_tag: str = '', raw_bytes: bool = False) -> str | bytes:
+	"""
+	Returns a string with a type tag, which is decoded back into a value of the same type
+	:raises TypeError: the value (an element of an array or a hash) is not bool/int/float/str/bytes
+	"""
+	if raw_bytes and isinstance(value, bytes):
+		return f'{_TYPE_MARKER}{container_tag}r'.encode('utf-8') + value
+	type_tag: str | None = next((tag for _type, tag in _TYPE_TAGS.items() if isinstance(value, _type)), None)
+	if type_tag is None:
+		raise TypeError(f'typed values support only bool/int/float/str/bytes elements, not {type(value).__name__}')
+	return f'{_TYPE_MARKER}{container_tag}{type_tag}{_convert_value_to_string(value)}'
+
+
+def _is_typed_item(item) -> bool:
+	return isinstance(item, (str, bytes)) and item[:1] in (_TYPE_MARKER, _TYPE_MARKER.encode('utf-8'))
+
+
+def _decode_typed_item(item):
+	""" Decodes a string with a type tag, other values are returned unchanged """
+	if isinstance(item, bytes) and _is_typed_item(item):
+		item = item.decode('utf-8', 'surrogateescape')  # binary value received by the non-decoding client
+	if not (isinstance(item, str) and item.startswith(_TYPE_MARKER)):
+		return item
+	tag_index: int = 2 if item[1:2] in _CONTAINER_TYPES or item[1:2] == _UNKNOWN_CONTAINER_TAG else 1
+	decoder: Callable | None = _TYPE_DECODERS.get(item[tag_index:tag_index + 1])
+	return decoder(item[tag_index + 1:]) if decoder else item
+
+
+def _decode_typed_value(value):
+	""" Decodes a value written in the typed mode, arrays are restored with their original type """
+	if isinstance(value, (list, tuple, set)):
+		container: type = next((
+			_CONTAINER_TYPES[chr(item[1]) if isinstance(item, bytes) else item[1]] for item in value
+			if _is_typed_item(item) and len(item) > 1
+			and (chr(item[1]) if isinstance(item, bytes) else item[1]) in _CONTAINER_TYPES
+		), type(value))
+		return container(_decode_typed_item(item) for item in value)
+	return _decode_typed_item(value)
+
+
+def _convert_reply(res, convert_to_type: str | None, typed_values: bool = False):
+	"""
+	Type conversion of the value received from Redis:
+	in the typed mode values with a type tag are decoded, other values are converted according to convert_to_type
+	"""
+	if res is None:
+		return None
+	if isinstance(res, dict):  # hash: the values are converted, the fields remain strings
+		return {field: _convert_reply(value, convert_to_type, typed_values) for field, value in res.items()}
+	if typed_values:
+		if _is_typed_item(next(iter(res), None) if isinstance(res, (list, tuple, set)) else res):
+			return _decode_typed_value(res)
+	return _convert_to_type(res, convert_to_type) if convert_to_type else res
+
+
+def _decode_raw_value(value):
+	""" Decodes the strings received by the non-decoding client, binary data (not UTF-8) remains bytes """
+	if isinstance(value, bytes):
+		try:
+			return value.decode('utf-8')
+		except UnicodeDecodeError:
+			return value
+	if isinstance(value, (list, tuple, set)):
+		return type(value)(_decode_raw_value(item) for item in value)
+	if isinstance(value, dict):
+		return {_decode_raw_value(field): _decode_raw_value(item) for field, item in value.items()}
+	return value
+
+
+def _convert_raw_reply(res, convert_to_type: str | None, typed_values: bool = False):
+	"""
+	Type conversion of the value received by the non-decoding client (raw_bytes mode):
+	with convert_to_type='bytes' the stored buffer is returned as is, without decoding
+	"""
+	if convert_to_type in ('byte', 'bytes'):
+		return _convert_reply(res, None, typed_values)
+	return _convert_reply(_decode_raw_value(res), convert_to_type, typed_values)
+
+
+def _is_value_supported(value) -> bool:
+	""" Writing empty objects and unsupported types is not supported """
+	return (bool(value) or value in (False, 0)) and isinstance(value, _ALL_SUPPORTED_TYPES)
+
+
+def _set_script_arguments(
+		key: str,
+		value: _ALL_SUPPORTED_TYPES,
+		get_old_value: bool,
+		time_ms: int | None,
+		if_exist: bool,
+		if_not_exist: bool,
+		keep_ttl: bool,
+		typed_values: bool = False,
+		raw_bytes: bool = False,
+		compress: Callable[[str | bytes], str | bytes] | None = None
+) -> tuple[str, tuple]:
+	"""
+	Returns the name of the Lua script and its arguments (numkeys, key, ARGV...) to write the value by key.
+	Shared by the synchronous and asynchronous clients.
+	:param typed_values: write the values with type tags (see _encode_typed_value)
+	:param raw_bytes: bytes are written as is, without the hex encoding
+	:param compress: function applied to the string value (each element of arrays), e.g. ValueCompressor.compress
+	"""
+	options: tuple = (int(get_old_value), time_ms or 0, int(if_exist), int(if_not_exist), int(keep_ttl))
+	operation, converted_value = _value_write_arguments(value, typed_values, raw_bytes, compress)
+
+	if operation == 'set':
+		return 'set_not_array_helper', (1, key, *options, converted_value[0])
+	return 'set_arrays_helper', (1, key, *options, operation, int(len(converted_value) < 7850), *converted_value)
+
+
+def _value_write_arguments(
+		value: _ALL_SUPPORTED_TYPES,
+		typed_values: bool = False,
+		raw_bytes: bool = False,
+		compress: Callable[[str | bytes], str | bytes] | None = None
+) -> tuple[str, list]:
+	"""
+	Converts the value for writing (see _set_script_arguments)
+	:return: ('set', [value]) / ('rpush' or 'sadd', [element, ...]) / ('hset', [field, value, ...])
+	"""
+	if isinstance(value, _SUPPORTED_TYPES):
+		value = _encode_typed_value(value, raw_bytes=raw_bytes) if typed_values \
+			else _convert_value_to_string(value, raw_bytes)
+		return 'set', [compress(value) if compress else value]
+
+	if isinstance(value, dict):  # hash: field, value, field, value...
+		return 'hset', _convert_hash_items(value, typed_values, raw_bytes, compress)
+
+	return (
+		'rpush' if isinstance(value, (list, tuple)) else 'sadd',
+		_convert_array_items(value, type(value), typed_values, raw_bytes, compress)
+	)
+
+
+def _convert_array_items(
+		items,
+		container_type: type,
+		typed_values: bool = False,
+		raw_bytes: bool = False,
+		compress: Callable[[str | bytes], str | bytes] | None = None
+) -> list:
+	""" Converts the elements of an array (list/tuple/set/frozenset) for writing (see _set_script_arguments) """
+	if typed_values:
+		container_tag: str = next(tag for _type, tag in _CONTAINER_TAGS.items() if issubclass(container_type, _type))
+		converted_items = [_encode_typed_value(i, container_tag, raw_bytes) for i in items]
+	else:
+		converted_items = [_convert_value_to_string(i, raw_bytes) for i in items]
+	return list(map(compress, converted_items)) if compress else converted_items
+
+
+def _convert_hash_items(
+		mapping: dict,
+		typed_values: bool = False,
+		raw_bytes: bool = False,
+		compress: Callable[[str | bytes], str | bytes] | None = None
+) -> list:
+	"""
+	Converts a dict for writing to a hash: [field, value, field, value, ...] (values as scalars in r_set)
+	:raises TypeError: a value is not bool/int/float/str/bytes (None, nested containers)
+	"""
+	if unsupported := [field for field, value in mapping.items() if not isinstance(value, _SUPPORTED_TYPES)]:
+		raise TypeError(f'hash values must be bool/int/float/str/bytes, unsupported fields: {unsupported!r}')
+	converted_items: list = []
+	for field, value in mapping.items():
+		value = _encode_typed_value(value, raw_bytes=raw_bytes) if typed_values \
+			else _convert_value_to_string(value, raw_bytes)
+		converted_items += (_convert_value_to_string(field, raw_bytes), compress(value) if compress else value)
+	return converted_items
+
+
+def _temporary_key(key: str) -> str:
+	""" Unique temporary key in the same Redis Cluster hash slot as the key """
+	return _related_key(key, f':pyluaredis-tmp:{uuid4().hex}')
+
+
+def _lease_key(key: str) -> str:
+	""" Key of the computation lease of the key (r_get_or_set) in the same Redis Cluster hash slot as the key """
+	return _related_key(key, ':pyluaredis-lease')
+
+
+def _should_refresh(pttl: int, stale_ms: int, early_refresh_ms: int | None = None) -> bool:
+	"""
+	Whether the value written by r_get_or_set with stale_ms must be recomputed in the background:
+	the value is stale when its remaining ttl is less than stale_ms (the soft expiry has passed).
+	With early_refresh_ms the refresh may start before the soft expiry with a probability that grows
+	as it approaches (probabilistic early expiration, early_refresh_ms ~ duration of the computation)
+	"""
+	if pttl < 0:  # the key has no ttl
+		return False
+	fresh_ms: int = pttl - stale_ms
+	if fresh_ms <= 0:
+		return True
+	return bool(early_refresh_ms) and fresh_ms <= -early_refresh_ms * log(1.0 - random())
+
+
+def _rate_limit_arguments(limits: dict, algorithm: str, cost: int) -> tuple[tuple, tuple]:
+	"""
+	Keys and arguments of the rate_limit script
+	:param limits: {key: (limit, window_ms)}
+	:return: (keys), (algorithm, cost, token, limit, window_ms, ...)
+	"""
+	if algorithm not in ('token_bucket', 'sliding_window'):
+		raise ValueError(f"algorithm must be 'token_bucket' or 'sliding_window', not {algorithm!r}")
+	if not isinstance(cost, int) or cost < 1:
+		raise ValueError(f'cost must be a positive integer, not {cost!r}')
+	args: list = [algorithm, cost, uuid4().hex]
+	for key, (limit, window_ms) in limits.items():
+		if not key or limit < 1 or window_ms < 1:
+			raise ValueError(f'invalid rate limit: {key!r}: limit={limit!r}, window_ms={window_ms!r}')
+		args.extend((limit, window_ms))
+	return tuple(limits), tuple(args)
+
+
+def _parse_rate_limit_reply(keys: tuple, res: list) -> dict:
+	"""
+	Result of r_rate_limit_many from the reply of the rate_limit script (allowed, remaining, retry_after_ms for each key)
+	:return: {'allowed': bool, 'retry_after_ms': int, 'keys': {key: {'allowed': bool, 'remaining': int,
+		'retry_after_ms': int}}}, retry_after_ms = -1 - the request is never allowed (its cost exceeds the limit)
+	"""
+	limits: dict = {
+		key: {'allowed': bool(res[3 * i]), 'remaining': int(res[3 * i + 1]), 'retry_after_ms': int(res[3 * i + 2])}
+		for i, key in enumerate(keys)
+	}
+	retry_after: list = [limit['retry_after_ms'] for limit in limits.values()]
+	return {
+		'allowed': all(limit['allowed'] for limit in limits.values()),
+		'retry_after_ms': -1 if -1 in retry_after else max(retry_after, default=0),
+		'keys': limits
+	}
+
+
+def _related_key(key: str, suffix: str) -> str:
+	"""
+	Key with the suffix in the same Redis Cluster hash slot as the key:
+	the hash tag of the key is kept, otherwise the whole key becomes the hash tag
+	(for keys with '}' but without a hash tag the slot may differ)
+	"""
+	start: int = key.find('{')
+	if start != -1 and key.find('}', start + 2) != -1:  # the key has a non-empty hash tag
+		return key + suffix
+	return f'{{{key}}}{suffix}' if '}' not in key else key + suffix
+
+
+def _bulk_insert_arguments(values: dict, typed_values: bool = False) -> tuple:
+	"""
+	Arguments (index, value, ...) of the bulk_insert_values_to_array script sorted by index (-1 - after the others),
+	unsupported values are skipped
+	"""
+	if not isinstance(values, dict):
+		return ()
+	items: list = sorted(
+		(
+			(index, value) for index, value in values.items()
+			if isinstance(index, int) and index >= -1
+			and isinstance(value, (bool, int, float, str)) and (value or value in (False, 0))
+		),
+		key=lambda item: (item[0] == -1, item[0])
+	)
+	return tuple(
+		arg for index, value in items
+		for arg in (index, _encode_typed_value(value, _UNKNOWN_CONTAINER_TAG) if typed_values else str(value))
+	)
+
+
+def _mass_set_batches(
+		mapping: dict,
+		time_ms: int | None,
+		ttl_ms: dict | None,
+		batch_size: int,
+		typed_values: bool = False,
+		raw_bytes: bool = False,
+		compress: Callable[[str | bytes], str | bytes] | None = None
+):
+	"""
+	Splits the keys of r_mass_set into batches (at most batch_size keys and ~100_000 arguments)
+	:return: generator of (keys, [operation, ttl in ms, number of values, *values] for each key)
+	"""
+	keys, args = [], []
+	for key, value in mapping.items():
+		if not key or not _is_value_supported(value):
+			continue  # writing empty objects is not supported
+		operation, values = _value_write_arguments(value, typed_values, raw_bytes, compress)
+		keys.append(key)
+		args += (operation, (ttl_ms or {}).get(key, time_ms) or 0, len(values), *values)
+		if len(keys) >= batch_size or len(args) >= 100_000:
+			yield keys, args
+			keys, args = [], []
+	if keys:
+		yield keys, args
+
+
+def _parse_value_with_type(res: list | None, default_value=None):
+	""" Unpacks the {value, type} reply of the Lua scripts, sets are returned as a set object, hashes as a dict """
+	if not res:
+		return default_value
+	if res[1] in ('set', b'set'):
+		return set(res[0])
+	if res[1] in ('hash', b'hash') and res[0] is not None:
+		return _pairs_to_dict(res[0])
+	return res[0]
+
+
+def _pairs_to_dict(items: list) -> dict:
+	""" [field, value, field, value, ...] (HGETALL, HSCAN) -> {field: value} """
+	return dict(zip(items[::2], items[1::2]))
+
+
+def _mass_delete_result(
+		keys: tuple,
+		exists_key_value: dict,
+		return_exists: bool,
+		return_non_exists: bool,
+		get_dict_key_value_exists: bool,
+		convert_to_type_dict_key: str | None,
+		typed_values: bool = False
+) -> tuple[tuple, tuple, dict]:
+	""" Builds the ((return_exists), (return_non_exists), {get_dict_key_value_exists}) result of mass deletion """
+	exists_keys: tuple = tuple(sorted(exists_key_value.keys()))
+	non_exists_keys: tuple = tuple(sorted(set(keys) - set(exists_keys)))
+
+	# convert_to_type_dict_key
+	exists_key_value = {
+		key: _convert_reply(value, convert_to_type_dict_key, typed_values)
+		for key, value in exists_key_value.items()
+	} if (convert_to_type_dict_key or typed_values) else exists_key_value
+
+	return (
+		exists_keys if return_exists else (),
+		non_exists_keys if return_non_exists else (),
+		exists_key_value if get_dict_key_value_exists else {}
+	)
+
+
+def _parse_mass_delete_reply(keys: tuple, res: list, decode: bool = False) -> dict:
+	"""
+	Unpacks the flat reply of r_mass_delete_or_unlink.lua [index of the key, type, value, ...] into {key: value}
+	:param decode: the reply was received by the non-decoding client, the strings are decoded
+		(binary data remains bytes), packed numeric arrays are unpacked
+	"""
+	values: dict = {}
+	for i in range(0, len(res), 3):
+		value_type, value = res[i + 1], res[i + 2]
+		if value_type in ('packed', b'packed'):
+			value = _unpack_numeric_array(value[:4], value[4:]) if value is not None else None
+		elif value is not None:
+			value = _parse_value_with_type([value, value_type])
+			value = _decode_raw_value(value) if decode else value
+		values[keys[int(res[i]) - 1]] = value
+	return values
+
+
+def _group_keys_by_slot(keys: tuple) -> dict[int, tuple]:
+	""" Groups the keys by Redis Cluster hash slot (hash tags {...} are taken into account) """
+	groups: dict[int, list] = {}
+	for key in keys:
+		groups.setdefault(key_slot(key.encode('utf-8')), []).append(key)
+	return {slot: tuple(slot_keys) for slot, slot_keys in groups.items()}
+
+
+def _merge_mass_delete_results(results: list[tuple[tuple, tuple, dict]]) -> tuple[tuple, tuple, dict]:
+	""" Merges the results of mass deletion performed separately for each hash slot """
+	return (
+		tuple(sorted(key for res in results for key in res[0])),
+		tuple(sorted(key for res in results for key in res[1])),
+		{key: value for res in results for key, value in res[2].items()}
+	)
+
+
+def _check_not_packed(key: str, res: list | None):
+	""" The get_helper reply of a packed numeric array can not be read by the decoding connection """
+	if res and res[1] in ('packed', b'packed'):
+		raise PackedArrayNotSupportedError(f'{key!r} holds a packed numeric array, read it with PyRedis.r_get_packed')
+
+
+def _pack_numeric_array(values, typecode: str | None = None) -> bytes:
+	"""
+	Packs a sequence of numbers into one binary string
+	:param typecode: array module typecode, by default 'q' (int64) for integers and 'd' (float64) otherwise
+	"""
+	values = values if isinstance(values, array) else list(values)  # generators are iterated only once
+	if typecode is None:
+		typecode = values.typecode if isinstance(values, array) else \
+			('q' if all(isinstance(value, int) for value in values) else 'd')
+	if typecode not in _PACKED_TYPECODES:
+		raise ValueError(f"typecode must be one of {''.join(sorted(_PACKED_TYPECODES))!r}, not {typecode!r}")
+	packed = array(typecode, values)
+	if byteorder == 'big':
+		packed.byteswap()
+	return _PACKED_MARKER + typecode.encode('ascii') + bytes((packed.itemsize,)) + packed.tobytes()
+
+
+def _unpack_numeric_array(header: bytes, data: bytes) -> array:
+	""" Unpacks the elements of a packed array (get_packed_range reply) """
+	packed = array(chr(header[2]))
+	packed.frombytes(data)
+	if byteorder == 'big':
+		packed.byteswap()
+	return packed
@@ -0,0 +1,235 @@
+""" Distributed lock (PyRedis.r_lock / AsyncPyRedis.r_lock) """
+from asyncio import sleep as async_sleep, create_task, Task
+from threading import Event, Thread
+from time import monotonic, sleep
+from typing import Callable
+from uuid import uuid4
+
+_LOCK_KEY_PREFIX: str = 'pyluaredis:lock'
+
+
+def _lock_counters(metrics: dict, name: str) -> dict:
+    """ Counters of the lock name in the metrics of the client (created on the first use) """
+    if (counters := metrics.get(name)) is None:
+        counters = metrics[name] = {
+            'acquisitions': 0, 'timeouts': 0, 'wait_time': 0.0, 'max_wait_time': 0.0, 'renewals': 0, 'lost': 0
+        }
+    return counters
+
+
+def _count_acquisition(counters: dict, wait_time: float):
+    counters['acquisitions'] += 1
+    counters['wait_time'] += wait_time
+    counters['max_wait_time'] = max(counters['max_wait_time'], wait_time)
+
+
+class PyRedisLock:  # pylint: disable=too-many-instance-attributes
+    """
+    Lock stored in the key 'pyluaredis:lock:<name>' with a random token as its value (SET NX PX).
+    Only the owner of the token can release or extend the lock (release_lease and extend_lock scripts),
+    the lock of a crashed process expires after ttl_ms.
+
+        with r.r_lock('orders', ttl_ms=10_000, blocking_timeout_ms=5_000):
+            ...  # TimeoutError if the lock was not acquired in 5 seconds
+    """
+    __slots__ = (
+        'redis', 'run_script', 'name', 'key', 'ttl_ms', 'blocking_timeout_ms', 'poll_interval_ms', 'auto_renewal',
+        'counters', 'token', 'stop_renewal', 'renewal_thread'
+    )
+
+    def __init__(
+            self,
+            redis,
+            run_script: Callable,
+            name: str,
+            ttl_ms: int,
+            blocking_timeout_ms: int | None = None,
+            poll_interval_ms: int = 50,
+            auto_renewal: bool = False,
+            metrics: dict | None = None
+    ):
+        """
+        :param redis: redis-py client (decoding replies)
+        :param run_script: function of the client that runs the library script by its name
+        :param name: name of the lock
+        :param ttl_ms: lifetime of the lock
+        :param blocking_timeout_ms: maximum time to wait for the lock (None - wait without a limit, 0 - do not wait)
+        :param poll_interval_ms: interval between the attempts to take the lock
+        :param auto_renewal: extend the lock every ttl_ms / 3 in a background thread while it is held
+        :param metrics: contention counters of the client {name: counters}
+        """
+        if not name or ttl_ms <= 0:
+            raise ValueError(f'invalid lock: name={name!r}, ttl_ms={ttl_ms!r}')
+        self.redis = redis
+        self.run_script = run_script
+        self.name: str = name
+        self.key: str = f'{_LOCK_KEY_PREFIX}:{name}'
+        self.ttl_ms: int = ttl_ms
+        self.blocking_timeout_ms: int | None = blocking_timeout_ms
+        self.poll_interval_ms: int = poll_interval_ms
+        self.auto_renewal: bool = auto_renewal
+        self.counters: dict = _lock_counters(metrics if metrics is not None else {}, name)
+        self.token: str | None = None
+        self.stop_renewal: Event | None = None
+        self.renewal_thread: Thread | None = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f'lock {self.name!r} was not acquired in {self.blocking_timeout_ms} ms')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def acquire(self, blocking_timeout_ms: int | None = -1) -> bool:
+        """
+        :param blocking_timeout_ms: maximum time to wait for the lock (by default - of the lock)
+        :return: True if the lock is taken
+        """
+        if blocking_timeout_ms == -1:
+            blocking_timeout_ms = self.blocking_timeout_ms
+        token: str = uuid4().hex
+        start_time: float = monotonic()
+        deadline: float | None = start_time + blocking_timeout_ms / 1000 if blocking_timeout_ms is not None else None
+        while not self.redis.set(self.key, token, nx=True, px=self.ttl_ms):
+            if deadline is not None and monotonic() + self.poll_interval_ms / 1000 > deadline:
+                self.counters['timeouts'] += 1
+                return False
+            sleep(self.poll_interval_ms / 1000)
+
+        _count_acquisition(self.counters, monotonic() - start_time)
+        self.token = token
+        if self.auto_renewal:
+            self.stop_renewal = Event()
+            self.renewal_thread = Thread(
+                target=self.__renew, args=(token, self.stop_renewal), name='pyluaredis-lock', daemon=True
+            )
+            self.renewal_thread.start()
+        return True
+
+    def release(self) -> bool:
+        """ :return: True if the lock was held by this object until the release (it had not expired) """
+        if self.token is None:
+            return False
+        if self.stop_renewal is not None:
+            self.stop_renewal.set()
+            self.stop_renewal = self.renewal_thread = None
+        token, self.token = self.token, None
+        return bool(self.run_script('release_lease', 1, self.key, token))
+
+    def extend(self, ttl_ms: int | None = None) -> bool:
+        """
+        Sets a new lifetime of the held lock
+        :param ttl_ms: new lifetime (by default ttl_ms of the lock)
+        :return: False if the lock is not held (it expired and could be taken by another process)
+        """
+        if self.token is None:
+            return False
+        return bool(self.run_script('extend_lock', 1, self.key, self.token, ttl_ms or self.ttl_ms))
+
+    def locked(self) -> bool:
+        """ Whether the lock is held by anyone """
+        return bool(self.redis.exists(self.key))
+
+    def __renew(self, token: str, stop: Event):
+        """ Extends the lock until it is released, stops if the lock is lost """
+        while not stop.wait(self.ttl_ms / 3000):
+            if not self.run_script('extend_lock', 1, self.key, token, self.ttl_ms):
+                self.counters['lost'] += 1
+                return
+            self.counters['renewals'] += 1
+
+
+class AsyncPyRedisLock:  # pylint: disable=too-many-instance-attributes
+    """
+    The asyncio version of PyRedisLock (the renewal is an asyncio task):
+
+        async with r.r_lock('orders', ttl_ms=10_000, blocking_timeout_ms=5_000):
+            ...
+    """
+    __slots__ = (
+        'redis', 'run_script', 'name', 'key', 'ttl_ms', 'blocking_timeout_ms', 'poll_interval_ms', 'auto_renewal',
+        'counters', 'token', 'renewal_task'
+    )
+
+    def __init__(
+            self,
+            redis,
+            run_script: Callable,
+            name: str,
+            ttl_ms: int,
+            blocking_timeout_ms: int | None = None,
+            poll_interval_ms: int = 50,
+            auto_renewal: bool = False,
+            metrics: dict | None = None
+    ):
+        """ See PyRedisLock, run_script is a coroutine function """
+        if not name or ttl_ms <= 0:
+            raise ValueError(f'invalid lock: name={name!r}, ttl_ms={ttl_ms!r}')
+        self.redis = redis
+        self.run_script = run_script
+        self.name: str = name
+        self.key: str = f'{_LOCK_KEY_PREFIX}:{name}'
+        self.ttl_ms: int = ttl_ms
+        self.blocking_timeout_ms: int | None = blocking_timeout_ms
+        self.poll_interval_ms: int = poll_interval_ms
+        self.auto_renewal: bool = auto_renewal
+        self.counters: dict = _lock_counters(metrics if metrics is not None else {}, name)
+        self.token: str | None = None
+        self.renewal_task: Task | None = None
+
+    async def __aenter__(self):
+        if not await self.acquire():
+            raise TimeoutError(f'lock {self.name!r} was not acquired in {self.blocking_timeout_ms} ms')
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.release()
+
+    async def acquire(self, blocking_timeout_ms: int | None = -1) -> bool:
+        """ See PyRedisLock.acquire """
+        if blocking_timeout_ms == -1:
+            blocking_timeout_ms = self.blocking_timeout_ms
+        token: str = uuid4().hex
+        start_time: float = monotonic()
+        deadline: float | None = start_time + blocking_timeout_ms / 1000 if blocking_timeout_ms is not None else None
+        while not await self.redis.set(self.key, token, nx=True, px=self.ttl_ms):
+            if deadline is not None and monotonic() + self.poll_interval_ms / 1000 > deadline:
+                self.counters['timeouts'] += 1
+                return False
+            await async_sleep(self.poll_interval_ms / 1000)
+
+        _count_acquisition(self.counters, monotonic() - start_time)
+        self.token = token
+        if self.auto_renewal:
+            self.renewal_task = create_task(self.__renew(token))
+        return True
+
+    async def release(self) -> bool:
+        """ See PyRedisLock.release """
+        if self.token is None:
+            return False
+        if self.renewal_task is not None:
+            self.renewal_task.cancel()
+            self.renewal_task = None
+        token, self.token = self.token, None
+        return bool(await self.run_script('release_lease', 1, self.key, token))
+
+    async def extend(self, ttl_ms: int | None = None) -> bool:
+        """ See PyRedisLock.extend """
+        if self.token is None:
+            return False
+        return bool(await self.run_script('extend_lock', 1, self.key, self.token, ttl_ms or self.ttl_ms))
+
+    async def locked(self) -> bool:
+        """ Whether the lock is held by anyone """
+        return bool(await self.redis.exists(self.key))
+
+    async def __renew(self, token: str):
+        """ Extends the lock until the task is cancelled by the release, stops if the lock is lost """
+        while True:
+            await async_sleep(self.ttl_ms / 3000)
+            if not await self.run_script('extend_lock', 1, self.key, token, self.ttl_ms):
+                self.counters['lost'] += 1
+                return
+            self.counters['renewals'] += 1
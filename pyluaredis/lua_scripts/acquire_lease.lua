@@ -0,0 +1,18 @@
+-- Lease of the computation of a missing value (r_get_or_set):
+-- 'exists' - the value is already written, 'lease' - the caller computes the value, 'wait' - another caller computes it
+local key = KEYS[1]
+local lease_key = KEYS[2]
+local token = ARGV[1]
+local lease_ms = tonumber(ARGV[2])
+local refresh = ARGV[3] == '1' -- the stale value is recomputed, the lease is taken regardless of the key
+
+if not refresh and redis.call("EXISTS", key) == 1 then
+  return "exists"
+end
+
+-- the lease expires by itself if its owner crashed
+if redis.call("SET", lease_key, token, "NX", "PX", lease_ms) then
+  return "lease"
+end
+
+return "wait"
@@ -40,18 +40,27 @@ else -- key exists
         redis.call('RPUSH', key, value)
       else
         -- Insert element by index -----------------------------
-        local temp = {}
-        -- Remove elements from the tail until we reach the desired position
-        for _ = length - 1, index, -1 do
-            temp[#temp + 1] = redis.call('RPOP', key)
-        end
-
-        -- Insert the new element
-        redis.call('RPUSH', key, value)
-
-        -- Put back the removed elements in reverse order
-        for i = #temp, 1, -1 do
-            redis.call('RPUSH', key, temp[i])
+        -- only the elements between the index and the nearer end of the list are moved
+        local chunk_size = 7000 -- the unpack function in Lua is limited (~8000 elements)
+        if index < length - index then
+          local head = redis.call('LRANGE', key, 0, index - 1)
+          redis.call('LTRIM', key, index, -1)
+          redis.call('LPUSH', key, value)
+          -- LPUSH adds the elements one by one to the head, so they are pushed in reverse order
+          local reversed_head = {}
+          for i = #head, 1, -1 do
+            reversed_head[#reversed_head + 1] = head[i]
+          end
+          for i = 1, #reversed_head, chunk_size do
+            redis.call('LPUSH', key, unpack(reversed_head, i, math.min(i + chunk_size - 1, #reversed_head)))
+          end
+        else
+          local tail = redis.call('LRANGE', key, index, -1)
+          redis.call('LTRIM', key, 0, index - 1)
+          redis.call('RPUSH', key, value)
+          for i = 1, #tail, chunk_size do
+            redis.call('RPUSH', key, unpack(tail, i, math.min(i + chunk_size - 1, #tail)))
+          end
         end
         --------------------------------------------------------
       end
@@ -0,0 +1,87 @@
+-- Insert several values into a list (by indexes) or a set in one pass
+local key = KEYS[1]
+local type_if_not_exists = ARGV[1] -- 'null', 'list' or 'set'
+local get_old_value = tonumber(ARGV[2]) == 1
+local start_argument = 3 -- pairs: index, value (sorted by index, -1 - to the end of the list)
+local chunk_size = 7000 -- the unpack function in Lua is limited (~8000 elements)
+
+local value_type = redis.call("TYPE", key).ok
+
+if value_type == 'none' then
+  if type_if_not_exists == 'null' then
+    return {nil, nil}
+  end
+  value_type = type_if_not_exists
+elseif value_type ~= 'list' and value_type ~= 'set' then
+  return {nil, value_type}
+end
+
+local old_value
+if get_old_value then
+  if value_type == 'list' then
+    old_value = redis.call("LRANGE", key, 0, -1)
+  else
+    old_value = redis.call("SMEMBERS", key)
+  end
+end
+
+local function push(command, values)
+  for i = 1, #values, chunk_size do
+    redis.call(command, key, unpack(values, i, math.min(i + chunk_size - 1, #values)))
+  end
+end
+
+if value_type == 'set' then
+  local values = {}
+  for i = start_argument + 1, #ARGV, 2 do
+    values[#values + 1] = ARGV[i]
+  end
+  push("SADD", values)
+  return {old_value, value_type}
+end
+
+-- The list is rebuilt starting from the smallest index: the elements before it are not moved
+local length = redis.call("LLEN", key)
+local first = length
+for i = start_argument, #ARGV, 2 do
+  local index = tonumber(ARGV[i])
+  if index >= 0 and index < first then
+    first = index
+  end
+end
+
+local tail = {}
+local ttl = 0
+if first < length then
+  tail = redis.call("LRANGE", key, first, -1)
+  if first == 0 then -- the list cannot be trimmed to empty, the key is recreated with the same ttl
+    ttl = redis.call("PTTL", key)
+    redis.call("DEL", key)
+  else
+    redis.call("LTRIM", key, 0, first - 1)
+  end
+end
+
+-- indexes are positions in the resulting list (as if the values were inserted one by one in ascending order)
+local result = {}
+local position = first
+local t = 1
+local j = start_argument
+while j <= #ARGV or t <= #tail do
+  local index = j <= #ARGV and tonumber(ARGV[j]) or nil
+  if index ~= nil and ((index >= 0 and index <= position) or t > #tail) then
+    result[#result + 1] = ARGV[j + 1]
+    j = j + 2
+  else
+    result[#result + 1] = tail[t]
+    t = t + 1
+  end
+  position = position + 1
+end
+
+push("RPUSH", result)
+if ttl > 0 then
+  redis.call("PEXPIRE", key, ttl)
+end
+
+return {old_value, value_type}
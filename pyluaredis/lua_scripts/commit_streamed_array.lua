@@ -0,0 +1,32 @@
+-- Replaces the value of the key with the array written in chunks to the temporary key (r_set_iter)
+local temporary_key = KEYS[1]
+local key = KEYS[2]
+local time_ms = tonumber(ARGV[1])
+local if_exist = tonumber(ARGV[2]) == 1
+local if_not_exist = tonumber(ARGV[3]) == 1
+local keep_ttl = tonumber(ARGV[4]) == 1
+
+if redis.call("EXISTS", temporary_key) == 0 then
+  return 0
+end
+
+local key_exist = redis.call("EXISTS", key) == 1
+
+if (not key_exist and if_exist) or (key_exist and if_not_exist) then
+  redis.call("DEL", temporary_key)
+  return 0
+end
+
+if key_exist and keep_ttl then
+  time_ms = redis.call("PTTL", key)
+end
+
+redis.call("RENAME", temporary_key, key) -- the old value is deleted by RENAME
+redis.call("PERSIST", key) -- the temporary key has a ttl in case the client does not finish the writing
+
+-- if the key lifetime is defined
+if time_ms > 0 then
+  redis.call("PEXPIRE", key, time_ms)
+end
+
+return 1
@@ -13,6 +13,8 @@ if returning then
     value = redis.call("LRANGE", key, 0, -1) -- special attention is required for the range
   elseif value_type.ok == 'set' then
     value = redis.call("SMEMBERS", key)
+  elseif value_type.ok == 'hash' then
+    value = redis.call("HGETALL", key)
   end
 end
 
@@ -0,0 +1,10 @@
+-- Sets a new ttl of the lock only if it still belongs to the caller (r_lock)
+local lock_key = KEYS[1]
+local token = ARGV[1]
+local ttl_ms = tonumber(ARGV[2])
+
+if redis.call("GET", lock_key) == token then
+  return redis.call("PEXPIRE", lock_key, ttl_ms)
+end
+
+return 0
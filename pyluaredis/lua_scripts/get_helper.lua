@@ -1,5 +1,6 @@
 -- function to get values by key
 local key = KEYS[1]
+local with_ttl = ARGV[1] == '1' -- also return the ttl of the key in milliseconds (for the client-side cache)
 local key_exist = redis.call("EXISTS", key) == 1
 
 if not key_exist then
@@ -11,10 +12,20 @@ local value_type = redis.call("TYPE", key) -- determine what type the value stor
 
 if value_type.ok == 'string' then -- if value: bool/int/float/str
   value = redis.call("GET", key)
+  if string.sub(value, 1, 2) == '\30A' then -- packed numeric array, it is read by get_packed_range
+    value = false
+    value_type = {ok = 'packed'}
+  end
 elseif value_type.ok == 'list' then -- to get lists we use another function
   value = redis.call("LRANGE", key, 0, -1) -- special attention is required for the range
 elseif value_type.ok == 'set' then
   value = redis.call("SMEMBERS", key)
+elseif value_type.ok == 'hash' then -- field, value, field, value...
+  value = redis.call("HGETALL", key)
+end
+
+if with_ttl then
+  return {value, value_type.ok, redis.call("PTTL", key)}
 end
 
 return {value, value_type.ok}
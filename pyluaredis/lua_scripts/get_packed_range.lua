@@ -0,0 +1,28 @@
+-- function to get a range of elements of a packed numeric array
+-- value: '\30A' + typecode + item size (1 byte) + elements
+local key = KEYS[1]
+local header = redis.call("GETRANGE", key, 0, 3)
+
+if #header < 4 or string.sub(header, 1, 2) ~= '\30A' then
+  return nil -- there is no such key or the value is not a packed array
+end
+
+local item_size = string.byte(header, 4)
+local length = (redis.call("STRLEN", key) - 4) / item_size
+local start = tonumber(ARGV[1])
+local stop = tonumber(ARGV[2]) or length -- an empty string - to the end of the array
+
+-- negative indexes are counted from the end of the array (as in Python slices)
+if start < 0 then
+  start = math.max(length + start, 0)
+end
+if stop < 0 then
+  stop = length + stop
+end
+stop = math.min(stop, length)
+
+if stop <= start then
+  return {header, ''}
+end
+
+return {header, redis.call("GETRANGE", key, 4 + start * item_size, 4 + stop * item_size - 1)}
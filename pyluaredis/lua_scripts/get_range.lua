@@ -0,0 +1,35 @@
+-- function to get a range of elements of a list (for sets - the same number of random elements)
+local key = KEYS[1]
+local value_type = redis.call("TYPE", key).ok
+
+local length
+if value_type == 'list' then
+  length = redis.call("LLEN", key)
+elseif value_type == 'set' then
+  length = redis.call("SCARD", key)
+elseif value_type == 'string' and redis.call("GETRANGE", key, 0, 1) == '\30A' then
+  return {false, 'packed'} -- packed numeric array, it is read by get_packed_range
+else
+  return {nil, value_type ~= 'none' and value_type or nil}
+end
+
+local start = tonumber(ARGV[1]) or 0
+local stop = tonumber(ARGV[2]) or length -- an empty string - to the end of the array
+
+-- negative indexes are counted from the end of the array (as in Python slices)
+if start < 0 then
+  start = math.max(length + start, 0)
+end
+if stop < 0 then
+  stop = length + stop
+end
+stop = math.min(stop, length)
+
+if stop <= start then
+  return {{}, value_type}
+end
+
+if value_type == 'list' then
+  return {redis.call("LRANGE", key, start, stop - 1), value_type}
+end
+return {redis.call("SRANDMEMBER", key, stop - start), value_type} -- distinct elements
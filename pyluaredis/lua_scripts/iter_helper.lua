@@ -0,0 +1,18 @@
+-- function to read lists, sets and hashes in chunks (r_iter)
+local key = KEYS[1]
+local cursor = tonumber(ARGV[1]) -- list: index of the first element of the chunk, set: SSCAN cursor
+local count = tonumber(ARGV[2])
+
+local value_type = redis.call("TYPE", key).ok
+
+if value_type == 'none' then
+  return nil
+elseif value_type == 'list' then
+  local chunk = redis.call("LRANGE", key, cursor, cursor + count - 1)
+  return {value_type, #chunk < count and 0 or cursor + count, chunk}
+elseif value_type == 'set' or value_type == 'hash' then
+  local res = redis.call(value_type == 'set' and "SSCAN" or "HSCAN", key, cursor, "COUNT", count)
+  return {value_type, tonumber(res[1]), res[2]} -- hash: field, value, field, value...
+end
+
+return {value_type, 0, {}} -- the value is not an array, it is read by get_helper
@@ -10,6 +10,8 @@ if value_type.ok == 'list' then
   return redis.call("LLEN", key)
 elseif value_type.ok == 'set' then
   return redis.call("SCARD", key)
+elseif value_type.ok == 'hash' then
+  return redis.call("HLEN", key)
 else
   return 0
 end
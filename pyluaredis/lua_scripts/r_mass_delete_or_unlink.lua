@@ -1,30 +1,38 @@
-local keys = KEYS
-local delete_or_unlink = ARGV[1]
+-- Deletes the keys and returns the existing ones as a flat reply: index of the key, type, value, index, type, value...
+local delete_or_unlink = ARGV[1] == 'delete' and "DEL" or "UNLINK"
+local with_values = tonumber(ARGV[2]) == 1 -- otherwise only the indexes and types are returned
+local packed_values = tonumber(ARGV[3]) == 1 -- return packed numeric arrays (binary strings)
 
-local result = {} -- to store existing keys in {key:value} format
+local result = {}
 
-for _, key in ipairs(keys) do
-    local value
-    local value_type = redis.call("TYPE", key) -- determine what type the value stored in this key is
+for i, key in ipairs(KEYS) do
+  local value_type = redis.call("TYPE", key).ok -- determine what type the value stored in this key is
 
-    if value_type.ok == 'string' then -- if value: bool/int/float/str
-      value = redis.call("GET", key)
-    elseif value_type.ok == 'list' then -- to get lists we use another function
-      value = redis.call("LRANGE", key, 0, -1) -- special attention is required for the range
-    elseif value_type.ok == 'set' then
-      value = redis.call("SMEMBERS", key)
-    end
-
-    if value then
-        result[key] = value
+  if value_type ~= 'none' then
+    local value = false
 
-        if delete_or_unlink == 'delete' then
-          redis.call("DEL", key)
-        else
-          redis.call("UNLINK", key)
+    if with_values then
+      if value_type == 'string' then -- if value: bool/int/float/str
+        value = redis.call("GET", key)
+        if string.sub(value, 1, 2) == '\30A' then -- packed numeric array
+          value_type = 'packed'
+          value = packed_values and value
         end
-
+      elseif value_type == 'list' then
+        value = redis.call("LRANGE", key, 0, -1)
+      elseif value_type == 'set' then
+        value = redis.call("SMEMBERS", key)
+      elseif value_type == 'hash' then -- field, value, field, value...
+        value = redis.call("HGETALL", key)
+      end
     end
+
+    redis.call(delete_or_unlink, key)
+
+    result[#result + 1] = i
+    result[#result + 1] = value_type
+    result[#result + 1] = value
+  end
 end
 
-return cjson.encode(result)
\ No newline at end of file
+return result
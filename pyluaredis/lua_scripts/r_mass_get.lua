@@ -0,0 +1,27 @@
+-- function to get the values of several keys of any type in one call (r_mass_get)
+-- reply: type, value, type, value... in the order of the keys ('none' - there is no such key)
+local res = {}
+
+for _, key in ipairs(KEYS) do
+  local value_type = redis.call("TYPE", key).ok
+  local value = false
+
+  if value_type == 'string' then
+    value = redis.call("GET", key)
+    if string.sub(value, 1, 2) == '\30A' then -- packed numeric array, it is read by get_packed_range
+      value = false
+      value_type = 'packed'
+    end
+  elseif value_type == 'list' then
+    value = redis.call("LRANGE", key, 0, -1)
+  elseif value_type == 'set' then
+    value = redis.call("SMEMBERS", key)
+  elseif value_type == 'hash' then -- field, value, field, value...
+    value = redis.call("HGETALL", key)
+  end
+
+  res[#res + 1] = value_type
+  res[#res + 1] = value
+end
+
+return res
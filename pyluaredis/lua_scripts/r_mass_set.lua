@@ -0,0 +1,44 @@
+-- Writes several keys (strings, lists, sets, hashes) in one call (r_mass_set)
+local if_exist = tonumber(ARGV[1]) == 1
+local if_not_exist = tonumber(ARGV[2]) == 1
+local keep_ttl = tonumber(ARGV[3]) == 1
+local commands = {rpush = "RPUSH", sadd = "SADD", hset = "HSET"}
+local chunk_size = 7000 -- the unpack function in Lua is limited (~8000 elements), even: the pairs of a hash are not split
+
+-- for each key: operation ('set', 'rpush', 'sadd', 'hset'), ttl in ms (0 - without ttl), number of values, values
+local argument = 4
+local written = {} -- indexes of the written keys
+
+for i, key in ipairs(KEYS) do
+  local operation = ARGV[argument]
+  local time_ms = tonumber(ARGV[argument + 1])
+  local first = argument + 3
+  local last = first + tonumber(ARGV[argument + 2]) - 1
+  argument = last + 1
+
+  local key_exist = redis.call("EXISTS", key) == 1
+
+  if not ((not key_exist and if_exist) or (key_exist and if_not_exist)) then
+    if key_exist then
+      if keep_ttl then
+        time_ms = redis.call("PTTL", key)
+      end
+      redis.call("DEL", key) -- before writing, we must clear the current value by key
+    end
+
+    if operation == 'set' then
+      redis.call("SET", key, ARGV[first])
+    else
+      for j = first, last, chunk_size do
+        redis.call(commands[operation], key, unpack(ARGV, j, math.min(j + chunk_size - 1, last)))
+      end
+    end
+
+    if time_ms > 0 then
+      redis.call("PEXPIRE", key, time_ms)
+    end
+    written[#written + 1] = i
+  end
+end
+
+return written
@@ -0,0 +1,80 @@
+-- Rate limiter (r_rate_limit, r_rate_limit_many): token bucket or sliding window (log of the requests) for each key.
+-- The request is allowed only if all keys allow it, then its cost is taken from all of them.
+-- Reply for each key: allowed (1/0), remaining, retry_after_ms (-1 - the cost is greater than the limit)
+local algorithm = ARGV[1]
+local cost = tonumber(ARGV[2])
+local token = ARGV[3] -- unique members of the sliding window
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local states = {}
+local all_allowed = true
+
+-- checking all keys without taking the cost
+for i, key in ipairs(KEYS) do
+  local limit = tonumber(ARGV[2 + 2 * i])
+  local window = tonumber(ARGV[3 + 2 * i])
+  local state = {limit = limit, window = window, retry_after = 0}
+
+  if algorithm == "token_bucket" then
+    local rate = limit / window -- tokens per millisecond
+    local bucket = redis.call("HMGET", key, "tokens", "ts")
+    local tokens = tonumber(bucket[1]) or limit
+    local ts = tonumber(bucket[2]) or now
+    state.tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+    state.allowed = state.tokens >= cost
+    if cost > limit then
+      state.retry_after = -1
+    elseif not state.allowed then
+      state.retry_after = math.ceil((cost - state.tokens) / rate)
+    end
+  else
+    redis.call("ZREMRANGEBYSCORE", key, "-inf", now - window)
+    state.count = redis.call("ZCARD", key)
+    state.allowed = state.count + cost <= limit
+    if cost > limit then
+      state.retry_after = -1
+    elseif not state.allowed then
+      -- the request is allowed when enough of the oldest requests leave the window
+      local index = state.count + cost - limit - 1
+      local oldest = redis.call("ZRANGE", key, index, index, "WITHSCORES")
+      state.retry_after = math.max(1, tonumber(oldest[2]) + window - now)
+    end
+  end
+
+  all_allowed = all_allowed and state.allowed
+  states[i] = state
+end
+
+local reply = {}
+
+for i, key in ipairs(KEYS) do
+  local state = states[i]
+  local remaining
+
+  if algorithm == "token_bucket" then
+    local tokens = state.tokens
+    if all_allowed then
+      tokens = tokens - cost
+    end
+    redis.call("HSET", key, "tokens", tokens, "ts", now)
+    -- the key is deleted when the bucket is full again
+    redis.call("PEXPIRE", key, math.ceil((state.limit - tokens) * state.window / state.limit) + 1)
+    remaining = math.floor(tokens)
+  else
+    if all_allowed then
+      for j = 1, cost do
+        redis.call("ZADD", key, now, token .. ":" .. j)
+      end
+      redis.call("PEXPIRE", key, state.window)
+      state.count = state.count + cost
+    end
+    remaining = math.max(0, state.limit - state.count)
+  end
+
+  reply[3 * i - 2] = state.allowed and 1 or 0
+  reply[3 * i - 1] = remaining
+  reply[3 * i] = state.retry_after
+end
+
+return reply
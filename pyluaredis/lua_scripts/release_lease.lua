@@ -0,0 +1,9 @@
+-- Deletes the lease (or lock) only if it still belongs to the caller (it may have expired and been taken by another)
+local lease_key = KEYS[1]
+local token = ARGV[1]
+
+if redis.call("GET", lease_key) == token then
+  return redis.call("DEL", lease_key)
+end
+
+return 0
@@ -1,4 +1,4 @@
--- Set function for writing arrays (RPUSH/SADD)
+-- Set function for writing arrays and hashes (RPUSH/SADD/HSET)
 local key = KEYS[1]
 local get_old_value = tonumber(ARGV[1]) == 1
 local time_ms = tonumber(ARGV[2])
@@ -40,33 +40,26 @@ end
 -- The unpack function in Lua is very limited (8000 elements)
 -- -> split into chunks if the number of elements to be written exceeds 5000
 local values
-local set_operation = ARGV[6]
+local set_operation = ARGV[6] -- 'rpush', 'sadd' or 'hset' (field, value, field, value...)
+local command = ({rpush = "RPUSH", sadd = "SADD", hset = "HSET"})[set_operation]
 local without_chunks = tonumber(ARGV[7]) == 1
 local start_argument = 8
 
 if without_chunks then
 
   values = {unpack(ARGV, start_argument, #ARGV)}
-  if set_operation == 'rpush' then
-    redis.call("RPUSH", key, unpack(values))
-  else
-    redis.call("SADD", key, unpack(values))
-  end
+  redis.call(command, key, unpack(values))
 
 else
 
-  local chunk_size = 7850
+  local chunk_size = 7850 -- even: the pairs of a hash are not split
   local current_chunk = {}
 
   -- Function to write the current chunk to Redis
   local function write_chunk()
     if #current_chunk > 0 then
-      if set_operation == 'rpush' then
-        redis.call("RPUSH", key, unpack(current_chunk))
-      else
-        redis.call("SADD", key, unpack(current_chunk))
-      end
-        current_chunk = {} -- clear the current chunk
+      redis.call(command, key, unpack(current_chunk))
+      current_chunk = {} -- clear the current chunk
     end
   end
 
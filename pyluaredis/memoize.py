@@ -0,0 +1,123 @@
+""" Caching of function results in Redis (PyRedis.cached / AsyncPyRedis.cached) """
+from functools import wraps
+from hashlib import blake2b
+from time import perf_counter
+from typing import Callable
+
+_CACHED_KEY_PREFIX: str = 'pyluaredis:cached'
+# characters of the SCAN MATCH patterns that must be escaped in the namespace of a function
+_GLOB_ESCAPE = str.maketrans({char: f'\\{char}' for char in '\\*?[]'})
+
+
+class FunctionCache:
+    """
+    Keys and statistics of one decorated function.
+    Key: '<namespace>:<key>', the namespace by default is 'pyluaredis:cached:<module>.<qualname>',
+    the key is key_fn(*args, **kwargs) or a hash of the arguments.
+    """
+    __slots__ = ('namespace', 'key_fn', 'counters')
+
+    def __init__(self, func: Callable, key_fn: Callable[..., str] | None = None, namespace: str | None = None):
+        """
+        :param func: decorated function
+        :param key_fn: function of the arguments of the decorated function that returns the key (without namespace)
+        :param namespace: prefix of the keys of the function
+        """
+        self.namespace: str = namespace or f'{_CACHED_KEY_PREFIX}:{func.__module__}.{func.__qualname__}'
+        self.key_fn: Callable[..., str] | None = key_fn
+        self.counters: dict = {'hits': 0, 'misses': 0, 'compute_time': 0.0}
+
+    def key(self, args: tuple, kwargs: dict) -> str:
+        """
+        The same arguments give the same key in any process: the arguments are serialized
+        in a canonical form (dict items and set elements are sorted) and hashed
+        """
+        if self.key_fn is not None:
+            return f'{self.namespace}:{self.key_fn(*args, **kwargs)}'
+        arguments: str = _canonical((args, dict(sorted(kwargs.items()))))
+        return f"{self.namespace}:{blake2b(arguments.encode('utf-8'), digest_size=16).hexdigest()}"
+
+    def pattern(self) -> str:
+        """ SCAN MATCH pattern of all keys of the function """
+        return f'{self.namespace.translate(_GLOB_ESCAPE)}:*'
+
+    def info(self) -> dict:
+        """ Counters of the function (compute_time - total time of the calls of the function on misses) """
+        calls: int = self.counters['hits'] + self.counters['misses']
+        return {**self.counters, 'hit_ratio': self.counters['hits'] / calls if calls else None}
+
+
+def _canonical(value) -> str:
+    """
+    String representation of the value that does not depend on the order of dict items and set elements
+    :raises TypeError: the object has the default repr (with its memory address), which differs in each process
+    """
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}({','.join(map(_canonical, value))})"
+    if isinstance(value, (set, frozenset)):
+        return f"{type(value).__name__}({','.join(sorted(map(_canonical, value)))})"
+    if isinstance(value, dict):
+        return f"dict({','.join(sorted(f'{_canonical(k)}:{_canonical(v)}' for k, v in value.items()))})"
+    if type(value).__repr__ is object.__repr__:
+        raise TypeError(
+            f'{type(value).__qualname__} object has no stable repr() to build the cache key, pass key_fn to cached()'
+        )
+    return f'{type(value).__qualname__}:{value!r}'
+
+
+def _cached_function(
+        client, func: Callable, ttl_ms: int | None, key_fn: Callable[..., str] | None,
+        convert_to_type: str | None, namespace: str | None
+) -> Callable:
+    """ Wrapper of a function for PyRedis.cached """
+    cache = FunctionCache(func, key_fn, namespace)
+    counters: dict = cache.counters
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key: str = cache.key(args, kwargs)
+        if (value := client.r_get(key, convert_to_type=convert_to_type)) is not None:
+            counters['hits'] += 1
+            return value
+        counters['misses'] += 1
+        start_time: float = perf_counter()
+        value = func(*args, **kwargs)
+        counters['compute_time'] += perf_counter() - start_time
+        if value is not None:
+            client.r_set(key, value, time_ms=ttl_ms)
+        return value
+
+    wrapper.cache_key = lambda *args, **kwargs: cache.key(args, kwargs)
+    wrapper.cache_invalidate = lambda *args, **kwargs: client.r_unlink(cache.key(args, kwargs))
+    wrapper.cache_clear = lambda: client.r_delete_pattern(cache.pattern())
+    wrapper.cache_info = cache.info
+    return wrapper
+
+
+def _cached_coroutine_function(
+        client, func: Callable, ttl_ms: int | None, key_fn: Callable[..., str] | None,
+        convert_to_type: str | None, namespace: str | None
+) -> Callable:
+    """ Wrapper of a coroutine function for AsyncPyRedis.cached """
+    cache = FunctionCache(func, key_fn, namespace)
+    counters: dict = cache.counters
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        key: str = cache.key(args, kwargs)
+        if (value := await client.r_get(key, convert_to_type=convert_to_type)) is not None:
+            counters['hits'] += 1
+            return value
+        counters['misses'] += 1
+        start_time: float = perf_counter()
+        value = await func(*args, **kwargs)
+        counters['compute_time'] += perf_counter() - start_time
+        if value is not None:
+            await client.r_set(key, value, time_ms=ttl_ms)
+        return value
+
+    wrapper.cache_key = lambda *args, **kwargs: cache.key(args, kwargs)
+    wrapper.cache_invalidate = lambda *args, **kwargs: client.r_unlink(cache.key(args, kwargs))
+    wrapper.cache_clear = lambda: client.r_delete_pattern(cache.pattern())
+    wrapper.cache_info = cache.info
+    return wrapper
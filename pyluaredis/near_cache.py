@@ -0,0 +1,165 @@
+""" In-process (near) cache of values with server-assisted invalidation """
+from collections import OrderedDict
+from threading import Lock, Thread, Event
+from time import monotonic
+from redis.connection import AbstractConnection
+from redis.exceptions import ConnectionError as rConnectionError, TimeoutError as rTimeoutError, ResponseError
+
+
+class NearCache:  # pylint: disable=too-many-instance-attributes
+    """
+    LRU cache of the replies of the library scripts ({value, type}) in the memory of the process.
+
+    Invalidation is performed by the server: a dedicated connection enables CLIENT TRACKING in the broadcasting
+    mode (BCAST, optionally only for the given key prefixes) with redirection to itself and listens to the
+    '__redis__:invalidate' channel. If the server does not support tracking (Redis < 6.0), keyspace notifications
+    are used instead (the server must be configured with notify-keyspace-events, e.g. 'KA').
+    While the invalidation connection is broken, the cache is cleared and not used.
+    """
+    __slots__ = (
+        'connection', 'db', 'max_size', 'ttl_ms', 'prefixes', 'values', 'lock', 'generation', 'active',
+        'hits', 'misses', 'invalidations', 'stop_event', 'thread'
+    )
+
+    def __init__(
+            self,
+            connection: AbstractConnection,
+            db: int = 0,
+            max_size: int = 10_000,
+            ttl_ms: int | None = 60_000,
+            prefixes: tuple[str, ...] = ()
+    ):
+        """
+        :param connection: connection for receiving invalidation messages (not taken from the pool)
+        :param db: database number (for the keyspace notifications mode)
+        :param max_size: maximum number of keys in the cache (least recently used keys are evicted)
+        :param ttl_ms: maximum lifetime of a value in the cache (None - until invalidation or the key ttl in Redis)
+        :param prefixes: track only keys with these prefixes (all keys by default)
+        """
+        self.connection = connection
+        self.db: int = db
+        self.max_size: int = max_size
+        self.ttl_ms: int | None = ttl_ms
+        self.prefixes: tuple[str, ...] = tuple(prefixes)
+        self.values: OrderedDict = OrderedDict()  # key -> (reply, expiration time by monotonic clock or None)
+        self.lock = Lock()
+        self.generation: int = 0  # changes on each invalidation, protects against caching a value read before it
+        self.active: bool = False
+        self.hits: int = 0
+        self.misses: int = 0
+        self.invalidations: int = 0
+        self.stop_event = Event()
+        self.thread: Thread | None = None
+
+    def start(self):
+        """ Subscribes to invalidation messages and starts listening in a background thread """
+        self.__subscribe()
+        self.thread = Thread(target=self.__listen, name='pyluaredis-near-cache', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ Stops listening and clears the cache """
+        self.stop_event.set()
+        self.active = False
+        self.clear()
+        self.connection.disconnect()
+
+    def get(self, key: str) -> list | None:
+        """
+        :return: cached reply of the library script or None
+        """
+        if self.active:
+            with self.lock:
+                if (item := self.values.get(key)) is not None:
+                    if item[1] is None or item[1] > monotonic():
+                        self.values.move_to_end(key)
+                        self.hits += 1
+                        value, value_type = item[0]
+                        return [list(value) if isinstance(value, tuple) else value, value_type]
+                    del self.values[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, reply: list | None, pttl: int | None, generation: int):
+        """
+        :param key:
+        :param reply: {value, type} reply of the library script
+        :param pttl: ttl of the key in Redis in milliseconds (-1 or None if the key has no ttl)
+        :param generation: value of self.generation before the request to Redis
+        """
+        if not (self.active and reply) or (self.prefixes and not key.startswith(self.prefixes)):
+            return
+        ttls: list = [ttl for ttl in (self.ttl_ms, pttl) if ttl and ttl > 0]
+        expiration = monotonic() + min(ttls) / 1_000 if ttls else None
+        # lists are stored as tuples, so that the caller cannot change the cached value
+        value = tuple(reply[0]) if isinstance(reply[0], list) else reply[0]
+        with self.lock:
+            if generation != self.generation:
+                return  # the key could have been changed after reading
+            self.values[key] = ((value, reply[1]), expiration)
+            self.values.move_to_end(key)
+            while len(self.values) > self.max_size:
+                self.values.popitem(last=False)
+
+    def invalidate(self, keys: list | tuple | None):
+        """
+        :param keys: keys to remove from the cache, None - clear the cache
+        """
+        with self.lock:
+            self.generation += 1
+            self.invalidations += 1
+            if keys is None:
+                self.values.clear()
+            else:
+                for key in keys:
+                    self.values.pop(key, None)
+
+    def clear(self):
+        """ Clears the cache """
+        self.invalidate(None)
+
+    def info(self) -> dict:
+        """ Cache statistics """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'size': len(self.values),
+            'max_size': self.max_size,
+            'active': self.active
+        }
+
+    def __subscribe(self):
+        self.connection.connect()
+        self.connection.send_command('CLIENT', 'ID')
+        client_id = self.connection.read_response()
+        prefixes: list = [argument for prefix in self.prefixes for argument in ('PREFIX', prefix)]
+        try:
+            self.connection.send_command('CLIENT', 'TRACKING', 'ON', 'REDIRECT', client_id, 'BCAST', *prefixes)
+            self.connection.read_response()
+            self.connection.send_command('SUBSCRIBE', '__redis__:invalidate')
+        except ResponseError:
+            # CLIENT TRACKING is not supported - keyspace notifications
+            self.connection.send_command('PSUBSCRIBE', f'__keyspace@{self.db}__:*')
+        self.connection.read_response()
+        self.clear()
+        self.active = True
+
+    def __listen(self):
+        while not self.stop_event.is_set():
+            try:
+                if not self.active:
+                    self.__subscribe()
+                if self.connection.can_read(timeout=1):
+                    self.__on_message(self.connection.read_response())
+            except (rConnectionError, rTimeoutError, OSError):
+                self.active = False
+                self.clear()
+                self.connection.disconnect()
+                self.stop_event.wait(1)
+
+    def __on_message(self, message: list):
+        if message[0] == 'message':  # ['message', '__redis__:invalidate', [keys] or None (FLUSHDB/FLUSHALL)]
+            self.invalidate(message[2])
+        elif message[0] == 'pmessage':  # ['pmessage', pattern, '__keyspace@<db>__:<key>', event]
+            self.invalidate([message[2].split(':', 1)[1]])
@@ -1,6 +1,8 @@
 import unittest
 from random import randint, choice, random, shuffle
 from string import ascii_letters, digits
+from decimal import Decimal
+from uuid import UUID, uuid4
 from sys import path as sys_path
 
 sys_path.append('../')
@@ -328,5 +330,47 @@ class TypeConverterTest(unittest.TestCase):
         self.assertEqual(value, res)
 
 
+    # compile / register ###################################################################################
+
+    def test_compile_001(self):
+        """ The function is created once for each type name """
+        self.assertIs(TypeConverter.compile('int'), TypeConverter.compile('int'))
+        self.assertIsNot(TypeConverter.compile('int'), TypeConverter.compile('int_any'))
+
+    def test_compile_002(self):
+        value: list[str] = ['1', '2', '3']
+        self.assertEqual(TypeConverter.compile('int')(value), TypeConverterTest.t.converter(value, 'int'))
+
+    def test_compile_003(self):
+        """ Unknown type name """
+        value: list[str] = ['1', '2', '3']
+        self.assertIs(TypeConverter.compile('unknown_type')(value), value)
+
+    def test_register_001(self):
+        TypeConverter.register('decimal', Decimal)
+        try:
+            self.assertEqual(TypeConverterTest.t.converter('1.5', 'decimal'), Decimal('1.5'))
+            self.assertEqual(TypeConverterTest.t.converter(['1.5', '2'], 'decimal'), [Decimal('1.5'), Decimal(2)])
+            self.assertEqual(TypeConverterTest.t.converter(['1.5', 'x'], 'decimal'), ['1.5', 'x'])
+            self.assertEqual(TypeConverterTest.t.converter(['1.5', 'x'], 'decimal_any'), [Decimal('1.5'), 'x'])
+            self.assertEqual(TypeConverterTest.t.converter('x', 'decimal'), 'x')
+        finally:
+            TypeConverter.unregister('decimal')
+        self.assertEqual(TypeConverterTest.t.converter('1.5', 'decimal'), '1.5')
+
+    def test_register_002(self):
+        value: str = str(uuid4())
+        TypeConverter.register('uuid', UUID)
+        try:
+            self.assertEqual(TypeConverterTest.t.converter({value}, 'uuid'), {UUID(value)})
+        finally:
+            TypeConverter.unregister('uuid')
+
+    def test_register_003(self):
+        with self.assertRaises(ValueError):
+            TypeConverter.register('my_type', Decimal)
+        with self.assertRaises(ValueError):
+            TypeConverter.register('decimal', None)
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,8 @@ from redis import Redis, ConnectionPool
 from random import randint, choice, random
 from string import ascii_letters, digits
 from sys import path as sys_path
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
 
 from connection_params import REDIS_PWS, REDIS_HOST, REDIS_PORT, REDIS_USERNAME
 sys_path.append('../')
@@ -277,6 +279,55 @@ class SmokeTests(unittest.TestCase):
 
 		SmokeTests.original_redis.flushdb()
 
+	# r_set_iter #######################################################################################################
+
+	def test_r_set_iter_001(self):
+		key: str = self.test_r_set_iter_001.__name__
+		self.assertTrue(SmokeTests.r.r_set_iter(key, (i for i in range(25_000)), chunk_size=10_000))
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), list(range(25_000)))
+		self.assertEqual(SmokeTests.original_redis.keys(f'*{key}*'), [key.encode('utf-8')])  # the temporary key was renamed
+
+	def test_r_set_iter_002(self):
+		key: str = self.test_r_set_iter_002.__name__
+		SmokeTests.r.r_set(key, 'old')
+		SmokeTests.r.r_set_iter(key, map(str, range(100)), array_type=set, chunk_size=30)
+		self.assertEqual(SmokeTests.r.r_get(key), set(map(str, range(100))))
+
+	def test_r_set_iter_003(self):
+		""" if_exist / if_not_exist / empty values """
+		key: str = self.test_r_set_iter_003.__name__
+		self.assertFalse(SmokeTests.r.r_set_iter(key, [1, 2], if_exist=True))
+		self.assertFalse(SmokeTests.r.r_set_iter(key, iter([])))
+		self.assertIsNone(SmokeTests.r.r_get(key))
+		self.assertTrue(SmokeTests.r.r_set_iter(key, [1, 2], if_not_exist=True))
+		self.assertFalse(SmokeTests.r.r_set_iter(key, [3], if_not_exist=True))
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), [1, 2])
+
+	def test_r_set_iter_004(self):
+		""" ttl """
+		key: str = self.test_r_set_iter_004.__name__
+		SmokeTests.r.r_set_iter(key, [1, 2], time_ms=100_000)
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(key) <= 100_000)
+		SmokeTests.r.r_set_iter(key, [3], keep_ttl=True)
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(key) <= 100_000)
+		SmokeTests.r.r_set_iter(key, [4])
+		self.assertEqual(SmokeTests.r.get_key_ttl(key), 0)
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), [4])
+
+	def test_r_set_iter_005(self):
+		""" An error in the generator does not change the key """
+		key: str = self.test_r_set_iter_005.__name__
+		SmokeTests.r.r_set(key, [0])
+
+		def values():
+			yield from range(10)
+			raise RuntimeError(key)
+
+		with self.assertRaises(RuntimeError):
+			SmokeTests.r.r_set_iter(key, values(), chunk_size=3)
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), [0])
+		self.assertEqual(SmokeTests.original_redis.keys(f'*{key}*'), [key.encode('utf-8')])
+
 	# insert_value_to_array ############################################################################################
 
 	def test_insert_value_to_array_001(self):
@@ -459,6 +510,200 @@ class SmokeTests(unittest.TestCase):
 		res: list[int] = SmokeTests.r.r_get(key)
 		self.assertEqual(res, ['a', 'b', 'c', 'a', 'a', 'a', 'b','c', 'c', 'c', 'a', 'b', 'c'])
 
+	def test_insert_value_to_array_022(self):
+		""" Index in the second half of the list """
+		key: str = self.test_insert_value_to_array_022.__name__
+		value: list[int] = list(range(20_000))
+		SmokeTests.r.r_set(key, value)
+		SmokeTests.r.insert_value_to_array(key, -5, index=15_000)
+		SmokeTests.r.insert_value_to_array(key, -1, index=1)
+		res: list[int] = SmokeTests.r.r_get(key, convert_to_type='int')
+		self.assertEqual(res, [0, -1] + value[1:15_000] + [-5] + value[15_000:])
+
+	# bulk_insert_values_to_array ######################################################################################
+
+	def test_bulk_insert_values_to_array_001(self):
+		key: str = self.test_bulk_insert_values_to_array_001.__name__
+		value: list[str] = ['a', 'b', 'c', 'a', 'b', 'c']
+		SmokeTests.r.r_set(key, value)
+		old_value = SmokeTests.r.bulk_insert_values_to_array(key, {-1: 'z', 4: 'y', 1: 'x', 100: 'w'}, get_old_value=True)
+		self.assertEqual(old_value, value)
+		self.assertEqual(SmokeTests.r.r_get(key), ['a', 'x', 'b', 'c', 'y', 'a', 'b', 'c', 'w', 'z'])
+
+	def test_bulk_insert_values_to_array_002(self):
+		""" The result is the same as inserting the values one by one in ascending order of the indexes """
+		key: str = self.test_bulk_insert_values_to_array_002.__name__
+		values: dict = {randint(0, 12_000): randint(0, 100) for _ in range(50)}
+		SmokeTests.r.r_set(key, list(range(10_000)))
+		SmokeTests.r.bulk_insert_values_to_array(key, values)
+		SmokeTests.r.r_set(f'{key}_2', list(range(10_000)))
+		for index in sorted(values):
+			SmokeTests.r.insert_value_to_array(f'{key}_2', values[index], index=index)
+		self.assertEqual(
+			SmokeTests.r.r_get(key, convert_to_type='int'), SmokeTests.r.r_get(f'{key}_2', convert_to_type='int')
+		)
+
+	def test_bulk_insert_values_to_array_003(self):
+		key: str = self.test_bulk_insert_values_to_array_003.__name__
+		self.assertIsNone(SmokeTests.r.bulk_insert_values_to_array(key, {0: 1}))
+		self.assertIsNone(SmokeTests.r.r_get(key))
+		SmokeTests.r.bulk_insert_values_to_array(key, {0: 1, 5: 2, -1: 3}, type_if_not_exists='list')
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), [1, 2, 3])
+
+	def test_bulk_insert_values_to_array_004(self):
+		key: str = self.test_bulk_insert_values_to_array_004.__name__
+		SmokeTests.r.r_set(key, {1, 2})
+		SmokeTests.r.bulk_insert_values_to_array(key, {0: 3, 1: 2, -1: 4})
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), {1, 2, 3, 4})
+		SmokeTests.r.r_set(f'{key}_str', key)
+		SmokeTests.r.bulk_insert_values_to_array(f'{key}_str', {0: 1})
+		self.assertEqual(SmokeTests.r.r_get(f'{key}_str'), key)
+
+	def test_bulk_insert_values_to_array_005(self):
+		key: str = self.test_bulk_insert_values_to_array_005.__name__
+		self.assertIsNone(SmokeTests.r.bulk_insert_values_to_array(key, {}, type_if_not_exists='list'))
+		self.assertIsNone(SmokeTests.r.bulk_insert_values_to_array(key, {0: None, -2: 1}, type_if_not_exists='list'))
+		self.assertIsNone(SmokeTests.r.r_get(key))
+
+	def test_bulk_insert_values_to_array_006(self):
+		""" Insert to the beginning keeps the ttl """
+		key: str = self.test_bulk_insert_values_to_array_006.__name__
+		SmokeTests.r.r_set(key, [1, 2], time_ms=100_000)
+		SmokeTests.r.bulk_insert_values_to_array(key, {0: 0})
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), [0, 1, 2])
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(key) <= 100_000)
+
+	# r_iter ###########################################################################################################
+
+	def test_r_iter_001(self):
+		key: str = self.test_r_iter_001.__name__
+		value: list[int] = list(range(2_500))
+		SmokeTests.r.r_set(key, value)
+		res = SmokeTests.r.r_iter(key, chunk_size=1_000, convert_to_type='int')
+		self.assertNotIsInstance(res, list)
+		self.assertEqual(list(res), value)
+
+	def test_r_iter_002(self):
+		key: str = self.test_r_iter_002.__name__
+		value: set[int] = set(range(3_000))
+		SmokeTests.r.r_set(key, value)
+		self.assertEqual(set(SmokeTests.r.r_iter(key, chunk_size=100, convert_to_type='int')), value)
+
+	def test_r_iter_003(self):
+		""" A list with a length that is a multiple of the chunk size """
+		key: str = self.test_r_iter_003.__name__
+		SmokeTests.r.r_set(key, ['a', 'b', 'c', 'd'])
+		self.assertEqual(list(SmokeTests.r.r_iter(key, chunk_size=2)), ['a', 'b', 'c', 'd'])
+		self.assertEqual(list(SmokeTests.r.r_iter(key, chunk_size=1_000)), ['a', 'b', 'c', 'd'])
+
+	def test_r_iter_004(self):
+		key: str = self.test_r_iter_004.__name__
+		SmokeTests.r.r_set(key, 12)
+		self.assertEqual(list(SmokeTests.r.r_iter(key, convert_to_type='int')), [12])
+		self.assertEqual(list(SmokeTests.r.r_iter(f'{key}_none')), [])
+		self.assertEqual(list(SmokeTests.r.r_iter(key, chunk_size=0)), [])
+
+	# r_get_range ######################################################################################################
+
+	def test_r_get_range_001(self):
+		key: str = self.test_r_get_range_001.__name__
+		value: list[int] = list(range(100))
+		SmokeTests.r.r_set(key, value)
+		self.assertEqual(SmokeTests.r.r_get_range(key, 10, 20, convert_to_type='int'), value[10:20])
+		self.assertEqual(SmokeTests.r.r_get_range(key, -5, convert_to_type='int'), value[-5:])
+		self.assertEqual(SmokeTests.r.r_get_range(key, 90, 200, convert_to_type='int'), value[90:200])
+		self.assertEqual(SmokeTests.r.r_get_range(key, 0, -98, convert_to_type='int'), value[0:-98])
+		self.assertEqual(SmokeTests.r.r_get_range(key, 50, 10), [])
+
+	def test_r_get_range_002(self):
+		""" r_get with a slice """
+		key: str = self.test_r_get_range_002.__name__
+		value: list[str] = ['a', 'b', 'c', 'd']
+		SmokeTests.r.r_set(key, value)
+		self.assertEqual(SmokeTests.r.r_get(key, slice(1, 3)), value[1:3])
+		self.assertEqual(SmokeTests.r.r_get(key, slice(None, -1)), value[:-1])
+		with self.assertRaises(ValueError):
+			SmokeTests.r.r_get(key, slice(None, None, 2))
+
+	def test_r_get_range_003(self):
+		key: str = self.test_r_get_range_003.__name__
+		value: set[int] = set(range(50))
+		SmokeTests.r.r_set(key, value)
+		res: set = SmokeTests.r.r_get_range(key, 0, 10, convert_to_type='int')
+		self.assertEqual(len(res), 10)
+		self.assertTrue(res.issubset(value))
+
+	def test_r_get_range_004(self):
+		key: str = self.test_r_get_range_004.__name__
+		SmokeTests.r.r_set(key, key)
+		self.assertIsNone(SmokeTests.r.r_get_range(key, 0, 1))
+		self.assertIsNone(SmokeTests.r.r_get_range(f'{key}_none', 0, 1))
+		SmokeTests.r.r_set_packed(f'{key}_packed', [1, 2, 3])
+		self.assertEqual(SmokeTests.r.r_get(f'{key}_packed', slice(1, None)).tolist(), [2, 3])
+
+	# hash #############################################################################################################
+
+	def test_hash_001(self):
+		key: str = self.test_hash_001.__name__
+		value: dict = {'name': 'Alex', 'age': 30, 'score': 1.5}
+		SmokeTests.r.r_set(key, value)
+		self.assertEqual(SmokeTests.original_redis.type(key), b'hash')
+		self.assertEqual(SmokeTests.r.r_get(key), {'name': 'Alex', 'age': '30', 'score': '1.5'})
+		self.assertEqual(SmokeTests.r.r_len(key), 3)
+		self.assertEqual(SmokeTests.r.get_type_value_of_key(key), 'hash')
+
+	def test_hash_002(self):
+		""" A large hash is written in chunks """
+		key: str = self.test_hash_002.__name__
+		value: dict = {f'field_{i}': i for i in range(20_000)}
+		SmokeTests.r.r_set(key, value, time_ms=100_000)
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), value)
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(key) <= 100_000)
+		self.assertEqual(dict(SmokeTests.r.r_iter(key, chunk_size=1_000, convert_to_type='int')), value)
+
+	def test_hash_003(self):
+		""" The new value replaces the whole hash """
+		key: str = self.test_hash_003.__name__
+		SmokeTests.r.r_set(key, {'a': 1, 'b': 2})
+		SmokeTests.r.r_set(key, {'c': 3})
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), {'c': 3})
+		SmokeTests.r.r_set(key, [1])
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='int'), [1])
+
+	def test_hash_004(self):
+		""" Field-level reading and writing """
+		key: str = self.test_hash_004.__name__
+		self.assertEqual(SmokeTests.r.r_hset(key, {'a': 1, 'b': True}), 2)
+		self.assertEqual(SmokeTests.r.r_hset(key, {'a': 2, 'c': 'x'}), 1)
+		self.assertEqual(SmokeTests.r.r_hget(key, 'a', convert_to_type='int'), 2)
+		self.assertIsNone(SmokeTests.r.r_hget(key, 'none'))
+		self.assertEqual(SmokeTests.r.r_hget(key, ['b', 'c', 'none']), {'b': 'True', 'c': 'x'})
+		self.assertEqual(SmokeTests.r.r_get(key), {'a': '2', 'b': 'True', 'c': 'x'})
+
+	def test_hash_005(self):
+		key: str = self.test_hash_005.__name__
+		self.assertEqual(SmokeTests.r.r_hincr(key, 'views'), 1)
+		self.assertEqual(SmokeTests.r.r_hincr(key, 'views', 10), 11)
+		self.assertEqual(SmokeTests.r.r_hincr(key, 'views', -2), 9)
+		self.assertEqual(SmokeTests.r.r_hincr(key, 'rating', 0.5), 0.5)
+		self.assertEqual(SmokeTests.r.r_get(key, convert_to_type='float'), {'views': 9.0, 'rating': 0.5})
+
+	def test_hash_006(self):
+		key: str = self.test_hash_006.__name__
+		SmokeTests.r.r_set(key, {'a': 'b'})
+		self.assertEqual(SmokeTests.r.r_delete(key, returning=True), {'a': 'b'})
+		self.assertIsNone(SmokeTests.r.r_get(key))
+
+	def test_hash_007(self):
+		""" Values of hashes are not converted to strings implicitly """
+		key: str = self.test_hash_007.__name__
+		for value in ({'a': None}, {'a': [1]}, {'a': 1, 'b': {'c': 2}}):
+			with self.assertRaises(TypeError):
+				SmokeTests.r.r_set(key, value)
+			with self.assertRaises(TypeError):
+				SmokeTests.r.r_hset(key, value)
+			self.assertFalse(SmokeTests.original_redis.exists(key))
+
 	# r_len ############################################################################################################
 
 	def test_r_len_001(self):
@@ -1837,6 +2082,319 @@ class SmokeTests(unittest.TestCase):
 		for key in res.keys():
 			self.assertEqual(str(key), res[key])
 
+	# r_mass_get #######################################################################################################
+
+	def test_r_mass_get_001(self):
+		prefix: str = self.test_r_mass_get_001.__name__
+		mapping: dict = {
+			f'{prefix}_str': 'a', f'{prefix}_list': ['1', '2'], f'{prefix}_set': {'x', 'y'}, f'{prefix}_dict': {'f': 'v'}
+		}
+		SmokeTests.r.r_mass_set(mapping)
+		self.assertEqual(SmokeTests.r.r_mass_get(list(mapping) + [f'{prefix}_none']), mapping)
+
+	def test_r_mass_get_002(self):
+		prefix: str = self.test_r_mass_get_002.__name__
+		SmokeTests.r.r_set(f'{prefix}_1', 1)
+		SmokeTests.r.r_set(f'{prefix}_2', [2, 3])
+		SmokeTests.r.r_set_packed(f'{prefix}_3', [4, 5])
+		res: dict = SmokeTests.r.r_mass_get((f'{prefix}_1', f'{prefix}_2', f'{prefix}_3'), convert_to_type='int')
+		self.assertEqual(res[f'{prefix}_1'], 1)
+		self.assertEqual(res[f'{prefix}_2'], [2, 3])
+		self.assertEqual(res[f'{prefix}_3'].tolist(), [4, 5])
+		self.assertEqual(SmokeTests.r.r_mass_get([]), {})
+
+	def test_r_mass_get_003(self):
+		""" Keys of unsupported types (sorted set) are omitted """
+		prefix: str = self.test_r_mass_get_003.__name__
+		SmokeTests.r.r_set(f'{prefix}_1', 1)
+		SmokeTests.original_redis.zadd(f'{prefix}_zset', {'a': 1})
+		res: dict = SmokeTests.r.r_mass_get((f'{prefix}_1', f'{prefix}_zset'), convert_to_type='int')
+		self.assertEqual(res, {f'{prefix}_1': 1})
+
+	# r_scan / r_delete_pattern / r_set_ttl_pattern ###################################################################
+
+	def test_r_scan_001(self):
+		prefix: str = self.test_r_scan_001.__name__
+		keys: set = {f'{prefix}:{i}' for i in range(25)}
+		SmokeTests.r.r_mass_set({key: 1 for key in keys})
+		SmokeTests.r.r_set(f'{prefix}:list', [1, 2])
+		self.assertEqual(set(SmokeTests.r.r_scan(f'{prefix}:*', count=10, _type='string')), keys)
+		self.assertEqual(set(SmokeTests.r.r_scan(f'{prefix}:*', _type='list')), {f'{prefix}:list'})
+
+	def test_r_delete_pattern_001(self):
+		prefix: str = self.test_r_delete_pattern_001.__name__
+		SmokeTests.r.r_mass_set({f'{prefix}:{i}': i for i in range(25)})
+		SmokeTests.r.r_set(f'{prefix}_other', 1)
+		self.assertEqual(SmokeTests.r.r_delete_pattern(f'{prefix}:*', count=10), 25)
+		self.assertEqual(list(SmokeTests.r.r_scan(f'{prefix}:*')), [])
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_other'), '1')
+		self.assertEqual(SmokeTests.r.r_delete_pattern(f'{prefix}:*'), 0)
+		self.assertEqual(SmokeTests.r.r_delete_pattern(''), 0)
+
+	def test_r_set_ttl_pattern_001(self):
+		prefix: str = self.test_r_set_ttl_pattern_001.__name__
+		SmokeTests.r.r_mass_set({f'{prefix}:{i}': i for i in range(15)})
+		SmokeTests.r.r_set(f'{prefix}_other', 1)
+		self.assertEqual(SmokeTests.r.r_set_ttl_pattern(f'{prefix}:*', ttl_ms=100_000, count=4), 15)
+		self.assertTrue(all(0 < SmokeTests.r.get_key_ttl(f'{prefix}:{i}') <= 100_000 for i in range(15)))
+		self.assertEqual(SmokeTests.r.get_key_ttl(f'{prefix}_other'), 0)
+		self.assertEqual(SmokeTests.r.r_set_ttl_pattern(f'{prefix}:*'), 0)
+
+	# r_get_or_set #####################################################################################################
+
+	def test_r_get_or_set_001(self):
+		""" A missing value is computed once by concurrent callers """
+		key: str = self.test_r_get_or_set_001.__name__
+		calls: list = []
+
+		def factory() -> int:
+			calls.append(1)
+			sleep(0.2)
+			return 42
+
+		with ThreadPoolExecutor(max_workers=8) as executor:
+			res: list = list(executor.map(
+				lambda _: SmokeTests.r.r_get_or_set(key, factory, ttl_ms=100_000, convert_to_type='int',
+													poll_interval_ms=10),
+				range(8)
+			))
+		self.assertEqual(res, [42] * 8)
+		self.assertEqual(len(calls), 1)
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(key) <= 100_000)
+		self.assertFalse(SmokeTests.original_redis.keys(f'*{key}*lease*'))
+		self.assertEqual(SmokeTests.r.r_get_or_set(key, lambda: 0, convert_to_type='int'), 42)
+
+	def test_r_get_or_set_002(self):
+		""" The lease of a crashed caller expires """
+		key: str = self.test_r_get_or_set_002.__name__
+		SmokeTests.original_redis.set(f'{{{key}}}:pyluaredis-lease', 'crashed', px=100)
+		self.assertEqual(SmokeTests.r.r_get_or_set(key, lambda: [1, 2], poll_interval_ms=10), [1, 2])
+		self.assertEqual(SmokeTests.r.r_get(key), ['1', '2'])
+
+	def test_r_get_or_set_003(self):
+		""" The lease is released if factory() fails or returns None """
+		key: str = self.test_r_get_or_set_003.__name__
+		with self.assertRaises(ZeroDivisionError):
+			SmokeTests.r.r_get_or_set(key, lambda: 1 / 0)
+		self.assertIsNone(SmokeTests.r.r_get_or_set(key, lambda: None))
+		self.assertEqual(SmokeTests.r.r_get_or_set(key, lambda: 'a', lease_ms=100_000), 'a')
+		self.assertIsNone(SmokeTests.r.r_get_or_set('', lambda: 'a'))
+
+	def test_r_get_or_set_004(self):
+		""" Stale-while-revalidate """
+		key: str = self.test_r_get_or_set_004.__name__
+		values: list = [2, 1]
+		self.assertEqual(SmokeTests.r.r_get_or_set(key, values.pop, ttl_ms=100, stale_ms=100_000), 1)
+		self.assertTrue(100_000 < SmokeTests.r.get_key_ttl(key) <= 100_100)
+		self.assertEqual(SmokeTests.r.r_get_or_set(key, values.pop, ttl_ms=100, stale_ms=100_000), '1')  # fresh
+		sleep(0.15)
+		# the stale value is returned at once, the new one is written in the background
+		self.assertEqual(SmokeTests.r.r_get_or_set(key, values.pop, ttl_ms=100, stale_ms=100_000), '1')
+		for _ in range(100):
+			if SmokeTests.r.r_get(key) == '2':
+				break
+			sleep(0.01)
+		self.assertEqual(SmokeTests.r.r_get(key), '2')
+		self.assertEqual(values, [])
+
+	def test_r_get_or_set_005(self):
+		""" Leaving the context waits for the background refresh """
+		key: str = self.test_r_get_or_set_005.__name__
+
+		def factory() -> str:
+			sleep(0.1)
+			return 'new'
+
+		SmokeTests.r.r_set(key, 'old', time_ms=100_000)
+		with PyRedis(
+				host=REDIS_HOST,
+				port=REDIS_PORT,
+				password=REDIS_PWS,
+				username=REDIS_USERNAME,
+				db=redis_db,
+				socket_timeout=5
+		) as redis_conn:
+			self.assertEqual(redis_conn.r_get_or_set(key, factory, ttl_ms=100, stale_ms=100_000), 'old')
+		self.assertEqual(SmokeTests.r.r_get(key), 'new')
+
+	# r_lock ###########################################################################################################
+
+	def test_r_lock_001(self):
+		name: str = self.test_r_lock_001.__name__
+		counter: list = [0]
+
+		def increment(_):
+			with SmokeTests.r.r_lock(name, ttl_ms=5_000, poll_interval_ms=5):
+				value: int = counter[0]
+				sleep(0.01)
+				counter[0] = value + 1
+
+		with ThreadPoolExecutor(max_workers=5) as executor:
+			list(executor.map(increment, range(10)))
+		self.assertEqual(counter[0], 10)
+		info: dict = SmokeTests.r.lock_info(name)
+		self.assertEqual((info['acquisitions'], info['timeouts']), (10, 0))
+		self.assertGreater(info['wait_time'], 0)
+		self.assertFalse(SmokeTests.r.r_lock(name).locked())
+
+	def test_r_lock_002(self):
+		""" Timeout, release and extend only by the owner """
+		name: str = self.test_r_lock_002.__name__
+		lock = SmokeTests.r.r_lock(name, ttl_ms=5_000)
+		self.assertTrue(lock.acquire())
+		with self.assertRaises(TimeoutError):
+			with SmokeTests.r.r_lock(name, blocking_timeout_ms=50, poll_interval_ms=10):
+				pass
+		other = SmokeTests.r.r_lock(name)
+		self.assertFalse(other.acquire(blocking_timeout_ms=0))
+		self.assertFalse(other.release())
+		self.assertFalse(other.extend())
+		self.assertTrue(lock.extend(100_000))
+		self.assertTrue(5_000 < SmokeTests.r.get_key_ttl(f'pyluaredis:lock:{name}') <= 100_000)
+		self.assertTrue(lock.release())
+		self.assertFalse(lock.release())
+		self.assertEqual(SmokeTests.r.lock_info(name)['timeouts'], 2)
+		self.assertIsNone(SmokeTests.r.lock_info(f'{name}_none'))
+
+	def test_r_lock_003(self):
+		""" The lock of a crashed owner expires, the expired lock cannot be released by its old owner """
+		name: str = self.test_r_lock_003.__name__
+		lock = SmokeTests.r.r_lock(name, ttl_ms=50)
+		self.assertTrue(lock.acquire())
+		sleep(0.1)
+		with SmokeTests.r.r_lock(name, blocking_timeout_ms=0):
+			self.assertFalse(lock.release())
+			self.assertTrue(SmokeTests.r.r_lock(name).locked())
+
+	def test_r_lock_004(self):
+		""" Auto renewal """
+		name: str = self.test_r_lock_004.__name__
+		with SmokeTests.r.r_lock(name, ttl_ms=150, auto_renewal=True) as lock:
+			sleep(0.4)
+			self.assertTrue(lock.locked())
+		self.assertFalse(lock.locked())
+		self.assertGreaterEqual(SmokeTests.r.lock_info(name)['renewals'], 2)
+		self.assertEqual(SmokeTests.r.lock_info(name)['lost'], 0)
+
+	# r_rate_limit #####################################################################################################
+
+	def test_r_rate_limit_001(self):
+		""" Token bucket """
+		key: str = self.test_r_rate_limit_001.__name__
+		res: list = [SmokeTests.r.r_rate_limit(key, 3, 100_000) for _ in range(4)]
+		self.assertEqual([limit['allowed'] for limit in res], [True, True, True, False])
+		self.assertEqual([limit['remaining'] for limit in res], [2, 1, 0, 0])
+		self.assertTrue(0 < res[-1]['retry_after_ms'] <= 100_000 // 3 + 1)
+		self.assertEqual(SmokeTests.r.r_rate_limit(key, 3, 100_000, cost=4)['retry_after_ms'], -1)
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(key) <= 100_001)
+
+	def test_r_rate_limit_002(self):
+		""" Token bucket refill """
+		key: str = self.test_r_rate_limit_002.__name__
+		self.assertTrue(SmokeTests.r.r_rate_limit(key, 2, 100, cost=2)['allowed'])
+		self.assertFalse(SmokeTests.r.r_rate_limit(key, 2, 100)['allowed'])
+		sleep(0.06)
+		self.assertTrue(SmokeTests.r.r_rate_limit(key, 2, 100)['allowed'])
+
+	def test_r_rate_limit_003(self):
+		""" Sliding window """
+		key: str = self.test_r_rate_limit_003.__name__
+		res: list = [SmokeTests.r.r_rate_limit(key, 3, 100_000, 'sliding_window', cost=2) for _ in range(2)]
+		self.assertEqual(res[0], {'allowed': True, 'remaining': 1, 'retry_after_ms': 0})
+		self.assertFalse(res[1]['allowed'])
+		self.assertTrue(99_000 < res[1]['retry_after_ms'] <= 100_000)
+		self.assertTrue(SmokeTests.r.r_rate_limit(key, 3, 100_000, 'sliding_window')['allowed'])
+		self.assertEqual(SmokeTests.original_redis.zcard(key), 3)
+		sleep(0.01)
+		self.assertTrue(SmokeTests.r.r_rate_limit(key, 3, 10, 'sliding_window', cost=3)['allowed'])
+
+	def test_r_rate_limit_004(self):
+		""" Several limits: the cost is taken only if all of them allow the request """
+		prefix: str = self.test_r_rate_limit_004.__name__
+		limits: dict = {f'{prefix}:user': (2, 100_000), f'{prefix}:global': (3, 100_000)}
+		self.assertTrue(SmokeTests.r.r_rate_limit_many(limits)['allowed'])
+		self.assertTrue(SmokeTests.r.r_rate_limit_many(limits)['allowed'])
+		res: dict = SmokeTests.r.r_rate_limit_many(limits)
+		self.assertFalse(res['allowed'])
+		self.assertEqual(res['keys'][f'{prefix}:global'], {'allowed': True, 'remaining': 1, 'retry_after_ms': 0})
+		self.assertEqual(res['retry_after_ms'], res['keys'][f'{prefix}:user']['retry_after_ms'])
+		self.assertTrue(SmokeTests.r.r_rate_limit(f'{prefix}:global', 3, 100_000)['allowed'])
+		self.assertEqual(SmokeTests.r.r_rate_limit_many({}), {'allowed': True, 'retry_after_ms': 0, 'keys': {}})
+		with self.assertRaises(ValueError):
+			SmokeTests.r.r_rate_limit(prefix, 1, 1000, algorithm='leaky_bucket')
+		with self.assertRaises(ValueError):
+			SmokeTests.r.r_rate_limit(prefix, 0, 1000)
+
+	# cached ###########################################################################################################
+
+	def test_cached_001(self):
+		calls: list = []
+
+		@SmokeTests.r.cached(ttl_ms=100_000, convert_to_type='int')
+		def square(x: int) -> int:
+			calls.append(x)
+			return x * x
+
+		self.assertEqual([square(2), square(2), square(x=2), square(3)], [4, 4, 4, 9])
+		self.assertEqual(calls, [2, 2, 3])  # positional and keyword arguments give different keys
+		info: dict = square.cache_info()
+		self.assertEqual((info['hits'], info['misses'], info['hit_ratio']), (1, 3, 0.25))
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(square.cache_key(2)) <= 100_000)
+
+		square.cache_invalidate(2)
+		self.assertEqual(square(2), 4)
+		self.assertEqual(calls, [2, 2, 3, 2])
+		self.assertEqual(square.cache_clear(), 3)
+		self.assertIsNone(SmokeTests.r.r_get(square.cache_key(3)))
+
+	def test_cached_002(self):
+		""" key_fn / namespace, None results are not cached """
+		calls: list = []
+
+		@SmokeTests.r.cached(key_fn=lambda user, **_: user['id'], namespace=self.test_cached_002.__name__)
+		def get_name(user: dict, upper: bool = False) -> str | None:
+			calls.append(user['id'])
+			return (user['name'].upper() if upper else user['name']) if user['name'] else None
+
+		self.assertEqual(get_name({'id': 1, 'name': 'a'}), 'a')
+		self.assertEqual(get_name({'id': 1, 'name': 'b'}, upper=True), 'a')
+		self.assertIsNone(get_name({'id': 2, 'name': ''}))
+		self.assertIsNone(get_name({'id': 2, 'name': ''}))
+		self.assertEqual(calls, [1, 2, 2])
+		self.assertEqual(SmokeTests.r.r_get(f'{self.test_cached_002.__name__}:1'), 'a')
+
+	def test_cached_003(self):
+		""" The key does not depend on the order of dict items and set elements """
+
+		@SmokeTests.r.cached()
+		def func(*_, **__) -> int:
+			return 1
+
+		self.assertEqual(func.cache_key({'a': 1, 'b': {1, 2}}, x=1, y=2), func.cache_key({'b': {2, 1}, 'a': 1}, y=2, x=1))
+		self.assertNotEqual(func.cache_key(1), func.cache_key('1'))
+		self.assertTrue(func.cache_key(1).startswith(f'pyluaredis:cached:{__name__}.'))
+		with self.assertRaises(TypeError):
+			SmokeTests.r.cached()(_coroutine_function)
+
+	def test_cached_004(self):
+		""" Objects with the default repr (memory address) need key_fn """
+		class User:
+			def __init__(self, user_id: int):
+				self.user_id = user_id
+
+		@SmokeTests.r.cached()
+		def name(user: User) -> str:
+			return f'user_{user.user_id}'
+
+		@SmokeTests.r.cached(key_fn=lambda user: str(user.user_id))
+		def name_by_id(user: User) -> str:
+			return f'user_{user.user_id}'
+
+		with self.assertRaises(TypeError):
+			name(User(1))
+		self.assertEqual([name_by_id(User(1)), name_by_id(User(1))], ['user_1', 'user_1'])
+		self.assertEqual(name_by_id.cache_info()['hits'], 1)
+
 	# r_mass_delete ####################################################################################################
 
 	def test_r_mass_delete_001(self):
@@ -2026,6 +2584,36 @@ class SmokeTests(unittest.TestCase):
 	def test_r_mass_delete_016(self):
 		self.assertEqual(SmokeTests.r.r_mass_delete(frozenset()), ((), (), {}))
 
+	def test_r_mass_delete_native_reply_001(self):
+		""" Sets and hashes are returned with their types """
+		prefix: str = self.test_r_mass_delete_native_reply_001.__name__
+		mapping: dict = {f'{prefix}_set': {'a', 'b'}, f'{prefix}_list': ['a', 'b'], f'{prefix}_dict': {'a': 'b'}}
+		SmokeTests.r.r_mass_set(mapping)
+		SmokeTests.r.r_set_packed(f'{prefix}_packed', [1, 2])
+		res = SmokeTests.r.r_mass_delete(list(mapping) + [f'{prefix}_packed'], get_dict_key_value_exists=True)[2]
+		self.assertEqual(res[f'{prefix}_packed'].tolist(), [1, 2])
+		del res[f'{prefix}_packed']
+		self.assertEqual(res, mapping)
+		self.assertFalse(SmokeTests.r.exists(list(mapping)))
+
+	def test_r_mass_delete_chunks_001(self):
+		prefix: str = self.test_r_mass_delete_chunks_001.__name__
+		keys: list[str] = [f'{prefix}_{i}' for i in range(1_000)]
+		SmokeTests.r.r_mass_set({key: i for i, key in enumerate(keys)})
+		res = SmokeTests.r.r_mass_delete(
+			keys + [f'{prefix}_none'], return_exists=True, return_non_exists=True, get_dict_key_value_exists=True,
+			convert_to_type_dict_key='int', chunk_size=300
+		)
+		self.assertEqual(res, (tuple(sorted(keys)), (f'{prefix}_none',), {key: i for i, key in enumerate(keys)}))
+		self.assertFalse(SmokeTests.r.exists(keys))
+
+	def test_r_mass_delete_chunks_002(self):
+		prefix: str = self.test_r_mass_delete_chunks_002.__name__
+		keys: list[str] = [f'{prefix}_{i}' for i in range(100)]
+		SmokeTests.r.r_mass_set({key: [i] for i, key in enumerate(keys)})
+		self.assertEqual(SmokeTests.r.r_mass_unlink(keys, chunk_size=7), ((), (), {}))
+		self.assertFalse(SmokeTests.r.exists(keys))
+
 	# r_mass_unlink ####################################################################################################
 
 	def test_r_mass_unlink_001(self):
@@ -2040,6 +2628,51 @@ class SmokeTests(unittest.TestCase):
 	def test_r_mass_unlink_004(self):
 		self.assertEqual(SmokeTests.r.r_mass_unlink(frozenset()), ((), (), {}))
 
+	# r_mass_set #######################################################################################################
+
+	def test_r_mass_set_001(self):
+		prefix: str = self.test_r_mass_set_001.__name__
+		mapping: dict = {
+			f'{prefix}_str': 'a', f'{prefix}_int': 1, f'{prefix}_list': [1, 2], f'{prefix}_set': {'x', 'y'},
+			f'{prefix}_dict': {'f': 'v'}, f'{prefix}_empty': []
+		}
+		self.assertEqual(SmokeTests.r.r_mass_set(mapping), tuple(key for key in mapping if key != f'{prefix}_empty'))
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_str'), 'a')
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_int', convert_to_type='int'), 1)
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_list', convert_to_type='int'), [1, 2])
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_set'), {'x', 'y'})
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_dict'), {'f': 'v'})
+		self.assertIsNone(SmokeTests.r.r_get(f'{prefix}_empty'))
+
+	def test_r_mass_set_002(self):
+		""" if_not_exist and several batches """
+		prefix: str = self.test_r_mass_set_002.__name__
+		SmokeTests.r.r_set(f'{prefix}_3', 'old')
+		mapping: dict = {f'{prefix}_{i}': i for i in range(10)}
+		written: tuple = SmokeTests.r.r_mass_set(mapping, if_not_exist=True, batch_size=3)
+		self.assertEqual(written, tuple(key for key in mapping if key != f'{prefix}_3'))
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_3'), 'old')
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_9', convert_to_type='int'), 9)
+
+	def test_r_mass_set_003(self):
+		""" ttl for all keys and for some keys """
+		prefix: str = self.test_r_mass_set_003.__name__
+		SmokeTests.r.r_mass_set(
+			{f'{prefix}_1': 1, f'{prefix}_2': [2], f'{prefix}_3': 3}, time_s=100, ttl_ms={f'{prefix}_3': 5_000}
+		)
+		self.assertTrue(50_000 < SmokeTests.r.get_key_ttl(f'{prefix}_1') <= 100_000)
+		self.assertTrue(50_000 < SmokeTests.r.get_key_ttl(f'{prefix}_2') <= 100_000)
+		self.assertTrue(0 < SmokeTests.r.get_key_ttl(f'{prefix}_3') <= 5_000)
+
+	def test_r_mass_set_004(self):
+		""" Large arrays are written in chunks, r_set with a dict in the key """
+		prefix: str = self.test_r_mass_set_004.__name__
+		value: list[int] = list(range(20_000))
+		self.assertIsNone(SmokeTests.r.r_set({f'{prefix}_1': value, f'{prefix}_2': {str(i): i for i in value}}, None))
+		self.assertEqual(SmokeTests.r.r_get(f'{prefix}_1', convert_to_type='int'), value)
+		self.assertEqual(SmokeTests.r.r_len(f'{prefix}_2'), 20_000)
+		self.assertEqual(SmokeTests.r.r_mass_set({f'{prefix}_1': 1, f'{prefix}_3': 3}, if_exist=True), (f'{prefix}_1',))
+
 	# r_set function with 'if_exists' parameter ########################################################################
 
 	def test_r_set_if_exists_001(self):
@@ -2454,6 +3087,109 @@ class SmokeTests(unittest.TestCase):
 
 	# TODO - r_pop: count, reverse, все кроме последнего элемента
 
+	# batch ############################################################################################################
+
+	def test_batch_001(self):
+		""" Results in the order of calls with the same post-processing as the methods """
+		key: str = self.test_batch_001.__name__
+		with SmokeTests.r.batch() as batch:
+			batch.r_set(key, [1, 2, 3])
+			batch.r_get(key, convert_to_type='int')
+			batch.r_len(key)
+			batch.r_pop(key, convert_to_type='int')
+			batch.insert_value_to_array(key, 0, index=0, get_old_value=True, convert_to_type='int')
+			batch.r_get(key, convert_to_type='int')
+		self.assertEqual(batch.results, [None, [1, 2, 3], 3, (3,), [1, 2], [0, 1, 2]])
+
+	def test_batch_002(self):
+		""" Sets and default values """
+		key: str = self.test_batch_002.__name__
+		with SmokeTests.r.batch() as batch:
+			batch.r_set(key, {1, 2, 3})
+			batch.r_get(key, convert_to_type='int')
+			batch.r_get(f'{key}_none', default_value=key)
+			batch.r_get('', default_value=key)
+		self.assertEqual(batch.results, [None, {1, 2, 3}, key, key])
+
+	def test_batch_003(self):
+		""" Commands are not sent before leaving the block """
+		key: str = self.test_batch_003.__name__
+		with SmokeTests.r.batch() as batch:
+			batch.r_set(key, key)
+			self.assertIsNone(SmokeTests.r.r_get(key))
+			self.assertEqual(len(batch), 1)
+		self.assertEqual(SmokeTests.r.r_get(key), key)
+
+	def test_batch_004(self):
+		""" Commands are discarded if there is an exception in the block """
+		key: str = self.test_batch_004.__name__
+		with self.assertRaises(ZeroDivisionError):
+			with SmokeTests.r.batch() as batch:
+				batch.r_set(key, key)
+				_ = 1 / 0
+		self.assertIsNone(SmokeTests.r.r_get(key))
+		self.assertEqual(batch.results, [])
+
+	def test_batch_005(self):
+		""" Many reads in one request """
+		keys: list = [f'{self.test_batch_005.__name__}_{i}' for i in range(30)]
+		with SmokeTests.r.batch() as batch:
+			for i, key in enumerate(keys):
+				batch.r_set(key, i, get_old_value=True)
+		self.assertEqual(batch.results, [None] * 30)
+		with SmokeTests.r.batch() as batch:
+			for key in keys:
+				batch.r_get(key, convert_to_type='int')
+		self.assertEqual(batch.results, list(range(30)))
+
+	def test_batch_006(self):
+		""" delete / ttl """
+		key: str = self.test_batch_006.__name__
+		SmokeTests.r.r_set(key, key)
+		with SmokeTests.r.batch() as batch:
+			batch.set_key_ttl(key, ttl_ms=100_000)
+			batch.r_delete(key, returning=True)
+			batch.r_delete(key, returning=True)
+		self.assertEqual(batch.results, [None, key, None])
+
+	def test_batch_008(self):
+		""" insert values to array """
+		key: str = self.test_batch_008.__name__
+		SmokeTests.r.r_set(key, ['a', 'c'])
+		with SmokeTests.r.batch() as batch:
+			batch.bulk_insert_values_to_array(key, {1: 'b', -1: 'd'}, get_old_value=True)
+			batch.insert_value_to_array(key, 'e', index=10)
+			batch.r_get(key)
+		self.assertEqual(batch.results, [['a', 'c'], None, ['a', 'b', 'c', 'd', 'e']])
+
+	def test_batch_009(self):
+		""" range reads """
+		key: str = self.test_batch_009.__name__
+		SmokeTests.r.r_set(key, [1, 2, 3, 4])
+		with SmokeTests.r.batch() as batch:
+			batch.r_get(key, slice(1, 3), convert_to_type='int')
+			batch.r_get_range(key, -1, convert_to_type='int')
+		self.assertEqual(batch.results, [[2, 3], [4]])
+
+	def test_batch_010(self):
+		""" hash """
+		key: str = self.test_batch_010.__name__
+		with SmokeTests.r.batch() as batch:
+			batch.r_set(key, {'a': 1})
+			batch.r_get(key, convert_to_type='int')
+		self.assertEqual(batch.results, [None, {'a': 1}])
+
+	def test_batch_007(self):
+		""" Empty batch """
+		with SmokeTests.r.batch() as batch:
+			pass
+		self.assertEqual(batch.results, [])
+		self.assertEqual(batch.execute(), [])
+
+
+async def _coroutine_function():
+	pass
+
 
 if __name__ == '__main__':
 	unittest.main()
@@ -0,0 +1,133 @@
+"""
+Checking PyRedisCluster, RedisCluster is replaced by a Redis client of one database
+(the grouping of the keys by hash slot and the merging of the results do not depend on the topology)
+"""
+import unittest
+from unittest.mock import patch
+from redis import Redis, ConnectionPool
+from redis.cluster import LoadBalancingStrategy
+from sys import path as sys_path
+
+from connection_params import REDIS_PWS, REDIS_HOST, REDIS_PORT, REDIS_USERNAME
+sys_path.append('../')
+from pyluaredis.client import PyRedis
+from pyluaredis.cluster import PyRedisCluster
+from pyluaredis.exceptions import ClusterNotSupportedError
+from pyluaredis.helpers import _group_keys_by_slot
+
+redis_db: int = 12
+
+
+def redis_cluster_stub(**cluster_kwargs) -> Redis:
+	""" Called instead of RedisCluster(...), the cluster parameters are ignored """
+	return Redis(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5,
+		decode_responses=cluster_kwargs['decode_responses']
+	)
+
+
+class ClusterTests(unittest.TestCase):
+	"""
+	Multi-key methods are called separately for the keys of each hash slot
+	"""
+	# keys of three different hash slots (hash tags)
+	keys: tuple = ('{a}1', '{b}1', '{a}2', '{c}1')
+
+	with patch('pyluaredis.cluster.RedisCluster', side_effect=redis_cluster_stub) as redis_cluster_mock:
+		r = PyRedisCluster(
+			host=REDIS_HOST,
+			port=REDIS_PORT,
+			password=REDIS_PWS,
+			username=REDIS_USERNAME,
+			socket_timeout=5,
+			startup_nodes=[(REDIS_HOST, REDIS_PORT)],
+			read_from_replicas=True
+		)
+
+	original_redis = Redis(connection_pool=ConnectionPool(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5,
+		decode_responses=True
+	))
+
+	@classmethod
+	def setUpClass(cls):
+		ClusterTests.original_redis.flushdb()  # clear the database before tests
+
+	@classmethod
+	def tearDownClass(cls):
+		ClusterTests.original_redis.flushdb()  # clear the database after tests
+
+	def setUp(self):
+		ClusterTests.original_redis.flushdb()
+
+	def assert_called_by_slot(self, method_mock, call_count: int = 3):
+		""" Each call of the PyRedis method gets the keys of one hash slot """
+		self.assertEqual(method_mock.call_count, call_count)
+		for call in method_mock.call_args_list:
+			self.assertEqual(len(_group_keys_by_slot(tuple(call.args[1]))), 1)
+
+	def test_cluster_init_001(self):
+		""" Both clients (decoding and binary) get the cluster parameters """
+		self.assertEqual(ClusterTests.redis_cluster_mock.call_count, 2)
+		for call in ClusterTests.redis_cluster_mock.call_args_list:
+			self.assertNotIn('db', call.kwargs)
+			self.assertIsNone(call.kwargs['host'])
+			self.assertEqual([node.port for node in call.kwargs['startup_nodes']], [REDIS_PORT])
+			self.assertEqual(call.kwargs['load_balancing_strategy'], LoadBalancingStrategy.ROUND_ROBIN)
+		self.assertEqual(
+			sorted(call.kwargs['decode_responses'] for call in ClusterTests.redis_cluster_mock.call_args_list),
+			[False, True]
+		)
+		self.assertIsNone(ClusterTests.r.near_cache)
+
+	def test_cluster_batch_001(self):
+		with self.assertRaises(ClusterNotSupportedError):
+			ClusterTests.r.batch()
+
+	def test_cluster_r_mass_set_001(self):
+		mapping: dict = {key: f'value_{i}' for i, key in enumerate(ClusterTests.keys)}
+		with patch.object(PyRedis, 'r_mass_set', autospec=True, side_effect=PyRedis.r_mass_set) as method_mock:
+			res = ClusterTests.r.r_mass_set(mapping)
+		self.assert_called_by_slot(method_mock)
+		self.assertEqual(res, ClusterTests.keys)  # in the order of the mapping
+		self.assertEqual(ClusterTests.original_redis.mget(ClusterTests.keys), list(mapping.values()))
+
+	def test_cluster_r_mass_set_002(self):
+		""" Keys of one hash slot - one call """
+		with patch.object(PyRedis, 'r_mass_set', autospec=True, side_effect=PyRedis.r_mass_set) as method_mock:
+			res = ClusterTests.r.r_mass_set({'{a}1': 1, '{a}2': 2})
+		self.assertEqual(method_mock.call_count, 1)
+		self.assertEqual(res, ('{a}1', '{a}2'))
+
+	def test_cluster_r_mass_get_001(self):
+		ClusterTests.original_redis.mset({'{a}1': 1, '{b}1': 2, '{c}1': 3})
+		with patch.object(PyRedis, 'r_mass_get', autospec=True, side_effect=PyRedis.r_mass_get) as method_mock:
+			res = ClusterTests.r.r_mass_get(ClusterTests.keys, convert_to_type='int')
+		self.assert_called_by_slot(method_mock)
+		self.assertEqual(res, {'{a}1': 1, '{b}1': 2, '{c}1': 3})  # '{a}2' does not exist
+
+	def test_cluster_r_mass_get_002(self):
+		self.assertEqual(ClusterTests.r.r_mass_get(()), {})
+
+	def test_cluster_r_mass_delete_001(self):
+		ClusterTests.original_redis.mset({'{a}1': 1, '{b}1': 2, '{c}1': 3})
+		with patch.object(PyRedis, 'r_mass_delete', autospec=True, side_effect=PyRedis.r_mass_delete) as method_mock:
+			exists, non_exists, values = ClusterTests.r.r_mass_delete(
+				ClusterTests.keys, return_exists=True, return_non_exists=True, get_dict_key_value_exists=True,
+				convert_to_type_dict_key='int'
+			)
+		self.assert_called_by_slot(method_mock)
+		self.assertEqual(sorted(exists), ['{a}1', '{b}1', '{c}1'])
+		self.assertEqual(non_exists, ('{a}2',))
+		self.assertEqual(values, {'{a}1': 1, '{b}1': 2, '{c}1': 3})
+		self.assertEqual(ClusterTests.original_redis.dbsize(), 0)
+
+	def test_cluster_r_mass_delete_002(self):
+		""" Without the results only the keys are deleted """
+		ClusterTests.original_redis.mset({'{a}1': 1, '{b}1': 2})
+		self.assertEqual(ClusterTests.r.r_mass_delete(ClusterTests.keys), ((), (), {}))
+		self.assertEqual(ClusterTests.original_redis.dbsize(), 0)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from os import path as os_path, listdir as os_listdir
 from redis import Redis, ConnectionPool
 from sys import path as sys_path
 
@@ -121,6 +122,42 @@ class LuaScriptsSHATestsWithPreload(unittest.TestCase):
 		res = len(LuaScriptsSHATestsWithPreload.r.lua_scripts_sha) == 0
 		self.assertTrue(res)
 
+	def test_lua_sha_004(self):
+		""" Preloaded scripts are stored under the names used to call them """
+		LuaScriptsSHATestsWithPreload.r._PyRedis__preload_lua_scripts()
+		names: set = {
+			file[:-4] for file in os_listdir(os_path.join('..', 'pyluaredis', 'lua_scripts')) if file.endswith('.lua')
+		}
+		self.assertEqual(set(LuaScriptsSHATestsWithPreload.r.lua_scripts_sha.keys()), names)
+
+	def test_lua_sha_005(self):
+		""" After SCRIPT FLUSH from another client the script is loaded again transparently """
+		key: str = self.test_lua_sha_005.__name__
+		LuaScriptsSHATestsWithPreload.r.r_set(key, key)
+		sha: str = LuaScriptsSHATestsWithPreload.r.lua_scripts_sha['get_helper']
+		LuaScriptsSHATestsWithPreload.original_redis.script_flush()
+		self.assertEqual(LuaScriptsSHATestsWithPreload.r.r_get(key), key)
+		self.assertEqual(LuaScriptsSHATestsWithPreload.r.lua_scripts_sha['get_helper'], sha)
+		self.assertEqual(LuaScriptsSHATestsWithPreload.original_redis.script_exists(sha), [True])
+
+	def test_lua_sha_006(self):
+		""" The same for the pipelined batch """
+		key: str = self.test_lua_sha_006.__name__
+		LuaScriptsSHATestsWithPreload.r.r_set(key, [1, 2, 3])
+		LuaScriptsSHATestsWithPreload.original_redis.script_flush()
+		with LuaScriptsSHATestsWithPreload.r.batch() as batch:
+			batch.r_get(key, convert_to_type='int')
+			batch.r_len(key)
+			batch.r_get(key, convert_to_type='int')
+		self.assertEqual(batch.results, [[1, 2, 3], 3, [1, 2, 3]])
+
+	def test_lua_sha_007(self):
+		""" The same for the user scripts saved in the buffer """
+		lua_script: str = 'return ARGV[1]'
+		LuaScriptsSHATestsWithPreload.r.load_lua_script(lua_script)
+		LuaScriptsSHATestsWithPreload.original_redis.script_flush()
+		self.assertEqual(LuaScriptsSHATestsWithPreload.r.run_lua_script(0, 'value', lua_script=lua_script), 'value')
+
 
 if __name__ == '__main__':
 	unittest.main()
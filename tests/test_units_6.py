@@ -0,0 +1,325 @@
+"""
+Checking the asyncio client (AsyncPyRedis)
+"""
+import unittest
+from asyncio import gather, sleep
+from redis import Redis, ConnectionPool
+from random import randint
+from sys import path as sys_path
+
+from connection_params import REDIS_PWS, REDIS_HOST, REDIS_PORT, REDIS_USERNAME
+sys_path.append('../')
+from pyluaredis.async_client import AsyncPyRedis
+from pyluaredis.exceptions import PackedArrayNotSupportedError
+from pyluaredis.helpers import _pack_numeric_array
+
+redis_db: int = 8
+
+
+class AsyncClientTests(unittest.IsolatedAsyncioTestCase):
+	"""
+	The asyncio client is created for each test, since its connections are bound to the event loop of the test
+	"""
+	# def setUp(self):
+	# 	self.maxDiff = None
+
+	original_redis = Redis(connection_pool=ConnectionPool(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5
+	))
+
+	@classmethod
+	def setUpClass(cls):
+		AsyncClientTests.original_redis.flushdb()  # clear the database before tests
+
+	@classmethod
+	def tearDownClass(cls):
+		AsyncClientTests.original_redis.flushdb()  # clear the database after tests
+
+	async def asyncSetUp(self):
+		self.r = AsyncPyRedis(
+			host=REDIS_HOST,
+			port=REDIS_PORT,
+			password=REDIS_PWS,
+			username=REDIS_USERNAME,
+			db=redis_db,
+			socket_timeout=5
+		)
+
+	async def asyncTearDown(self):
+		await self.r.aclose()
+
+	async def test_ping_001(self):
+		""" Service is available """
+		self.assertTrue(await self.r.r_ping())
+
+	async def test_ping_002(self):
+		wrong_r = AsyncPyRedis(host='unknown', preload_lua_scripts=False)
+		self.assertFalse(await wrong_r.r_ping())
+		await wrong_r.aclose()
+
+	async def test_preload_001(self):
+		""" Scripts are preloaded on the first call, names without the file extension """
+		self.assertEqual(self.r.lua_scripts_sha, {})
+		await self.r.r_get(self.test_preload_001.__name__)
+		self.assertIn('get_helper', self.r.lua_scripts_sha)
+		self.assertIn('set_arrays_helper', self.r.lua_scripts_sha)
+		self.assertFalse(any(name.endswith('.lua') for name in self.r.lua_scripts_sha))
+
+	async def test_set_get_001(self):
+		key: str = self.test_set_get_001.__name__
+		value: int = randint(0, 1_000_000)
+		self.assertIsNone(await self.r.r_set(key, value))
+		self.assertEqual(await self.r.r_get(key, convert_to_type='int'), value)
+
+	async def test_set_get_002(self):
+		key: str = self.test_set_get_002.__name__
+		value: list = [randint(0, 1_000) for _ in range(randint(10_000, 20_000))]
+		await self.r.r_set(key, value)
+		self.assertEqual(await self.r.r_get(key, convert_to_type='int'), value)
+
+	async def test_set_get_003(self):
+		key: str = self.test_set_get_003.__name__
+		value: set = {'a', 'b', 'c'}
+		await self.r.r_set(key, value)
+		self.assertEqual(await self.r.r_get(key), value)
+
+	async def test_set_get_004(self):
+		key: str = self.test_set_get_004.__name__
+		await self.r.r_set(key, 'old')
+		self.assertEqual(await self.r.r_set(key, 'new', get_old_value=True), 'old')
+		self.assertIsNone(await self.r.r_set(key, 'newest', if_not_exist=True))
+		self.assertEqual(await self.r.r_get(key), 'new')
+
+	async def test_get_001(self):
+		key: str = self.test_get_001.__name__
+		self.assertEqual(await self.r.r_get(key, default_value=key), key)
+
+	async def test_concurrent_001(self):
+		""" Many concurrent calls on one client """
+		keys: list = [f'{self.test_concurrent_001.__name__}_{i}' for i in range(500)]
+		await gather(*(self.r.r_set(key, i) for i, key in enumerate(keys)))
+		res = await gather(*(self.r.r_get(key, convert_to_type='int') for key in keys))
+		self.assertEqual(res, list(range(500)))
+
+	async def test_r_iter_001(self):
+		key: str = self.test_r_iter_001.__name__
+		await self.r.r_set(key, list(range(25)))
+		self.assertEqual([i async for i in self.r.r_iter(key, chunk_size=10, convert_to_type='int')], list(range(25)))
+
+	async def test_r_iter_002(self):
+		""" Hashes are read by HSCAN pages as (field, value) pairs """
+		key: str = self.test_r_iter_002.__name__
+		value: dict = {f'field_{i}': i for i in range(25)}
+		AsyncClientTests.original_redis.hset(key, mapping=value)
+		res: list = [item async for item in self.r.r_iter(key, chunk_size=10, convert_to_type='int')]
+		self.assertEqual(len(res), 25)
+		self.assertEqual(dict(res), value)
+
+	async def test_r_get_range_001(self):
+		key: str = self.test_r_get_range_001.__name__
+		await self.r.r_set(key, list(range(10)))
+		self.assertEqual(await self.r.r_get_range(key, 2, 5, convert_to_type='int'), [2, 3, 4])
+		self.assertEqual(await self.r.r_get(key, slice(-2, None), convert_to_type='int'), [8, 9])
+
+	async def test_r_pop_001(self):
+		key: str = self.test_r_pop_001.__name__
+		await self.r.r_set(key, [1, 2, 3])
+		self.assertEqual(await self.r.r_pop(key, convert_to_type='int'), (3,))
+		self.assertEqual(await self.r.r_len(key), 2)
+
+	async def test_insert_value_to_array_001(self):
+		key: str = self.test_insert_value_to_array_001.__name__
+		await self.r.r_set(key, [1, 2, 3])
+		await self.r.insert_value_to_array(key, 0, index=0)
+		self.assertEqual(await self.r.r_get(key, convert_to_type='int'), [0, 1, 2, 3])
+
+	async def test_bulk_insert_values_to_array_001(self):
+		key: str = self.test_bulk_insert_values_to_array_001.__name__
+		await self.r.r_set(key, [1, 2, 3])
+		await self.r.bulk_insert_values_to_array(key, {0: 0, 2: 5, -1: 9})
+		self.assertEqual(await self.r.r_get(key, convert_to_type='int'), [0, 1, 5, 2, 3, 9])
+
+	async def test_r_delete_001(self):
+		key: str = self.test_r_delete_001.__name__
+		await self.r.r_set(key, key)
+		self.assertEqual(await self.r.r_delete(key, returning=True), key)
+		self.assertIsNone(await self.r.r_get(key))
+
+	async def test_r_mass_set_001(self):
+		prefix: str = self.test_r_mass_set_001.__name__
+		keys: tuple = (f'{prefix}_1', f'{prefix}_2')
+		self.assertEqual(await self.r.r_mass_set({keys[0]: 1, keys[1]: [1, 2]}, batch_size=1), keys)
+		self.assertEqual(await self.r.r_get(keys[1], convert_to_type='int'), [1, 2])
+
+	async def test_r_set_dict_001(self):
+		""" A dict in key writes several keys (as PyRedis.r_set) """
+		prefix: str = self.test_r_set_dict_001.__name__
+		self.assertIsNone(await self.r.r_set({f'{prefix}_1': 1, f'{prefix}_2': [2, 3]}, None, time_ms=100_000))
+		self.assertEqual(await self.r.r_get(f'{prefix}_1', convert_to_type='int'), 1)
+		self.assertEqual(await self.r.r_get(f'{prefix}_2', convert_to_type='int'), [2, 3])
+		self.assertTrue(0 < await self.r.get_key_ttl(f'{prefix}_2') <= 100_000)
+
+	async def test_r_mass_get_001(self):
+		prefix: str = self.test_r_mass_get_001.__name__
+		await self.r.r_mass_set({f'{prefix}_1': 1, f'{prefix}_2': {1, 2}})
+		self.assertEqual(
+			await self.r.r_mass_get([f'{prefix}_1', f'{prefix}_2', f'{prefix}_3'], convert_to_type='int'),
+			{f'{prefix}_1': 1, f'{prefix}_2': {1, 2}}
+		)
+
+	async def test_r_mass_delete_001(self):
+		prefix: str = self.test_r_mass_delete_001.__name__
+		keys: list = [f'{prefix}_{i}' for i in range(3)]
+		for i, key in enumerate(keys):
+			await self.r.r_set(key, i)
+		res = await self.r.r_mass_delete(
+			keys + [f'{prefix}_none'], return_exists=True, return_non_exists=True, get_dict_key_value_exists=True,
+			convert_to_type_dict_key='int'
+		)
+		self.assertEqual(res, (tuple(keys), (f'{prefix}_none',), {key: i for i, key in enumerate(keys)}))
+		self.assertFalse(await self.r.exists(keys))
+
+	async def test_r_delete_pattern_001(self):
+		prefix: str = self.test_r_delete_pattern_001.__name__
+		await self.r.r_mass_set({f'{prefix}:{i}': i for i in range(15)})
+		self.assertEqual({key async for key in self.r.r_scan(f'{prefix}:*')}, {f'{prefix}:{i}' for i in range(15)})
+		self.assertEqual(await self.r.r_set_ttl_pattern(f'{prefix}:*', ttl_ms=100_000, count=4), 15)
+		self.assertTrue(0 < await self.r.get_key_ttl(f'{prefix}:0') <= 100_000)
+		self.assertEqual(await self.r.r_delete_pattern(f'{prefix}:*', count=4), 15)
+		self.assertEqual([key async for key in self.r.r_scan(f'{prefix}:*')], [])
+
+	async def test_cached_001(self):
+		calls: list = []
+
+		@self.r.cached(ttl_ms=100_000, convert_to_type='int')
+		async def square(x: int) -> int:
+			calls.append(x)
+			return x * x
+
+		self.assertEqual([await square(2), await square(2), await square(3)], [4, 4, 9])
+		self.assertEqual(calls, [2, 3])
+		self.assertEqual(square.cache_info()['hits'], 1)
+		await square.cache_invalidate(2)
+		self.assertEqual(await square(2), 4)
+		self.assertEqual(await square.cache_clear(), 2)
+		self.assertEqual(calls, [2, 3, 2])
+		with self.assertRaises(TypeError):
+			self.r.cached()(len)
+
+	async def test_r_get_or_set_001(self):
+		key: str = self.test_r_get_or_set_001.__name__
+		calls: list = []
+
+		async def factory() -> int:
+			calls.append(1)
+			await sleep(0.1)
+			return 42
+
+		res = await gather(*(self.r.r_get_or_set(key, factory, convert_to_type='int', poll_interval_ms=10)
+							 for _ in range(10)))
+		self.assertEqual(res, [42] * 10)
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(await self.r.r_get_or_set(f'{key}_sync', lambda: 'a'), 'a')
+
+	async def test_r_get_or_set_002(self):
+		""" Stale-while-revalidate """
+		key: str = self.test_r_get_or_set_002.__name__
+		values: list = [2, 1]
+		self.assertEqual(await self.r.r_get_or_set(key, values.pop, ttl_ms=100, stale_ms=100_000), 1)
+		await sleep(0.15)
+		self.assertEqual(await self.r.r_get_or_set(key, values.pop, ttl_ms=100, stale_ms=100_000), '1')
+		await gather(*self.r.refresh_tasks)
+		self.assertEqual(await self.r.r_get(key), '2')
+
+	async def test_r_get_or_set_003(self):
+		""" aclose waits for the background refresh """
+		key: str = self.test_r_get_or_set_003.__name__
+
+		async def factory() -> str:
+			await sleep(0.1)
+			return 'new'
+
+		await self.r.r_set(key, 'old', time_ms=100_000)
+		self.assertEqual(await self.r.r_get_or_set(key, factory, ttl_ms=100, stale_ms=100_000), 'old')
+		await self.r.aclose()
+		self.assertEqual(AsyncClientTests.original_redis.get(key), b'new')
+
+	async def test_r_get_packed_001(self):
+		""" Packed numeric arrays are read only by PyRedis """
+		key: str = self.test_r_get_packed_001.__name__
+		AsyncClientTests.original_redis.set(key, _pack_numeric_array([1, 2, 3]))
+		with self.assertRaises(PackedArrayNotSupportedError):
+			await self.r.r_get(key)
+		with self.assertRaises(PackedArrayNotSupportedError):
+			await self.r.r_get_range(key, 0, 2)
+		with self.assertRaises(PackedArrayNotSupportedError):
+			await self.r.r_get(key, slice(0, 2))
+		with self.assertRaises(PackedArrayNotSupportedError):
+			await self.r.r_get_or_set(key, lambda: 1, ttl_ms=100, stale_ms=100_000)
+		with self.assertRaises(PackedArrayNotSupportedError):
+			await self.r.r_get_or_set(key, lambda: 1)
+
+	async def test_r_lock_001(self):
+		name: str = self.test_r_lock_001.__name__
+		counter: list = [0]
+
+		async def increment():
+			async with self.r.r_lock(name, ttl_ms=150, poll_interval_ms=5, auto_renewal=True):
+				value: int = counter[0]
+				await sleep(0.01)
+				counter[0] = value + 1
+
+		await gather(*(increment() for _ in range(10)))
+		self.assertEqual(counter[0], 10)
+		self.assertEqual(self.r.lock_info(name)['acquisitions'], 10)
+		with self.assertRaises(TimeoutError):
+			async with self.r.r_lock(name):
+				async with self.r.r_lock(name, blocking_timeout_ms=0):
+					pass
+		self.assertFalse(await self.r.r_lock(name).locked())
+
+	async def test_r_rate_limit_001(self):
+		key: str = self.test_r_rate_limit_001.__name__
+		res: list = await gather(*(self.r.r_rate_limit(key, 5, 100_000, 'sliding_window') for _ in range(8)))
+		self.assertEqual(sum(limit['allowed'] for limit in res), 5)
+		res: dict = await self.r.r_rate_limit_many({key: (5, 100_000), f'{key}_2': (5, 100_000)}, 'sliding_window')
+		self.assertFalse(res['allowed'])
+
+	async def test_set_keys_ttl_001(self):
+		key: str = self.test_set_keys_ttl_001.__name__
+		await self.r.r_set(key, key)
+		await self.r.set_keys_ttl([key], ttl_ms=100_000)
+		self.assertTrue(0 < await self.r.get_key_ttl(key) <= 100_000)
+		await self.r.drop_keys_ttl([key])
+		self.assertEqual(await self.r.get_key_ttl(key), 0)
+
+	async def test_check_keys_and_get_values_001(self):
+		key: str = self.test_check_keys_and_get_values_001.__name__
+		await self.r.r_set(key, 1)
+		self.assertEqual(await self.r.check_keys_and_get_values([key, f'{key}_none'], 'int'), {key: 1})
+
+	async def test_with_001(self):
+		async with AsyncPyRedis(
+				host=REDIS_HOST,
+				port=REDIS_PORT,
+				password=REDIS_PWS,
+				username=REDIS_USERNAME,
+				db=redis_db,
+				socket_timeout=5
+		) as redis_conn:
+			conn = redis_conn
+			self.assertTrue(await redis_conn.r_ping())
+
+		with self.assertRaises(AttributeError):
+			await conn.r_ping()
+
+	async def test_script_flush_001(self):
+		""" After SCRIPT FLUSH from another client the script is loaded again transparently """
+		key: str = self.test_script_flush_001.__name__
+		await self.r.r_set(key, key)
+		AsyncClientTests.original_redis.script_flush()
+		self.assertEqual(await self.r.r_get(key), key)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,122 @@
+"""
+Checking the Redis Functions mode (script_mode='functions'), requires Redis >= 7.0
+"""
+import unittest
+from redis import Redis, ConnectionPool
+from redis.exceptions import ResponseError
+from sys import path as sys_path
+
+from connection_params import REDIS_PWS, REDIS_HOST, REDIS_PORT, REDIS_USERNAME
+sys_path.append('../')
+from pyluaredis.client import PyRedis
+from pyluaredis.helpers import _build_functions_library, _lua_script_names, _redis_function_name
+
+redis_db: int = 9
+
+original_redis = Redis(connection_pool=ConnectionPool(
+	host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5,
+	decode_responses=True
+))
+redis_major_version: int = int(original_redis.info('server')['redis_version'].split('.')[0])
+
+
+class FunctionsLibraryTests(unittest.TestCase):
+	""" The library is built from the scripts without a connection to Redis """
+
+	def test_library_001(self):
+		library_code, version = _build_functions_library()
+		self.assertTrue(library_code.startswith('#!lua name=pyluaredis'))
+		self.assertIn(version, library_code)
+		for script_name in _lua_script_names():
+			self.assertIn(f"function_name = '{_redis_function_name(script_name)}'", library_code)
+
+	def test_library_002(self):
+		self.assertEqual(_build_functions_library(), _build_functions_library())
+
+	def test_script_mode_001(self):
+		with self.assertRaises(ValueError):
+			PyRedis(host='unknown', script_mode='unknown')
+
+
+@unittest.skipIf(redis_major_version < 7, 'Redis Functions require Redis >= 7.0')
+class FunctionsModeTests(unittest.TestCase):
+	"""
+	Library methods called by FCALL/FCALL_RO
+	"""
+	# def setUp(self):
+	# 	self.maxDiff = None
+
+	@classmethod
+	def setUpClass(cls):
+		original_redis.flushdb()  # clear the database before tests
+		original_redis.function_flush()
+		cls.r = PyRedis(
+			host=REDIS_HOST,
+			port=REDIS_PORT,
+			password=REDIS_PWS,
+			username=REDIS_USERNAME,
+			db=redis_db,
+			socket_timeout=5,
+			script_mode='functions'
+		)
+
+	@classmethod
+	def tearDownClass(cls):
+		original_redis.flushdb()  # clear the database after tests
+		original_redis.function_flush()
+
+	def test_library_loaded_001(self):
+		self.assertEqual(original_redis.fcall_ro(_redis_function_name('version'), 0), _build_functions_library()[1])
+		self.assertEqual(FunctionsModeTests.r.lua_scripts_sha, {})
+
+	def test_library_loaded_002(self):
+		""" Only read-only functions (flagged 'no-writes') can be called by FCALL_RO """
+		key: str = self.test_library_loaded_002.__name__
+		self.assertEqual(original_redis.fcall_ro(_redis_function_name('r_len'), 1, key), None)
+		with self.assertRaises(ResponseError):
+			original_redis.fcall_ro(_redis_function_name('drop_keys_ttl'), 1, key)
+
+	def test_set_get_001(self):
+		key: str = self.test_set_get_001.__name__
+		FunctionsModeTests.r.r_set(key, [1, 2, 3])
+		self.assertEqual(FunctionsModeTests.r.r_get(key, convert_to_type='int'), [1, 2, 3])
+		self.assertEqual(FunctionsModeTests.r.r_len(key), 3)
+		self.assertEqual(FunctionsModeTests.r.r_pop(key, convert_to_type='int'), (3,))
+		self.assertEqual(FunctionsModeTests.r.r_delete(key, returning=True, convert_to_type_for_return='int'), [1, 2])
+
+	def test_set_get_002(self):
+		""" The library is loaded again after FUNCTION FLUSH """
+		key: str = self.test_set_get_002.__name__
+		FunctionsModeTests.r.r_set(key, key)
+		original_redis.function_flush()
+		self.assertEqual(FunctionsModeTests.r.r_get(key), key)
+
+	def test_batch_001(self):
+		key: str = self.test_batch_001.__name__
+		with FunctionsModeTests.r.batch() as batch:
+			batch.r_set(key, {1, 2})
+			batch.r_get(key, convert_to_type='int')
+		self.assertEqual(batch.results, [None, {1, 2}])
+
+	def test_upgrade_001(self):
+		""" A library with a different version is replaced """
+		original_redis.function_load(
+			"#!lua name=pyluaredis\n"
+			"redis.register_function{function_name='pyluaredis_version', callback=function() return 'old' end, "
+			"flags={'no-writes'}}",
+			replace=True
+		)
+		PyRedis(
+			host=REDIS_HOST,
+			port=REDIS_PORT,
+			password=REDIS_PWS,
+			username=REDIS_USERNAME,
+			db=redis_db,
+			socket_timeout=5,
+			script_mode='functions'
+		)
+		self.assertEqual(original_redis.fcall_ro('pyluaredis_version', 0), _build_functions_library()[1])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,142 @@
+"""
+Checking the near cache (PyRedis(near_cache=True)), requires Redis >= 6.0 (CLIENT TRACKING)
+"""
+import unittest
+from time import sleep
+from redis import Redis, ConnectionPool
+from sys import path as sys_path
+
+from connection_params import REDIS_PWS, REDIS_HOST, REDIS_PORT, REDIS_USERNAME
+sys_path.append('../')
+from pyluaredis.client import PyRedis
+
+redis_db: int = 10
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+	""" Invalidation messages are delivered asynchronously """
+	for _ in range(int(timeout / 0.01)):
+		if condition():
+			return True
+		sleep(0.01)
+	return condition()
+
+
+class NearCacheTests(unittest.TestCase):
+	"""
+	Values read by r_get are cached in the process and invalidated by the server
+	"""
+	# def setUp(self):
+	# 	self.maxDiff = None
+
+	r = PyRedis(
+		host=REDIS_HOST,
+		port=REDIS_PORT,
+		password=REDIS_PWS,
+		username=REDIS_USERNAME,
+		db=redis_db,
+		socket_timeout=5,
+		near_cache=True
+	)
+
+	original_redis = Redis(connection_pool=ConnectionPool(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5,
+		decode_responses=True
+	))
+
+	@classmethod
+	def setUpClass(cls):
+		NearCacheTests.original_redis.flushdb()  # clear the database before tests
+
+	@classmethod
+	def tearDownClass(cls):
+		NearCacheTests.original_redis.flushdb()  # clear the database after tests
+
+	def test_near_cache_info_001(self):
+		self.assertTrue(NearCacheTests.r.near_cache_info()['active'])
+		self.assertIsNone(PyRedis(host='unknown', preload_lua_scripts=False).near_cache_info())
+
+	def test_near_cache_001(self):
+		""" The second read is served from the cache """
+		key: str = self.test_near_cache_001.__name__
+		NearCacheTests.r.r_set(key, 1)
+		# an invalidation message delivered during the read (e.g. about the write itself) prevents the caching,
+		# so the key is read until its value is cached
+		self.assertTrue(wait_for(lambda: NearCacheTests.r.r_get(key, convert_to_type='int') == 1
+								 and key in NearCacheTests.r.near_cache.values))
+		hits: int = NearCacheTests.r.near_cache_info()['hits']
+		self.assertEqual(NearCacheTests.r.r_get(key, convert_to_type='int'), 1)
+		self.assertEqual(NearCacheTests.r.near_cache_info()['hits'], hits + 1)
+
+	def test_near_cache_002(self):
+		""" Changes made by another client invalidate the cached value """
+		key: str = self.test_near_cache_002.__name__
+		NearCacheTests.r.r_set(key, 'old')
+		self.assertEqual(NearCacheTests.r.r_get(key), 'old')
+		NearCacheTests.original_redis.set(key, 'new')
+		self.assertTrue(wait_for(lambda: NearCacheTests.r.r_get(key) == 'new'))
+
+	def test_near_cache_003(self):
+		""" Changes made by the client itself are visible at once """
+		key: str = self.test_near_cache_003.__name__
+		NearCacheTests.r.r_set(key, [1, 2, 3])
+		self.assertEqual(NearCacheTests.r.r_get(key, convert_to_type='int'), [1, 2, 3])
+		NearCacheTests.r.insert_value_to_array(key, 4)
+		self.assertEqual(NearCacheTests.r.r_get(key, convert_to_type='int'), [1, 2, 3, 4])
+		NearCacheTests.r.r_pop(key)
+		self.assertEqual(NearCacheTests.r.r_get(key, convert_to_type='int'), [1, 2, 3])
+		NearCacheTests.r.r_delete(key)
+		self.assertIsNone(NearCacheTests.r.r_get(key))
+
+	def test_near_cache_004(self):
+		""" The cached list cannot be changed by the caller """
+		key: str = self.test_near_cache_004.__name__
+		NearCacheTests.r.r_set(key, ['a', 'b'])
+		NearCacheTests.r.r_get(key).append('c')
+		self.assertEqual(NearCacheTests.r.r_get(key), ['a', 'b'])
+
+	def test_near_cache_005(self):
+		""" The cached value does not outlive the key ttl """
+		key: str = self.test_near_cache_005.__name__
+		NearCacheTests.r.r_set(key, key, time_ms=50)
+		self.assertEqual(NearCacheTests.r.r_get(key), key)
+		sleep(0.1)
+		self.assertIsNone(NearCacheTests.r.r_get(key))
+
+	def test_near_cache_006(self):
+		key: str = self.test_near_cache_006.__name__
+		NearCacheTests.r.r_set(key, 1)
+		NearCacheTests.r.r_get(key)
+		with NearCacheTests.r.batch() as batch:
+			batch.r_set(key, 2)
+		self.assertEqual(NearCacheTests.r.r_get(key, convert_to_type='int'), 2)
+
+	def test_check_keys_and_get_values_001(self):
+		key: str = self.test_check_keys_and_get_values_001.__name__
+		NearCacheTests.r.r_set(key, 1)
+		NearCacheTests.r.r_set(f'{key}_list', [1])
+		NearCacheTests.r.r_get(key)
+		NearCacheTests.r.r_get(f'{key}_list')
+		self.assertEqual(
+			NearCacheTests.r.check_keys_and_get_values([key, f'{key}_list', f'{key}_none'], 'int'), {key: 1}
+		)
+
+	def test_r_mass_get_001(self):
+		key: str = self.test_r_mass_get_001.__name__
+		NearCacheTests.r.r_set(key, [1, 2])
+		NearCacheTests.r.r_set(f'{key}_2', 3)
+		NearCacheTests.r.r_get(key)
+		self.assertEqual(
+			NearCacheTests.r.r_mass_get([key, f'{key}_2'], 'int'), {key: [1, 2], f'{key}_2': 3}
+		)
+
+	def test_r_mass_delete_001(self):
+		key: str = self.test_r_mass_delete_001.__name__
+		NearCacheTests.r.r_set(key, key)
+		NearCacheTests.r.r_get(key)
+		NearCacheTests.r.r_mass_delete([key])
+		self.assertIsNone(NearCacheTests.r.r_get(key))
+
+
+if __name__ == '__main__':
+	unittest.main()
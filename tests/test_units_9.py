@@ -0,0 +1,517 @@
+"""
+Checking the value encodings: typed values (PyRedis(typed_values=True)), raw bytes (PyRedis(raw_bytes=True)),
+packed numeric arrays (r_set_packed), compression (PyRedis(compression='zlib'))
+"""
+import unittest
+from array import array
+from base64 import b64encode
+from os import urandom
+from redis import Redis, ConnectionPool
+from sys import path as sys_path
+
+from connection_params import REDIS_PWS, REDIS_HOST, REDIS_PORT, REDIS_USERNAME
+sys_path.append('../')
+from pyluaredis.client import PyRedis
+from pyluaredis.exceptions import PackedArrayNotSupportedError, TypedValuesNotSupportedError
+
+redis_db: int = 11
+
+
+class TypedValuesTests(unittest.TestCase):
+	"""
+	Values are returned with the type they were written with, without convert_to_type
+	"""
+	# def setUp(self):
+	# 	self.maxDiff = None
+
+	r = PyRedis(
+		host=REDIS_HOST,
+		port=REDIS_PORT,
+		password=REDIS_PWS,
+		username=REDIS_USERNAME,
+		db=redis_db,
+		socket_timeout=5,
+		typed_values=True
+	)
+
+	original_redis = Redis(connection_pool=ConnectionPool(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5,
+		decode_responses=True
+	))
+
+	@classmethod
+	def setUpClass(cls):
+		TypedValuesTests.original_redis.flushdb()  # clear the database before tests
+
+	@classmethod
+	def tearDownClass(cls):
+		TypedValuesTests.original_redis.flushdb()  # clear the database after tests
+
+	def test_set_get_001(self):
+		key: str = self.test_set_get_001.__name__
+		for value in (1, -1.5, True, False, 0, 'text', '1', b'\x00\xff'):
+			TypedValuesTests.r.r_set(key, value)
+			res = TypedValuesTests.r.r_get(key)
+			self.assertEqual(res, value)
+			self.assertIs(type(res), type(value))
+
+	def test_set_get_002(self):
+		key: str = self.test_set_get_002.__name__
+		for value in ([1, 'a', 2.5, True], (1, 2, 3), {1, '1', 2.5}, frozenset(('a', 'b'))):
+			TypedValuesTests.r.r_set(key, value)
+			res = TypedValuesTests.r.r_get(key)
+			self.assertEqual(res, value)
+			self.assertIs(type(res), type(value))
+
+	def test_set_get_003(self):
+		""" Values written by other clients are returned as before """
+		key: str = self.test_set_get_003.__name__
+		TypedValuesTests.original_redis.set(key, '123')
+		self.assertEqual(TypedValuesTests.r.r_get(key), '123')
+		self.assertEqual(TypedValuesTests.r.r_get(key, convert_to_type='int'), 123)
+
+	def test_set_get_004(self):
+		key: str = self.test_set_get_004.__name__
+		TypedValuesTests.r.r_set(key, (1, 2))
+		self.assertEqual(TypedValuesTests.r.r_set(key, 3, get_old_value=True), (1, 2))
+		self.assertEqual(TypedValuesTests.r.r_get(key), 3)
+
+	def test_insert_value_to_array_001(self):
+		""" The added element does not change the type of the array """
+		key: str = self.test_insert_value_to_array_001.__name__
+		TypedValuesTests.r.r_set(key, (1, 2))
+		TypedValuesTests.r.insert_value_to_array(key, 0, index=0)
+		self.assertEqual(TypedValuesTests.r.r_get(key), (0, 1, 2))
+
+	def test_insert_value_to_array_002(self):
+		key: str = self.test_insert_value_to_array_002.__name__
+		TypedValuesTests.r.insert_value_to_array(key, 1.5, type_if_not_exists='set')
+		self.assertEqual(TypedValuesTests.r.r_get(key), {1.5})
+
+	def test_r_iter_001(self):
+		key: str = self.test_r_iter_001.__name__
+		TypedValuesTests.r.r_set(key, (1, 'a', 2.5, True))
+		self.assertEqual(list(TypedValuesTests.r.r_iter(key, chunk_size=3)), [1, 'a', 2.5, True])
+
+	def test_r_get_range_001(self):
+		key: str = self.test_r_get_range_001.__name__
+		TypedValuesTests.r.r_set(key, (1, 'a', 2.5, True))
+		self.assertEqual(TypedValuesTests.r.r_get_range(key, 1, 3), ('a', 2.5))
+
+	def test_r_set_iter_001(self):
+		key: str = self.test_r_set_iter_001.__name__
+		TypedValuesTests.r.r_set_iter(key, iter([1, 'a', 2.5]), array_type=tuple, chunk_size=2)
+		self.assertEqual(TypedValuesTests.r.r_get(key), (1, 'a', 2.5))
+
+	def test_hash_001(self):
+		key: str = self.test_hash_001.__name__
+		value: dict = {'a': 1, 'b': 2.5, 'c': True, 'd': 'x', 'e': b'\x00'}
+		TypedValuesTests.r.r_set(key, value)
+		self.assertEqual(TypedValuesTests.r.r_get(key), value)
+		TypedValuesTests.r.r_hset(key, {'a': 5})
+		self.assertEqual(TypedValuesTests.r.r_hget(key, ['a', 'c']), {'a': 5, 'c': True})
+
+	def test_hash_002(self):
+		""" Fields with type tags cannot be incremented by Redis """
+		key: str = self.test_hash_002.__name__
+		TypedValuesTests.r.r_hset(key, {'x': 1})
+		with self.assertRaises(TypedValuesNotSupportedError):
+			TypedValuesTests.r.r_hincr(key, 'x', 1)
+		self.assertEqual(TypedValuesTests.r.r_hget(key, 'x'), 1)
+
+	def test_r_mass_set_001(self):
+		key: str = self.test_r_mass_set_001.__name__
+		TypedValuesTests.r.r_mass_set({key: (1, 'a'), f'{key}_2': 2.5})
+		self.assertEqual(TypedValuesTests.r.r_get(key), (1, 'a'))
+		self.assertEqual(TypedValuesTests.r.r_get(f'{key}_2'), 2.5)
+
+	def test_r_mass_get_001(self):
+		key: str = self.test_r_mass_get_001.__name__
+		TypedValuesTests.r.r_mass_set({key: (1, 'a'), f'{key}_2': 2.5, f'{key}_3': {'f': True}})
+		self.assertEqual(
+			TypedValuesTests.r.r_mass_get([key, f'{key}_2', f'{key}_3']),
+			{key: (1, 'a'), f'{key}_2': 2.5, f'{key}_3': {'f': True}}
+		)
+
+	def test_bulk_insert_values_to_array_001(self):
+		key: str = self.test_bulk_insert_values_to_array_001.__name__
+		TypedValuesTests.r.r_set(key, (1, 2))
+		TypedValuesTests.r.bulk_insert_values_to_array(key, {0: True, 2: 'x', -1: 2.5})
+		self.assertEqual(TypedValuesTests.r.r_get(key), (True, 1, 'x', 2, 2.5))
+
+	def test_r_pop_001(self):
+		key: str = self.test_r_pop_001.__name__
+		TypedValuesTests.r.r_set(key, [1, 2.5, 'a'])
+		self.assertEqual(TypedValuesTests.r.r_pop(key, count=2), ('a', 2.5))
+
+	def test_r_delete_001(self):
+		key: str = self.test_r_delete_001.__name__
+		TypedValuesTests.r.r_set(key, frozenset((1, 2)))
+		self.assertEqual(TypedValuesTests.r.r_delete(key, returning=True), frozenset((1, 2)))
+
+	def test_r_mass_delete_001(self):
+		key: str = self.test_r_mass_delete_001.__name__
+		TypedValuesTests.r.r_set(key, 1)
+		TypedValuesTests.r.r_set(f'{key}_set', {1, 2})
+		self.assertEqual(
+			TypedValuesTests.r.r_mass_delete([key, f'{key}_set'], get_dict_key_value_exists=True)[2],
+			{key: 1, f'{key}_set': {1, 2}}
+		)
+
+	def test_check_keys_and_get_values_001(self):
+		key: str = self.test_check_keys_and_get_values_001.__name__
+		TypedValuesTests.r.r_set(key, 2.5)
+		self.assertEqual(TypedValuesTests.r.check_keys_and_get_values([key]), {key: 2.5})
+
+	def test_batch_001(self):
+		key: str = self.test_batch_001.__name__
+		with TypedValuesTests.r.batch() as batch:
+			batch.r_set(key, (True, 1))
+			batch.r_get(key)
+		self.assertEqual(batch.results, [None, (True, 1)])
+
+	def test_unsupported_elements_001(self):
+		""" Elements of arrays and values of hashes that have no type tag are rejected before writing """
+		key: str = self.test_unsupported_elements_001.__name__
+		for value in ([1, None], {1, None}, (1, [2]), {'a': None}, {'a': [1]}, {'a': 1, 'b': {'c': 2}}):
+			with self.assertRaises(TypeError):
+				TypedValuesTests.r.r_set(key, value)
+			self.assertFalse(TypedValuesTests.original_redis.exists(key))
+
+
+class RawBytesTests(unittest.TestCase):
+	"""
+	Bytes are written without the hex encoding and read by the non-decoding connection pool
+	"""
+	# def setUp(self):
+	# 	self.maxDiff = None
+
+	r = PyRedis(
+		host=REDIS_HOST,
+		port=REDIS_PORT,
+		password=REDIS_PWS,
+		username=REDIS_USERNAME,
+		db=redis_db,
+		socket_timeout=5,
+		raw_bytes=True
+	)
+
+	r_typed = PyRedis(
+		host=REDIS_HOST,
+		port=REDIS_PORT,
+		password=REDIS_PWS,
+		username=REDIS_USERNAME,
+		db=redis_db,
+		socket_timeout=5,
+		typed_values=True,
+		raw_bytes=True
+	)
+
+	original_redis = Redis(connection_pool=ConnectionPool(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5
+	))
+
+	@classmethod
+	def setUpClass(cls):
+		RawBytesTests.original_redis.flushdb()  # clear the database before tests
+
+	@classmethod
+	def tearDownClass(cls):
+		RawBytesTests.original_redis.flushdb()  # clear the database after tests
+
+	def test_r_iter_001(self):
+		key: str = self.test_r_iter_001.__name__
+		value: list = [b'\x00\xff', b'\x80', b'a']
+		RawBytesTests.r.r_set(key, value)
+		self.assertEqual(list(RawBytesTests.r.r_iter(key, chunk_size=2)), RawBytesTests.r.r_get(key))
+		self.assertEqual(list(RawBytesTests.r.r_iter(key, chunk_size=2, convert_to_type='bytes')), value)
+
+	def test_r_mass_delete_001(self):
+		""" Binary values are returned without the JSON round trip """
+		key: str = self.test_r_mass_delete_001.__name__
+		RawBytesTests.r.r_set(key, b'\xff\x00')
+		RawBytesTests.r.r_set(f'{key}_2', {b'\xfe', b'\xfd'})
+		self.assertEqual(
+			RawBytesTests.r.r_mass_delete([key, f'{key}_2'], get_dict_key_value_exists=True)[2],
+			{key: b'\xff\x00', f'{key}_2': {b'\xfe', b'\xfd'}}
+		)
+
+	def test_raw_bytes_001(self):
+		key: str = self.test_raw_bytes_001.__name__
+		value: bytes = bytes(range(256))
+		RawBytesTests.r.r_set(key, value)
+		self.assertEqual(RawBytesTests.original_redis.get(key), value)  # without the hex encoding
+		self.assertEqual(RawBytesTests.r.r_get(key, convert_to_type='bytes'), value)
+		self.assertEqual(RawBytesTests.r.r_get(key), value)  # not UTF-8
+
+	def test_raw_bytes_002(self):
+		""" Other values are decoded as usual """
+		key: str = self.test_raw_bytes_002.__name__
+		RawBytesTests.r.r_set(key, 'text')
+		self.assertEqual(RawBytesTests.r.r_get(key), 'text')
+		self.assertEqual(RawBytesTests.r.r_get(key, convert_to_type='bytes'), b'text')
+		RawBytesTests.r.r_set(key, [1, 2])
+		self.assertEqual(RawBytesTests.r.r_get(key, convert_to_type='int'), [1, 2])
+
+	def test_raw_bytes_003(self):
+		key: str = self.test_raw_bytes_003.__name__
+		RawBytesTests.r.r_set(key, {b'\xff\x00', b'\xfe'})
+		self.assertEqual(RawBytesTests.r.r_get(key, convert_to_type='bytes'), {b'\xff\x00', b'\xfe'})
+		self.assertEqual(RawBytesTests.r.r_pop(key, count=2, convert_to_type='bytes').__len__(), 2)
+
+	def test_raw_bytes_004(self):
+		key: str = self.test_raw_bytes_004.__name__
+		RawBytesTests.r.r_set(key, b'\xff')
+		self.assertEqual(RawBytesTests.r.r_delete(key, returning=True, convert_to_type_for_return='bytes'), b'\xff')
+
+	def test_raw_bytes_005(self):
+		key: str = self.test_raw_bytes_005.__name__
+		RawBytesTests.r.r_set(key, b'\xff')
+		self.assertEqual(RawBytesTests.r.check_keys_and_get_values([key], 'bytes'), {key: b'\xff'})
+
+	def test_raw_bytes_typed_001(self):
+		key: str = self.test_raw_bytes_typed_001.__name__
+		for value in (b'\xff\x00', b'text', (b'\xff', 1, 'a')):
+			RawBytesTests.r_typed.r_set(key, value)
+			self.assertEqual(RawBytesTests.r_typed.r_get(key), value)
+
+	def test_batch_001(self):
+		key: str = self.test_batch_001.__name__
+		with RawBytesTests.r.batch() as batch:
+			batch.r_set(key, b'\xff')
+			batch.r_get(key, convert_to_type='bytes')
+			batch.r_len(key)
+		self.assertEqual(batch.results, [None, b'\xff', 0])
+
+
+class PackedArrayTests(unittest.TestCase):
+	"""
+	Numeric sequences are written as one binary string and read by ranges
+	"""
+	# def setUp(self):
+	# 	self.maxDiff = None
+
+	r = PyRedis(
+		host=REDIS_HOST,
+		port=REDIS_PORT,
+		password=REDIS_PWS,
+		username=REDIS_USERNAME,
+		db=redis_db,
+		socket_timeout=5
+	)
+
+	original_redis = Redis(connection_pool=ConnectionPool(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5
+	))
+
+	@classmethod
+	def setUpClass(cls):
+		PackedArrayTests.original_redis.flushdb()  # clear the database before tests
+
+	@classmethod
+	def tearDownClass(cls):
+		PackedArrayTests.original_redis.flushdb()  # clear the database after tests
+
+	def test_packed_001(self):
+		key: str = self.test_packed_001.__name__
+		value: list = list(range(1_000_000))
+		PackedArrayTests.r.r_set_packed(key, value)
+		self.assertEqual(PackedArrayTests.original_redis.strlen(key), 4 + 8 * len(value))
+		res = PackedArrayTests.r.r_get_packed(key)
+		self.assertIsInstance(res, array)
+		self.assertEqual(res.typecode, 'q')
+		self.assertEqual(res.tolist(), value)
+
+	def test_packed_002(self):
+		key: str = self.test_packed_002.__name__
+		value: list = [0.5, -1.25, 3.0]
+		PackedArrayTests.r.r_set_packed(key, value)
+		self.assertEqual(PackedArrayTests.r.r_get_packed(key, as_list=True), value)
+		self.assertEqual(PackedArrayTests.r.r_get(key).tolist(), value)
+		self.assertEqual(list(PackedArrayTests.r.r_iter(key)), value)
+
+	def test_packed_003(self):
+		""" Ranges as in Python slices """
+		key: str = self.test_packed_003.__name__
+		value: list = list(range(100))
+		PackedArrayTests.r.r_set_packed(key, array('h', value))
+		for start, stop in ((0, 10), (10, 20), (-5, None), (95, 200), (50, 40), (-200, 3), (0, -90)):
+			self.assertEqual(PackedArrayTests.r.r_get_packed(key, start, stop, as_list=True), value[start:stop])
+
+	def test_packed_004(self):
+		key: str = self.test_packed_004.__name__
+		self.assertIsNone(PackedArrayTests.r.r_get_packed(key))
+		PackedArrayTests.r.r_set(key, 'text')
+		self.assertIsNone(PackedArrayTests.r.r_get_packed(key))
+		with self.assertRaises(ValueError):
+			PackedArrayTests.r.r_set_packed(key, [1], typecode='l')
+
+	def test_packed_005(self):
+		key: str = self.test_packed_005.__name__
+		PackedArrayTests.r.r_set_packed(key, [1, 2], time_ms=100_000)
+		self.assertTrue(0 < PackedArrayTests.r.get_key_ttl(key) <= 100_000)
+		PackedArrayTests.r.r_set_packed(key, [3], if_not_exist=True)
+		self.assertEqual(PackedArrayTests.r.r_get_packed(key, as_list=True), [1, 2])
+
+	def test_packed_006(self):
+		""" Generators are accepted (the type of the elements is checked before packing) """
+		key: str = self.test_packed_006.__name__
+		PackedArrayTests.r.r_set_packed(key, (i * 2 for i in range(10)))
+		res = PackedArrayTests.r.r_get_packed(key)
+		self.assertEqual(res.typecode, 'q')
+		self.assertEqual(res.tolist(), list(range(0, 20, 2)))
+		PackedArrayTests.r.r_set_packed(key, (i / 2 for i in range(3)))
+		self.assertEqual(PackedArrayTests.r.r_get_packed(key, as_list=True), [0.0, 0.5, 1.0])
+
+	def test_packed_007(self):
+		""" A batch does not read packed numeric arrays """
+		key: str = self.test_packed_007.__name__
+		PackedArrayTests.r.r_set_packed(key, [1, 2])
+		with self.assertRaises(PackedArrayNotSupportedError):
+			with PackedArrayTests.r.batch() as batch:
+				batch.r_get(key)
+		with self.assertRaises(PackedArrayNotSupportedError):
+			with PackedArrayTests.r.batch() as batch:
+				batch.r_get_range(key, 0, 1)
+
+
+class CompressionTests(unittest.TestCase):
+	"""
+	Values larger than the threshold are compressed on writing and decompressed on reading
+	"""
+	# def setUp(self):
+	# 	self.maxDiff = None
+
+	r = PyRedis(
+		host=REDIS_HOST,
+		port=REDIS_PORT,
+		password=REDIS_PWS,
+		username=REDIS_USERNAME,
+		db=redis_db,
+		socket_timeout=5,
+		compression='zlib',
+		compression_threshold=100
+	)
+
+	r_raw = PyRedis(
+		host=REDIS_HOST,
+		port=REDIS_PORT,
+		password=REDIS_PWS,
+		username=REDIS_USERNAME,
+		db=redis_db,
+		socket_timeout=5,
+		compression='lzma',
+		compression_threshold=100,
+		typed_values=True,
+		raw_bytes=True
+	)
+
+	original_redis = Redis(connection_pool=ConnectionPool(
+		host=REDIS_HOST, port=REDIS_PORT, db=redis_db, password=REDIS_PWS, username=REDIS_USERNAME, socket_timeout=5
+	))
+
+	@classmethod
+	def setUpClass(cls):
+		CompressionTests.original_redis.flushdb()  # clear the database before tests
+
+	@classmethod
+	def tearDownClass(cls):
+		CompressionTests.original_redis.flushdb()  # clear the database after tests
+
+	def test_compression_001(self):
+		key: str = self.test_compression_001.__name__
+		value: str = 'abc' * 1_000
+		CompressionTests.r.r_set(key, value)
+		self.assertLess(CompressionTests.original_redis.strlen(key), len(value) // 10)
+		self.assertEqual(CompressionTests.r.r_get(key), value)
+
+	def test_compression_002(self):
+		""" Values smaller than the threshold are not compressed """
+		key: str = self.test_compression_002.__name__
+		CompressionTests.r.r_set(key, 'abc')
+		self.assertEqual(CompressionTests.original_redis.get(key), b'abc')
+		CompressionTests.r.r_set(key, 'abc' * 30, compress=True)
+		self.assertLess(CompressionTests.original_redis.strlen(key), 90)
+		self.assertEqual(CompressionTests.r.r_get(key), 'abc' * 30)
+		CompressionTests.r.r_set(key, 'abc' * 1_000, compress=False)
+		self.assertEqual(CompressionTests.original_redis.strlen(key), 3_000)
+
+	def test_compression_003(self):
+		key: str = self.test_compression_003.__name__
+		value: list = ['a' * 1_000, 'b', str(10 ** 200)]
+		CompressionTests.r.r_set(key, value)
+		self.assertEqual(CompressionTests.r.r_get(key), value)
+		CompressionTests.r.r_set(key, set(value))
+		self.assertEqual(CompressionTests.r.r_get(key), set(value))
+
+	def test_compression_hash_001(self):
+		key: str = self.test_compression_hash_001.__name__
+		value: dict = {'text': 'a' * 1_000, 'n': '1'}
+		CompressionTests.r.r_set(key, value)
+		self.assertLess(CompressionTests.original_redis.hstrlen(key, 'text'), 1_000)
+		self.assertEqual(CompressionTests.r.r_get(key), value)
+		CompressionTests.r.r_hset(key, {'n': 'b' * 1_000})
+		self.assertEqual(CompressionTests.r.r_hget(key, 'n'), 'b' * 1_000)
+
+	def test_compression_004(self):
+		key: str = self.test_compression_004.__name__
+		value: str = 'x' * 10_000
+		CompressionTests.r.r_set(key, value)
+		CompressionTests.r.r_set(f'{key}_2', 1)
+		self.assertEqual(CompressionTests.r.r_delete(key, returning=True), value)
+		CompressionTests.r.r_set(key, value)
+		self.assertEqual(
+			CompressionTests.r.r_mass_delete([key, f'{key}_2'], get_dict_key_value_exists=True)[2],
+			{key: value, f'{key}_2': '1'}
+		)
+
+	def test_compression_005(self):
+		""" Binary compressed data in the raw_bytes mode, with typed values """
+		key: str = self.test_compression_005.__name__
+		for value in (b'\xff' * 1_000, 'text' * 1_000, (1, 'a' * 1_000, b'\x00' * 1_000)):
+			CompressionTests.r_raw.r_set(key, value)
+			self.assertEqual(CompressionTests.r_raw.r_get(key), value)
+
+	def test_compression_info_001(self):
+		key: str = self.test_compression_info_001.__name__
+		info: dict = CompressionTests.r.compression_info()
+		CompressionTests.r.r_set(key, 'a' * 1_000)
+		CompressionTests.r.r_get(key)
+		new_info: dict = CompressionTests.r.compression_info()
+		self.assertEqual(new_info['compressed'], info['compressed'] + 1)
+		self.assertEqual(new_info['decompressed'], info['decompressed'] + 1)
+		self.assertGreater(new_info['ratio'], 1)
+
+	def test_compression_info_002(self):
+		""" Random data is stored as is, since its compressed value would be larger """
+		key: str = self.test_compression_info_002.__name__
+		value: bytes = urandom(10_000)
+		info: dict = CompressionTests.r_raw.compression_info()
+		CompressionTests.r_raw.r_set(key, value)
+		self.assertEqual(CompressionTests.r_raw.r_get(key), value)
+		self.assertTrue(CompressionTests.original_redis.get(key).endswith(value))  # after the type tag
+		new_info: dict = CompressionTests.r_raw.compression_info()
+		self.assertEqual(new_info['compressed'], info['compressed'])
+		self.assertEqual(new_info['incompressible'], info['incompressible'] + 1)
+		self.assertEqual(new_info['stored_bytes'], info['stored_bytes'])
+		# base64 text of random bytes (the compressed data would be encoded with base64 again)
+		value: str = b64encode(value).decode('ascii')
+		CompressionTests.r.r_set(key, value)
+		self.assertEqual(CompressionTests.original_redis.get(key), value.encode('ascii'))
+		CompressionTests.r.r_set(key, 'abc', compress=True)
+		self.assertEqual(CompressionTests.original_redis.get(key), b'abc')
+
+	def test_compression_wrong_001(self):
+		with self.assertRaises(ValueError):
+			PyRedis(host='unknown', preload_lua_scripts=False, compression='gzip')
+
+	def test_batch_001(self):
+		key: str = self.test_batch_001.__name__
+		with CompressionTests.r.batch() as batch:
+			batch.r_set(key, 'a' * 1_000)
+			batch.r_get(key)
+		self.assertEqual(batch.results, [None, 'a' * 1_000])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -4,7 +4,11 @@ from string import ascii_letters, digits
 from sys import path as sys_path
 
 sys_path.append('../')
-from pyluaredis.helpers import _compare_and_select_sec_ms, _remove_duplicates
+from pyluaredis.helpers import (
+	_compare_and_select_sec_ms, _remove_duplicates, _group_keys_by_slot, _merge_mass_delete_results,
+	_parse_mass_delete_reply, _should_refresh, _lease_key,
+	_parse_rate_limit_reply
+)
 
 
 class PrivateStaticFuncTests(unittest.TestCase):
@@ -155,6 +159,80 @@ class PrivateStaticFuncTests(unittest.TestCase):
 		res = _remove_duplicates(arr)
 		self.assertEqual(res, tuple(set(arr)))
 
+	# _group_keys_by_slot ##############################################################################################
+
+	def test_group_keys_by_slot_001(self):
+		res = _group_keys_by_slot(('{user1}:a', '{user1}:b', '{user2}:a'))
+		self.assertEqual(len(res), 2)
+		self.assertIn(('{user1}:a', '{user1}:b'), res.values())
+		self.assertIn(('{user2}:a',), res.values())
+
+	def test_group_keys_by_slot_002(self):
+		keys: tuple = tuple(self.get_random_string() + str(i) for i in range(100))
+		res = _group_keys_by_slot(keys)
+		self.assertEqual(sorted(key for slot_keys in res.values() for key in slot_keys), sorted(keys))
+		self.assertTrue(all(0 <= slot < 16384 for slot in res))
+
+	def test_group_keys_by_slot_003(self):
+		self.assertEqual(_group_keys_by_slot(()), {})
+
+	# _merge_mass_delete_results #######################################################################################
+
+	def test_merge_mass_delete_results_001(self):
+		res = _merge_mass_delete_results([(('c',), ('d',), {'c': '1'}), (('a', 'b'), (), {'a': '2', 'b': '3'})])
+		self.assertEqual(res, (('a', 'b', 'c'), ('d',), {'a': '2', 'b': '3', 'c': '1'}))
+
+	def test_merge_mass_delete_results_002(self):
+		self.assertEqual(_merge_mass_delete_results([]), ((), (), {}))
+
+	# _parse_mass_delete_reply #########################################################################################
+
+	def test_parse_mass_delete_reply_001(self):
+		keys: tuple = ('a', 'b', 'c', 'd')
+		res: list = [1, 'string', '1', 2, 'set', ['x'], 4, 'hash', ['f', 'v']]
+		self.assertEqual(_parse_mass_delete_reply(keys, res), {'a': '1', 'b': {'x'}, 'd': {'f': 'v'}})
+
+	def test_parse_mass_delete_reply_002(self):
+		""" Reply of the non-decoding client, values were not requested """
+		res: list = [1, b'list', b'\xff', 2, b'string', None]
+		self.assertEqual(_parse_mass_delete_reply(('a', 'b'), res, decode=True), {'a': b'\xff', 'b': None})
+
+
+	# _should_refresh ##################################################################################################
+
+	def test_should_refresh_001(self):
+		self.assertFalse(_should_refresh(-1, 1_000))
+		self.assertFalse(_should_refresh(5_000, 1_000))
+		self.assertTrue(_should_refresh(1_000, 1_000))
+		self.assertTrue(_should_refresh(0, 1_000))
+
+	def test_should_refresh_002(self):
+		""" Probabilistic early refresh """
+		self.assertTrue(_should_refresh(1_001, 1_000, 10 ** 12))
+		self.assertFalse(_should_refresh(10 ** 9, 1_000, 1))
+
+	# _lease_key #######################################################################################################
+
+	def test_lease_key_001(self):
+		self.assertEqual(_lease_key('key'), '{key}:pyluaredis-lease')
+		self.assertEqual(_lease_key('{user1}:key'), '{user1}:key:pyluaredis-lease')
+
+
+	# _parse_rate_limit_reply ##########################################################################################
+
+	def test_parse_rate_limit_reply_001(self):
+		res: dict = _parse_rate_limit_reply(('a', 'b'), [1, 4, 0, 0, 0, 250])
+		self.assertEqual(res, {
+			'allowed': False, 'retry_after_ms': 250, 'keys': {
+				'a': {'allowed': True, 'remaining': 4, 'retry_after_ms': 0},
+				'b': {'allowed': False, 'remaining': 0, 'retry_after_ms': 250}
+			}
+		})
+
+	def test_parse_rate_limit_reply_002(self):
+		res: dict = _parse_rate_limit_reply(('a', 'b'), [0, 0, -1, 0, 0, 250])
+		self.assertEqual(res['retry_after_ms'], -1)
+
 
 if __name__ == '__main__':
 	unittest.main()